@@ -1,6 +1,8 @@
 import logging
 
-from database import get_connection, init_db
+from config import settings
+from database import close_pool, init_db, pool_stats
+from database_async import async_pool_stats, close_async_pool, fetch_one, open_async_pool
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes.musiques import router as musiques_router
@@ -20,6 +22,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
 )
 
 app.include_router(musiques_router)
@@ -34,25 +37,55 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
 
+    logger.info(f"Using {settings.database_driver} database driver")
+    if settings.database_driver == "async":
+        try:
+            await open_async_pool()
+        except Exception as e:
+            logger.error(f"Failed to open async database pool: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled database connections on shutdown."""
+    close_pool()
+    await close_async_pool()
+
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint."""
     try:
-        conn = get_connection()
-        conn.close()
+        await fetch_one("SELECT 1")
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         return {"status": "unhealthy", "database": str(e)}
 
 
+@app.get("/metrics")
+def metrics():
+    """Connection pool statistics, used to size the pool."""
+    stats = async_pool_stats() if settings.database_driver == "async" else pool_stats()
+    return {"driver": settings.database_driver, "pool": stats}
+
+
 @app.get("/")
 def root():
     """Root endpoint."""
     return {
         "service": "service-bdd",
         "version": "1.0.0",
-        "endpoints": ["/health", "/musiques", "/musiques/{id}", "/musiques/search?q="],
+        "endpoints": [
+            "/health",
+            "/metrics",
+            "/musiques",
+            "/musiques/page?limit=&cursor=",
+            "/musiques/export",
+            "/musiques/changes?since=",
+            "/musiques/{id}",
+            "/musiques/search?q=",
+            "/musiques/match?q=",
+        ],
     }
 
 
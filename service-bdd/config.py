@@ -9,6 +9,20 @@ class Settings(BaseSettings):
     database_name: str = os.getenv("DATABASE_NAME", "musicdb")
     database_user: str = os.getenv("DATABASE_USER", "postgres")
     database_password: str = os.getenv("DATABASE_PASSWORD", "postgres")
+    db_connect_timeout: int = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+    # "async" (psycopg 3, async routes) or "sync" (psycopg2 on the threadpool)
+    database_driver: str = os.getenv("DATABASE_DRIVER", "async")
+
+    # Connection pool
+    db_pool_min_size: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    db_pool_max_size: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    db_pool_acquire_timeout: float = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "5.0"))
+    db_pool_max_idle: float = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+    db_pool_max_lifetime: float = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))
+    db_pool_ping_interval: float = float(os.getenv("DB_POOL_PING_INTERVAL", "30"))
+
+    # Rows fetched per round trip by the streaming export
+    export_batch_size: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
 
     @property
     def database_url(self) -> str:
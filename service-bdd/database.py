@@ -1,9 +1,245 @@
+import logging
+import threading
+import time
+from collections import deque
 from contextlib import contextmanager
+from typing import Optional
 
 import psycopg2
 from config import settings
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
 
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be acquired before the timeout."""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of psycopg2 connections."""
+
+    def __init__(
+        self,
+        min_size: int,
+        max_size: int,
+        acquire_timeout: float,
+        max_idle: float,
+        max_lifetime: float,
+        ping_interval: float,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(
+                "Invalid pool size: require 0 <= min_size <= max_size and max_size >= 1"
+            )
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, released_at), most recently released on the right
+        self._created_at = {}
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._stats = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "connections_broken": 0,
+            "connections_recycled": 0,
+            "acquired": 0,
+            "acquire_timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+        for _ in range(min_size):
+            conn = get_connection()
+            self._created_at[id(conn)] = time.monotonic()
+            self._size += 1
+            self._stats["connections_created"] += 1
+            self._idle.append((conn, time.monotonic()))
+
+    def _discard(self, conn, reason: str = "connections_closed"):
+        self._forget(conn, reason)
+        self._close(conn)
+
+    def _is_expired(self, conn, released_at: float, now: float) -> bool:
+        if self.max_idle and now - released_at > self.max_idle:
+            return True
+        created_at = self._created_at.get(id(conn), now)
+        return bool(self.max_lifetime) and now - created_at > self.max_lifetime
+
+    def _is_alive(self, conn) -> bool:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _prune_idle(self, now: float):
+        # Oldest idle connections sit on the left; the right end is reused first
+        while self._idle and self._is_expired(*self._idle[0], now):
+            conn, _ = self._idle.popleft()
+            self._discard(conn, "connections_recycled")
+
+    def getconn(self):
+        """Acquire a connection, waiting up to ``acquire_timeout`` seconds."""
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        while True:
+            with self._cond:
+                conn, stale = self._take_idle_or_slot(deadline)
+            if conn is None:
+                return self._connect(start)
+
+            # Pinged outside the lock: a hung server must not block the other acquires
+            if stale and not self._is_alive(conn):
+                with self._cond:
+                    self._forget(conn, "connections_broken")
+                self._close(conn)
+                continue
+
+            with self._cond:
+                if not self._closed:
+                    return self._checkout(conn, start)
+                self._forget(conn)
+            self._close(conn)
+            raise RuntimeError("Connection pool is closed")
+
+    def _take_idle_or_slot(self, deadline: float):
+        """
+        Pop an idle connection, or reserve a slot for a new one (returns None).
+
+        Called with the lock held. The idle connection is returned with
+        whether it must be pinged before use.
+        """
+        while True:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+
+            now = time.monotonic()
+            self._prune_idle(now)
+            while self._idle:
+                conn, released_at = self._idle.pop()
+                if conn.closed:
+                    self._discard(conn, "connections_broken")
+                    continue
+                stale = bool(self.ping_interval) and now - released_at > self.ping_interval
+                return conn, stale
+
+            if self._size < self.max_size:
+                # Reserve the slot before releasing the lock to connect
+                self._size += 1
+                return None, False
+
+            remaining = deadline - now
+            if remaining <= 0:
+                self._stats["acquire_timeouts"] += 1
+                raise PoolTimeoutError(
+                    f"Timed out after {self.acquire_timeout}s waiting for a database connection"
+                )
+            self._waiting += 1
+            try:
+                self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+    def _connect(self, start: float):
+        """Open a connection in a slot reserved by _take_idle_or_slot()."""
+        try:
+            conn = get_connection()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._stats["connections_created"] += 1
+            return self._checkout(conn, start)
+
+    def _forget(self, conn, reason: str = "connections_closed"):
+        # Lock held: free the slot of a connection closed afterwards by _close()
+        self._created_at.pop(id(conn), None)
+        self._size -= 1
+        self._stats[reason] += 1
+        self._cond.notify()
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled connection: {e}")
+
+    def _checkout(self, conn, start: float):
+        waited = time.monotonic() - start
+        self._in_use += 1
+        self._stats["acquired"] += 1
+        self._stats["wait_time_total"] += waited
+        self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+        return conn
+
+    def putconn(self, conn, broken: bool = False):
+        """Return a connection to the pool, discarding it if it is unusable."""
+        # Rolled back outside the lock: it is a server round trip
+        if not (broken or conn.closed):
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                broken = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+
+        with self._cond:
+            self._in_use -= 1
+            if broken or conn.closed:
+                self._discard(conn, "connections_broken")
+            elif self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        """Close all idle connections; in-use ones are closed when returned."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Return a snapshot of the pool usage counters."""
+        with self._cond:
+            acquired = self._stats["acquired"]
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                **self._stats,
+                "wait_time_avg": self._stats["wait_time_total"] / acquired if acquired else 0.0,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
 
 def get_connection():
     """Create a new database connection."""
@@ -13,23 +249,73 @@ def get_connection():
         database=settings.database_name,
         user=settings.database_user,
         password=settings.database_password,
+        connect_timeout=settings.db_connect_timeout,
     )
 
 
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    min_size=settings.db_pool_min_size,
+                    max_size=settings.db_pool_max_size,
+                    acquire_timeout=settings.db_pool_acquire_timeout,
+                    max_idle=settings.db_pool_max_idle,
+                    max_lifetime=settings.db_pool_max_lifetime,
+                    ping_interval=settings.db_pool_ping_interval,
+                )
+                logger.info(
+                    f"Database pool created (min={settings.db_pool_min_size}, "
+                    f"max={settings.db_pool_max_size})"
+                )
+    return _pool
+
+
+def close_pool():
+    """Close the connection pool if it was created."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def pool_stats() -> dict:
+    """Return pool statistics, or an empty dict if the pool is not created yet."""
+    return _pool.stats() if _pool is not None else {}
+
+
 @contextmanager
-def get_db_cursor():
-    """Context manager for database operations."""
-    conn = get_connection()
+def get_db_cursor(name: Optional[str] = None):
+    """
+    Context manager for database operations using a pooled connection.
+
+    Passing ``name`` opens a server-side (named) cursor, which fetches rows
+    lazily instead of loading the whole result set in memory.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    broken = False
+    cursor = None
     try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor = conn.cursor(name, cursor_factory=RealDictCursor)
         yield cursor
         conn.commit()
     except Exception as e:
-        conn.rollback()
+        broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
         raise e
     finally:
-        cursor.close()
-        conn.close()
+        if cursor is not None and not cursor.closed:
+            cursor.close()
+        pool.putconn(conn, broken=broken)
 
 
 def init_db():
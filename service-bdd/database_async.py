@@ -0,0 +1,145 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, Union
+
+from config import settings
+from database import get_db_cursor
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+QueryParams = Union[Sequence[Any], Mapping[str, Any]]
+
+_async_pool: Optional[AsyncConnectionPool] = None
+
+
+def _conninfo() -> str:
+    return f"{settings.database_url}?connect_timeout={settings.db_connect_timeout}"
+
+
+async def open_async_pool() -> AsyncConnectionPool:
+    """Open the process-wide async connection pool, creating it on first use."""
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = AsyncConnectionPool(
+            _conninfo(),
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size,
+            timeout=settings.db_pool_acquire_timeout,
+            max_idle=settings.db_pool_max_idle,
+            max_lifetime=settings.db_pool_max_lifetime,
+            open=False,
+        )
+        await _async_pool.open()
+        logger.info(
+            f"Async database pool created (min={settings.db_pool_min_size}, "
+            f"max={settings.db_pool_max_size})"
+        )
+    return _async_pool
+
+
+async def close_async_pool():
+    """Close the async connection pool if it was created."""
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+
+def async_pool_stats() -> dict:
+    """Return async pool statistics, or an empty dict if the pool is not created yet."""
+    return _async_pool.get_stats() if _async_pool is not None else {}
+
+
+@asynccontextmanager
+async def get_async_cursor():
+    """Async context manager for database operations using a pooled connection."""
+    pool = await open_async_pool()
+    async with pool.connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cursor:
+            yield cursor
+
+
+SET_LOCAL_QUERY = "SELECT set_config(%s, %s, true)"
+
+
+def _sync_fetch(
+    query: str, params: QueryParams, one: bool, local_settings: Optional[Dict[str, str]]
+):
+    with get_db_cursor() as cursor:
+        for name, value in (local_settings or {}).items():
+            cursor.execute(SET_LOCAL_QUERY, (name, value))
+        cursor.execute(query, params)
+        return cursor.fetchone() if one else cursor.fetchall()
+
+
+async def fetch_all(
+    query: str,
+    params: QueryParams = (),
+    local_settings: Optional[Dict[str, str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run a query on the configured driver and return all rows as dicts.
+
+    ``local_settings`` are applied with ``SET LOCAL`` semantics in the same
+    transaction, e.g. ``{"pg_trgm.similarity_threshold": "0.4"}``.
+    """
+    if settings.database_driver == "async":
+        async with get_async_cursor() as cursor:
+            for name, value in (local_settings or {}).items():
+                await cursor.execute(SET_LOCAL_QUERY, (name, value))
+            await cursor.execute(query, params)
+            return await cursor.fetchall()
+    return await run_in_threadpool(_sync_fetch, query, params, False, local_settings)
+
+
+async def fetch_one(
+    query: str,
+    params: QueryParams = (),
+    local_settings: Optional[Dict[str, str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Run a query on the configured driver and return the first row, if any."""
+    if settings.database_driver == "async":
+        async with get_async_cursor() as cursor:
+            for name, value in (local_settings or {}).items():
+                await cursor.execute(SET_LOCAL_QUERY, (name, value))
+            await cursor.execute(query, params)
+            return await cursor.fetchone()
+    return await run_in_threadpool(_sync_fetch, query, params, True, local_settings)
+
+
+def _sync_stream(query: str, params: QueryParams, batch_size: int):
+    with get_db_cursor(name="stream_cursor") as cursor:
+        cursor.itersize = batch_size
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+
+async def stream_batches(
+    query: str, params: QueryParams = (), batch_size: int = 1000
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Stream a query result in batches through a server-side cursor.
+
+    Memory stays bounded by ``batch_size`` rows whatever the result size.
+    """
+    if settings.database_driver == "async":
+        pool = await open_async_pool()
+        async with pool.connection() as conn:
+            async with conn.cursor(name="stream_cursor", row_factory=dict_row) as cursor:
+                await cursor.execute(query, params)
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+        return
+
+    async for rows in iterate_in_threadpool(_sync_stream(query, params, batch_size)):
+        yield rows
@@ -1 +1,8 @@
-from .musique import Musique, MusiqueCreate, MusiqueResponse
+from .musique import (
+    CatalogChanges,
+    Musique,
+    MusiqueCreate,
+    MusiquePage,
+    MusiqueResponse,
+    MusiqueSearchResult,
+)
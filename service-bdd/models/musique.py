@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -31,3 +31,18 @@ class MusiqueResponse(BaseModel):
     duree_secondes: int
     fichier_audio: str
     fichier_cover: Optional[str]
+
+
+class MusiqueSearchResult(MusiqueResponse):
+    score: Optional[float] = None
+
+
+class MusiquePage(BaseModel):
+    items: List[MusiqueResponse]
+    next_cursor: Optional[str] = None
+
+
+class CatalogChanges(BaseModel):
+    version: int
+    musiques: List[MusiqueResponse]
+    deleted: List[int]
@@ -1,62 +1,309 @@
-from typing import List, Optional
+import base64
+import binascii
+import json
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
 
-from database import get_db_cursor
-from fastapi import APIRouter, HTTPException, Query
-from models.musique import MusiqueResponse
+from config import settings
+from database_async import fetch_all, fetch_one, stream_batches
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from models.musique import CatalogChanges, MusiquePage, MusiqueResponse, MusiqueSearchResult
 
 router = APIRouter(prefix="/musiques", tags=["musiques"])
 
+MUSIQUE_COLUMNS = "id, titre, artiste, album, duree_secondes, fichier_audio, fichier_cover"
+
+
+def encode_cursor(row: dict) -> str:
+    """Encode the (artiste, titre, id) keyset position of a row."""
+    payload = json.dumps([row["artiste"], row["titre"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, int]:
+    """Decode a keyset cursor, raising 400 if it is malformed."""
+    try:
+        artiste, titre, musique_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(artiste), str(titre), int(musique_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+
+
+async def get_catalog_version() -> Optional[dict]:
+    """Return the catalog change counter and the time of the last change."""
+    return await fetch_one("SELECT version, updated_at FROM catalog_version")
+
+
+def catalog_headers(catalog: Optional[dict]) -> Dict[str, str]:
+    """Build validator headers (ETag, Last-Modified) from the catalog version."""
+    if not catalog:
+        return {}
+    # TIMESTAMPTZ column: an aware datetime, whatever the server TimeZone
+    updated_at = catalog["updated_at"].astimezone(timezone.utc)
+    return {
+        "ETag": f'W/"{catalog["version"]}"',
+        "Last-Modified": format_datetime(updated_at, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no ETag was sent."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = headers.get("ETag")
+        if etag is None:
+            return False
+        # Weak comparison: validators are compared without their W/ prefix
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            if since.tzinfo is None:
+                # "-0000" dates parse as naive: HTTP dates are always GMT
+                since = since.replace(tzinfo=timezone.utc)
+            return parsedate_to_datetime(headers["Last-Modified"]) <= since
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def check_not_modified(request: Request, response: Response) -> Optional[Response]:
+    """
+    Return a 304 response if the client copy is current.
+
+    Otherwise the validator headers are set on ``response`` and None is returned.
+    """
+    headers = catalog_headers(await get_catalog_version())
+    if is_not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
 
 @router.get("", response_model=List[MusiqueResponse])
-def get_all_musiques():
+async def get_all_musiques(request: Request, response: Response):
     """Récupère toutes les musiques."""
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT id, titre, artiste, album, duree_secondes, fichier_audio, fichier_cover
-            FROM musiques
-            ORDER BY artiste, titre
-        """)
-        results = cursor.fetchall()
+    not_modified = await check_not_modified(request, response)
+    if not_modified:
+        return not_modified
+
+    results = await fetch_all(
+        """
+        SELECT id, titre, artiste, album, duree_secondes, fichier_audio, fichier_cover
+        FROM musiques
+        ORDER BY artiste, titre
+    """
+    )
     return [MusiqueResponse(**row) for row in results]
 
 
-@router.get("/search", response_model=List[MusiqueResponse])
-def search_musiques(q: str = Query(..., min_length=1, description="Terme de recherche")):
-    """Recherche des musiques par titre ou artiste."""
-    with get_db_cursor() as cursor:
-        search_term = f"%{q.lower()}%"
-        cursor.execute(
-            """
-            SELECT id, titre, artiste, album, duree_secondes, fichier_audio, fichier_cover
+@router.get("/page", response_model=MusiquePage)
+async def get_musiques_page(
+    limit: int = Query(100, ge=1, le=1000, description="Taille de la page"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la page précédente"),
+):
+    """Récupère une page de musiques (pagination par curseur sur artiste, titre, id)."""
+    if cursor:
+        results = await fetch_all(
+            f"""
+            SELECT {MUSIQUE_COLUMNS}
             FROM musiques
-            WHERE LOWER(titre) LIKE %s OR LOWER(artiste) LIKE %s OR LOWER(album) LIKE %s
-            ORDER BY
-                CASE
-                    WHEN LOWER(titre) LIKE %s THEN 1
-                    WHEN LOWER(artiste) LIKE %s THEN 2
-                    ELSE 3
-                END,
-                titre
+            WHERE (artiste, titre, id) > (%s, %s, %s)
+            ORDER BY artiste, titre, id
+            LIMIT %s
         """,
-            (search_term, search_term, search_term, search_term, search_term),
+            (*decode_cursor(cursor), limit + 1),
         )
-        results = cursor.fetchall()
-    return [MusiqueResponse(**row) for row in results]
+    else:
+        results = await fetch_all(
+            f"""
+            SELECT {MUSIQUE_COLUMNS}
+            FROM musiques
+            ORDER BY artiste, titre, id
+            LIMIT %s
+        """,
+            (limit + 1,),
+        )
+
+    next_cursor = encode_cursor(results[limit - 1]) if len(results) > limit else None
+    return MusiquePage(
+        items=[MusiqueResponse(**row) for row in results[:limit]], next_cursor=next_cursor
+    )
+
+
+@router.get("/export")
+async def export_musiques():
+    """Exporte tout le catalogue en NDJSON (une musique par ligne), en flux continu."""
+
+    async def generate():
+        async for rows in stream_batches(
+            f"SELECT {MUSIQUE_COLUMNS} FROM musiques ORDER BY artiste, titre, id",
+            batch_size=settings.export_batch_size,
+        ):
+            yield "".join(MusiqueResponse(**row).model_dump_json() + "\n" for row in rows)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.get("/changes", response_model=CatalogChanges)
+async def get_catalog_changes(
+    since: int = Query(0, ge=0, description="Version déjà synchronisée (0 = tout le catalogue)"),
+):
+    """
+    Modifications du catalogue depuis une version donnée.
+
+    Renvoie les musiques créées ou modifiées et les identifiants supprimés
+    après ``since``, ainsi que la version à transmettre au prochain appel.
+    """
+    catalog = await get_catalog_version()
+    version = catalog["version"] if catalog else 0
+
+    if since == 0:
+        results = await fetch_all(
+            f"SELECT {MUSIQUE_COLUMNS} FROM musiques ORDER BY artiste, titre, id"
+        )
+        deleted = []
+    else:
+        results = await fetch_all(
+            f"SELECT {MUSIQUE_COLUMNS} FROM musiques WHERE version > %s ORDER BY version",
+            (since,),
+        )
+        deleted = await fetch_all(
+            "SELECT id FROM musiques_deleted WHERE version > %s ORDER BY version", (since,)
+        )
+
+    return CatalogChanges(
+        version=version,
+        musiques=[MusiqueResponse(**row) for row in results],
+        deleted=[row["id"] for row in deleted],
+    )
+
+
+@router.get("/search", response_model=List[MusiqueSearchResult])
+async def search_musiques(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, description="Terme de recherche"),
+    mode: str = Query(
+        "like",
+        pattern="^(like|similarity)$",
+        description="'like' (sous-chaîne) ou 'similarity' (trigrammes, trié par score)",
+    ),
+    min_score: float = Query(0.3, ge=0.0, le=1.0, description="Score minimum (mode similarity)"),
+    limit: int = Query(
+        20, ge=1, le=200, description="Nombre maximum de résultats (mode similarity)"
+    ),
+):
+    """Recherche des musiques par titre ou artiste."""
+    not_modified = await check_not_modified(request, response)
+    if not_modified:
+        return not_modified
+
+    if mode == "similarity":
+        return await _similarity_search(q, min_score, limit)
+
+    search_term = f"%{q.lower()}%"
+    results = await fetch_all(
+        """
+        SELECT id, titre, artiste, album, duree_secondes, fichier_audio, fichier_cover
+        FROM musiques
+        WHERE LOWER(titre) LIKE %s OR LOWER(artiste) LIKE %s OR LOWER(album) LIKE %s
+        ORDER BY
+            CASE
+                WHEN LOWER(titre) LIKE %s THEN 1
+                WHEN LOWER(artiste) LIKE %s THEN 2
+                ELSE 3
+            END,
+            titre
+    """,
+        (search_term, search_term, search_term, search_term, search_term),
+    )
+    return [MusiqueSearchResult(**row) for row in results]
+
+
+async def _similarity_search(q: str, min_score: float, limit: int) -> List[MusiqueSearchResult]:
+    """Trigram similarity search; the % operator lets the GIN indexes prune rows."""
+    results = await fetch_all(
+        """
+        SELECT id, titre, artiste, album, duree_secondes, fichier_audio, fichier_cover,
+            GREATEST(
+                similarity(LOWER(titre), %(q)s),
+                similarity(LOWER(artiste), %(q)s),
+                COALESCE(similarity(LOWER(album), %(q)s), 0)
+            ) AS score
+        FROM musiques
+        WHERE LOWER(titre) %% %(q)s OR LOWER(artiste) %% %(q)s OR LOWER(album) %% %(q)s
+        ORDER BY score DESC, titre
+        LIMIT %(limit)s
+    """,
+        {"q": q.lower(), "limit": limit},
+        local_settings={"pg_trgm.similarity_threshold": str(min_score)},
+    )
+    return [MusiqueSearchResult(**row) for row in results]
+
+
+@router.get("/match", response_model=List[MusiqueSearchResult])
+async def match_musiques(
+    q: str = Query(..., min_length=1, description="Requête vocale (titre, artiste, album)"),
+    limit: int = Query(5, ge=1, le=50, description="Nombre maximum de résultats"),
+    min_score: float = Query(0.5, ge=0.0, le=1.0, description="Score minimum"),
+):
+    """
+    Classement flou des musiques pour une requête vocale.
+
+    Reprend la pondération de MusicMatcher (service-vocal) : meilleur score
+    entre titre, artiste, "artiste titre", "titre artiste" et album (x0.7),
+    calculé avec word_similarity de pg_trgm.
+    """
+    results = await fetch_all(
+        """
+        SELECT * FROM (
+            SELECT id, titre, artiste, album, duree_secondes, fichier_audio, fichier_cover,
+                GREATEST(
+                    word_similarity(%(q)s, LOWER(titre)),
+                    word_similarity(%(q)s, LOWER(artiste)),
+                    word_similarity(%(q)s, LOWER(artiste || ' ' || titre)),
+                    word_similarity(%(q)s, LOWER(titre || ' ' || artiste)),
+                    COALESCE(word_similarity(%(q)s, LOWER(album)) * 0.7, 0)
+                ) AS score
+            FROM musiques
+            WHERE %(q)s <%% LOWER(titre)
+                OR %(q)s <%% LOWER(artiste)
+                OR %(q)s <%% LOWER(artiste || ' ' || titre)
+                OR %(q)s <%% LOWER(titre || ' ' || artiste)
+                OR %(q)s <%% LOWER(album)
+        ) AS candidates
+        WHERE score >= %(min_score)s
+        ORDER BY score DESC, artiste, titre, id
+        LIMIT %(limit)s
+    """,
+        {"q": q.lower().strip(), "min_score": min_score, "limit": limit},
+        local_settings={"pg_trgm.word_similarity_threshold": str(min_score)},
+    )
+    return [MusiqueSearchResult(**row) for row in results]
 
 
 @router.get("/{musique_id}", response_model=MusiqueResponse)
-def get_musique(musique_id: int):
+async def get_musique(musique_id: int, request: Request, response: Response):
     """Récupère une musique par son ID."""
-    with get_db_cursor() as cursor:
-        cursor.execute(
-            """
-            SELECT id, titre, artiste, album, duree_secondes, fichier_audio, fichier_cover
-            FROM musiques
-            WHERE id = %s
-        """,
-            (musique_id,),
-        )
-        result = cursor.fetchone()
+    not_modified = await check_not_modified(request, response)
+    if not_modified:
+        return not_modified
+
+    result = await fetch_one(
+        """
+        SELECT id, titre, artiste, album, duree_secondes, fichier_audio, fichier_cover
+        FROM musiques
+        WHERE id = %s
+    """,
+        (musique_id,),
+    )
 
     if not result:
         raise HTTPException(status_code=404, detail="Musique non trouvée")
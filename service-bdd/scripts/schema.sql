@@ -15,3 +15,59 @@ CREATE TABLE IF NOT EXISTS musiques (
 CREATE INDEX IF NOT EXISTS idx_musiques_titre ON musiques(LOWER(titre));
 CREATE INDEX IF NOT EXISTS idx_musiques_artiste ON musiques(LOWER(artiste));
 CREATE INDEX IF NOT EXISTS idx_musiques_album ON musiques(LOWER(album));
+
+-- Trigram indexes for fuzzy search (also serve LIKE '%q%' on LOWER(col))
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_musiques_titre_trgm ON musiques USING gin (LOWER(titre) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_musiques_artiste_trgm ON musiques USING gin (LOWER(artiste) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_musiques_album_trgm ON musiques USING gin (LOWER(album) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_musiques_artiste_titre_trgm ON musiques USING gin (LOWER(artiste || ' ' || titre) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_musiques_titre_artiste_trgm ON musiques USING gin (LOWER(titre || ' ' || artiste) gin_trgm_ops);
+
+-- Keyset pagination order for /musiques/page and /musiques/export
+CREATE INDEX IF NOT EXISTS idx_musiques_artiste_titre_id ON musiques(artiste, titre, id);
+
+-- Catalog versioning: a single change counter bumped by trigger on every write
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+-- Databases created with a TIMESTAMP column: values are read in the session TimeZone
+ALTER TABLE catalog_version ALTER COLUMN updated_at TYPE TIMESTAMPTZ;
+INSERT INTO catalog_version (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+ALTER TABLE musiques ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE musiques ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+CREATE INDEX IF NOT EXISTS idx_musiques_version ON musiques(version);
+
+-- Tombstones so replicas can sync deletions incrementally
+CREATE TABLE IF NOT EXISTS musiques_deleted (
+    id INTEGER PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_musiques_deleted_version ON musiques_deleted(version);
+
+CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS TRIGGER AS $$
+DECLARE
+    new_version BIGINT;
+BEGIN
+    UPDATE catalog_version
+    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    RETURNING version INTO new_version;
+
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO musiques_deleted (id, version) VALUES (OLD.id, new_version)
+        ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version;
+        RETURN OLD;
+    END IF;
+    NEW.version := new_version;
+    NEW.updated_at := CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_musiques_version ON musiques;
+CREATE TRIGGER trg_musiques_version
+    BEFORE INSERT OR UPDATE OR DELETE ON musiques
+    FOR EACH ROW EXECUTE FUNCTION bump_catalog_version();
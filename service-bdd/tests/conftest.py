@@ -8,6 +8,9 @@ import pytest
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Fail fast on unmocked database access (no PostgreSQL during unit tests)
+os.environ.setdefault("DB_POOL_ACQUIRE_TIMEOUT", "0.5")
+
 
 @pytest.fixture(autouse=True)
 def reset_environment(monkeypatch):
@@ -1,6 +1,8 @@
 """Tests for service-bdd API endpoints."""
 
-from unittest.mock import MagicMock, patch
+import json
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -60,10 +62,10 @@ class TestHealthEndpoint:
         data = response.json()
         assert "status" in data
 
-    @patch("app.get_connection")
-    def test_health_healthy_when_db_connected(self, mock_conn):
+    @patch("app.fetch_one", new_callable=AsyncMock)
+    def test_health_healthy_when_db_connected(self, mock_fetch):
         """Health should return healthy when DB is connected."""
-        mock_conn.return_value = MagicMock()
+        mock_fetch.return_value = {"?column?": 1}
 
         from app import app
 
@@ -73,10 +75,10 @@ class TestHealthEndpoint:
         assert data["status"] == "healthy"
         assert data["database"] == "connected"
 
-    @patch("app.get_connection")
-    def test_health_unhealthy_when_db_error(self, mock_conn):
+    @patch("app.fetch_one", new_callable=AsyncMock)
+    def test_health_unhealthy_when_db_error(self, mock_fetch):
         """Health should return unhealthy when DB connection fails."""
-        mock_conn.side_effect = Exception("Connection failed")
+        mock_fetch.side_effect = Exception("Connection failed")
 
         from app import app
 
@@ -86,6 +88,295 @@ class TestHealthEndpoint:
         assert data["status"] == "unhealthy"
 
 
+class TestMetricsEndpoint:
+    """Tests for metrics endpoint."""
+
+    @patch("app.pool_stats")
+    def test_metrics_returns_sync_pool_stats(self, mock_stats):
+        """Metrics should expose the sync pool statistics with the sync driver."""
+        mock_stats.return_value = {"size": 2, "in_use": 1}
+
+        from app import app, settings
+
+        with patch.object(settings, "database_driver", "sync"):
+            client = TestClient(app, raise_server_exceptions=False)
+            response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.json() == {"driver": "sync", "pool": {"size": 2, "in_use": 1}}
+
+    @patch("app.async_pool_stats")
+    def test_metrics_returns_async_pool_stats(self, mock_stats):
+        """Metrics should expose the async pool statistics with the async driver."""
+        mock_stats.return_value = {"pool_size": 4}
+
+        from app import app, settings
+
+        with patch.object(settings, "database_driver", "async"):
+            client = TestClient(app, raise_server_exceptions=False)
+            response = client.get("/metrics")
+        assert response.json() == {"driver": "async", "pool": {"pool_size": 4}}
+
+
+class TestMusiquesEndpoints:
+    """Tests for musiques routes with a mocked data layer."""
+
+    @pytest.fixture(autouse=True)
+    def catalog_version(self):
+        with patch("routes.musiques.get_catalog_version", new_callable=AsyncMock) as mock:
+            mock.return_value = {
+                "version": 7,
+                "updated_at": datetime(2024, 1, 15, 10, 30, tzinfo=timezone.utc),
+            }
+            yield mock
+
+    @pytest.fixture
+    def musique_row(self):
+        return {
+            "id": 1,
+            "titre": "Bohemian Rhapsody",
+            "artiste": "Queen",
+            "album": "A Night at the Opera",
+            "duree_secondes": 354,
+            "fichier_audio": "bohemian.mp3",
+            "fichier_cover": "queen_cover.jpg",
+        }
+
+    @patch("routes.musiques.fetch_all", new_callable=AsyncMock)
+    def test_get_all_musiques(self, mock_fetch, musique_row):
+        """Listing should return all rows."""
+        mock_fetch.return_value = [musique_row]
+
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques")
+        assert response.status_code == 200
+        assert response.json() == [musique_row]
+
+    @patch("routes.musiques.fetch_all", new_callable=AsyncMock)
+    def test_search_like_mode_has_no_score(self, mock_fetch, musique_row):
+        """Default search mode should keep substring matching without score."""
+        mock_fetch.return_value = [musique_row]
+
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques/search", params={"q": "queen"})
+        assert response.status_code == 200
+        assert response.json()[0]["score"] is None
+        assert "LIKE" in mock_fetch.call_args.args[0]
+
+    @patch("routes.musiques.fetch_all", new_callable=AsyncMock)
+    def test_search_similarity_mode(self, mock_fetch, musique_row):
+        """Similarity mode should apply threshold, limit and return scores."""
+        mock_fetch.return_value = [{**musique_row, "score": 0.8}]
+
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get(
+            "/musiques/search",
+            params={"q": "Bohemian", "mode": "similarity", "min_score": 0.4, "limit": 5},
+        )
+        assert response.status_code == 200
+        assert response.json()[0]["score"] == 0.8
+        args, kwargs = mock_fetch.call_args
+        assert args[1] == {"q": "bohemian", "limit": 5}
+        assert kwargs["local_settings"] == {"pg_trgm.similarity_threshold": "0.4"}
+
+    def test_search_invalid_mode(self):
+        """Unknown search modes should be rejected."""
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques/search", params={"q": "queen", "mode": "regex"})
+        assert response.status_code == 422
+
+    @patch("routes.musiques.fetch_all", new_callable=AsyncMock)
+    def test_match_returns_ranked_results(self, mock_fetch, musique_row):
+        """Match should rank in the database with the given threshold."""
+        mock_fetch.return_value = [{**musique_row, "score": 0.92}]
+
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques/match", params={"q": " Queen ", "limit": 1})
+        assert response.status_code == 200
+        assert response.json()[0]["titre"] == "Bohemian Rhapsody"
+        assert response.json()[0]["score"] == 0.92
+        args, kwargs = mock_fetch.call_args
+        assert args[1] == {"q": "queen", "min_score": 0.5, "limit": 1}
+        assert kwargs["local_settings"] == {"pg_trgm.word_similarity_threshold": "0.5"}
+
+    def test_match_requires_query(self):
+        """Match should require a query."""
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques/match")
+        assert response.status_code == 422
+
+    @patch("routes.musiques.fetch_all", new_callable=AsyncMock)
+    def test_page_returns_next_cursor(self, mock_fetch, musique_row):
+        """A full page should return a cursor pointing after its last row."""
+        second = {**musique_row, "id": 2, "titre": "Radio Ga Ga"}
+        mock_fetch.return_value = [musique_row, second]
+
+        from app import app
+        from routes.musiques import decode_cursor
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques/page", params={"limit": 1})
+        data = response.json()
+        assert response.status_code == 200
+        assert [m["id"] for m in data["items"]] == [1]
+        assert decode_cursor(data["next_cursor"]) == ("Queen", "Bohemian Rhapsody", 1)
+        assert mock_fetch.call_args.args[1] == (2,)
+
+    @patch("routes.musiques.fetch_all", new_callable=AsyncMock)
+    def test_page_with_cursor_uses_keyset(self, mock_fetch, musique_row):
+        """A cursor should be turned into a keyset predicate."""
+        mock_fetch.return_value = [musique_row]
+
+        from app import app
+        from routes.musiques import encode_cursor
+
+        cursor = encode_cursor({"artiste": "ABBA", "titre": "Waterloo", "id": 9})
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques/page", params={"limit": 10, "cursor": cursor})
+        assert response.json()["next_cursor"] is None
+        assert "(artiste, titre, id) >" in mock_fetch.call_args.args[0]
+        assert mock_fetch.call_args.args[1] == ("ABBA", "Waterloo", 9, 11)
+
+    def test_page_invalid_cursor(self):
+        """A malformed cursor should be rejected with 400."""
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques/page", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+    def test_export_streams_ndjson(self, musique_row):
+        """Export should emit one JSON document per line."""
+
+        async def fake_stream(query, params=(), batch_size=1000):
+            yield [musique_row]
+            yield [{**musique_row, "id": 2}]
+
+        from app import app
+
+        with patch("routes.musiques.stream_batches", fake_stream):
+            client = TestClient(app, raise_server_exceptions=False)
+            response = client.get("/musiques/export")
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.text.strip().split("\n")
+        assert [json.loads(line)["id"] for line in lines] == [1, 2]
+
+    @patch("routes.musiques.fetch_all", new_callable=AsyncMock)
+    def test_get_all_sets_validators(self, mock_fetch, musique_row):
+        """Listing should carry ETag and Last-Modified from the catalog version."""
+        mock_fetch.return_value = [musique_row]
+
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques")
+        assert response.headers["etag"] == 'W/"7"'
+        assert response.headers["last-modified"] == "Mon, 15 Jan 2024 10:30:00 GMT"
+
+    @patch("routes.musiques.fetch_all", new_callable=AsyncMock)
+    def test_get_all_not_modified(self, mock_fetch):
+        """A matching If-None-Match should return 304 without querying rows."""
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques", headers={"If-None-Match": '"7"'})
+        assert response.status_code == 304
+        assert response.content == b""
+        mock_fetch.assert_not_called()
+
+    @patch("routes.musiques.fetch_all", new_callable=AsyncMock)
+    def test_search_modified_when_version_changed(self, mock_fetch, musique_row):
+        """A stale ETag should return the full response."""
+        mock_fetch.return_value = [musique_row]
+
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get(
+            "/musiques/search", params={"q": "queen"}, headers={"If-None-Match": 'W/"6"'}
+        )
+        assert response.status_code == 200
+        assert response.headers["etag"] == 'W/"7"'
+
+    @patch("routes.musiques.fetch_one", new_callable=AsyncMock)
+    def test_get_musique_if_modified_since(self, mock_fetch):
+        """If-Modified-Since after the last change should return 304."""
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get(
+            "/musiques/1", headers={"If-Modified-Since": "Tue, 16 Jan 2024 00:00:00 GMT"}
+        )
+        assert response.status_code == 304
+        mock_fetch.assert_not_called()
+
+    @patch("routes.musiques.fetch_one", new_callable=AsyncMock)
+    def test_get_musique_if_modified_since_without_zone(self, mock_fetch, musique_row):
+        """A "-0000" date (no zone) should be read as GMT rather than fail."""
+        mock_fetch.return_value = musique_row
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get(
+            "/musiques/1", headers={"If-Modified-Since": "Tue, 16 Jan 2024 00:00:00 -0000"}
+        )
+        assert response.status_code == 304
+
+        response = client.get(
+            "/musiques/1", headers={"If-Modified-Since": "Sun, 14 Jan 2024 00:00:00 -0000"}
+        )
+        assert response.status_code == 200
+
+    @patch("routes.musiques.fetch_all", new_callable=AsyncMock)
+    def test_changes_full_snapshot(self, mock_fetch, musique_row):
+        """since=0 should return the whole catalog and the current version."""
+        mock_fetch.return_value = [musique_row]
+
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques/changes")
+        assert response.json() == {"version": 7, "musiques": [musique_row], "deleted": []}
+        assert mock_fetch.call_count == 1
+
+    @patch("routes.musiques.fetch_all", new_callable=AsyncMock)
+    def test_changes_incremental(self, mock_fetch, musique_row):
+        """since>0 should return changed rows and tombstones after that version."""
+        mock_fetch.side_effect = [[musique_row], [{"id": 4}, {"id": 5}]]
+
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques/changes", params={"since": 5})
+        data = response.json()
+        assert data["version"] == 7
+        assert data["musiques"] == [musique_row]
+        assert data["deleted"] == [4, 5]
+        assert all(call.args[1] == (5,) for call in mock_fetch.call_args_list)
+
+    @patch("routes.musiques.fetch_one", new_callable=AsyncMock)
+    def test_get_musique_not_found(self, mock_fetch):
+        """Unknown id should return 404."""
+        mock_fetch.return_value = None
+
+        from app import app
+
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/musiques/42")
+        assert response.status_code == 404
+
+
 class TestAppConfiguration:
     """Tests for app configuration."""
 
@@ -0,0 +1,211 @@
+"""Tests for database connection pool."""
+
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+
+def make_connection():
+    """Create a fake psycopg2 connection."""
+    conn = MagicMock()
+    conn.closed = 0
+    conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_IDLE
+    return conn
+
+
+def make_pool(**kwargs):
+    from database import ConnectionPool
+
+    options = {
+        "min_size": 0,
+        "max_size": 2,
+        "acquire_timeout": 0.05,
+        "max_idle": 300,
+        "max_lifetime": 3600,
+        "ping_interval": 0,
+    }
+    options.update(kwargs)
+    return ConnectionPool(**options)
+
+
+@pytest.fixture
+def mock_connect():
+    with patch("database.psycopg2.connect") as connect:
+        connect.side_effect = lambda **kwargs: make_connection()
+        yield connect
+
+
+class TestConnectionPool:
+    """Tests for ConnectionPool class."""
+
+    def test_invalid_sizes_rejected(self, mock_connect):
+        """Pool should reject min_size greater than max_size."""
+        with pytest.raises(ValueError):
+            make_pool(min_size=3, max_size=2)
+
+    def test_min_size_connections_opened(self, mock_connect):
+        """Pool should open min_size connections eagerly."""
+        pool = make_pool(min_size=2)
+        assert mock_connect.call_count == 2
+        assert pool.stats()["idle"] == 2
+
+    def test_connection_reused(self, mock_connect):
+        """A returned connection should be handed out again."""
+        pool = make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        assert pool.getconn() is conn
+        assert mock_connect.call_count == 1
+
+    def test_acquire_timeout_when_exhausted(self, mock_connect):
+        """Pool should raise PoolTimeoutError when max_size is reached."""
+        from database import PoolTimeoutError
+
+        pool = make_pool(max_size=1)
+        pool.getconn()
+        with pytest.raises(PoolTimeoutError):
+            pool.getconn()
+        assert pool.stats()["acquire_timeouts"] == 1
+
+    def test_broken_connection_discarded(self, mock_connect):
+        """Connections returned as broken should not be reused."""
+        pool = make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn, broken=True)
+        assert pool.getconn() is not conn
+        assert pool.stats()["connections_broken"] == 1
+
+    def test_closed_connection_discarded(self, mock_connect):
+        """Idle connections closed by the server should be replaced."""
+        pool = make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.closed = 1
+        assert pool.getconn() is not conn
+
+    def test_idle_connection_recycled(self, mock_connect):
+        """Connections idle longer than max_idle should be closed."""
+        pool = make_pool(max_idle=0.001)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        with patch("database.time.monotonic", return_value=10**9):
+            assert pool.getconn() is not conn
+        assert pool.stats()["connections_recycled"] == 1
+
+    def test_stale_connection_pinged(self, mock_connect):
+        """Connections failing the liveness ping should be replaced."""
+        pool = make_pool(ping_interval=0.001, max_idle=0, max_lifetime=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.cursor.return_value.__enter__.return_value.execute.side_effect = (
+            psycopg2.OperationalError("server closed the connection")
+        )
+        with patch("database.time.monotonic", return_value=10**9):
+            assert pool.getconn() is not conn
+        assert pool.stats()["connections_broken"] == 1
+
+    def test_ping_does_not_hold_the_lock(self, mock_connect):
+        """Other threads should use the pool while a stale connection is pinged."""
+        pool = make_pool(ping_interval=0.001, max_idle=0, max_lifetime=0)
+        conn, other = pool.getconn(), pool.getconn()
+        pool.putconn(conn)
+        blocked = []
+
+        def ping(query):
+            # A slow server: another thread returns its connection meanwhile
+            thread = threading.Thread(target=pool.putconn, args=(other,))
+            thread.start()
+            thread.join(timeout=1)
+            blocked.append(thread.is_alive())
+
+        conn.cursor.return_value.__enter__.return_value.execute.side_effect = ping
+        with patch("database.time.monotonic", return_value=10**9):
+            assert pool.getconn() is conn
+        assert blocked == [False]
+
+    def test_rollback_failure_discards(self, mock_connect):
+        """A connection whose rollback fails on return should be discarded."""
+        pool = make_pool()
+        conn = pool.getconn()
+        conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_INERROR
+        conn.rollback.side_effect = psycopg2.OperationalError("server closed the connection")
+        pool.putconn(conn)
+        assert pool.stats()["connections_broken"] == 1
+        assert pool.stats()["idle"] == 0
+
+    def test_stats(self, mock_connect):
+        """Stats should report pool occupancy."""
+        pool = make_pool()
+        pool.getconn()
+        stats = pool.stats()
+        assert stats["size"] == 1
+        assert stats["in_use"] == 1
+        assert stats["acquired"] == 1
+
+
+class TestGetDbCursor:
+    """Tests for get_db_cursor context manager."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_pool(self, mock_connect):
+        import database
+
+        database.close_pool()
+        yield
+        database.close_pool()
+
+    def test_commit_and_return_to_pool(self, mock_connect):
+        """Cursor context should commit and release the connection."""
+        import database
+
+        with database.get_db_cursor() as cursor:
+            cursor.execute("SELECT 1")
+        stats = database.pool_stats()
+        assert stats["in_use"] == 0
+        assert stats["idle"] == 1
+
+    def test_operational_error_discards_connection(self, mock_connect):
+        """An OperationalError should mark the connection as broken."""
+        import database
+
+        with pytest.raises(psycopg2.OperationalError):
+            with database.get_db_cursor():
+                raise psycopg2.OperationalError("connection lost")
+        assert database.pool_stats()["connections_broken"] == 1
+
+
+class TestFetchDispatch:
+    """Tests for driver selection in database_async."""
+
+    async def test_sync_driver_uses_pooled_cursor(self):
+        """fetch_one should go through get_db_cursor with the sync driver."""
+        import database_async
+
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {"id": 1}
+        with (
+            patch.object(database_async.settings, "database_driver", "sync"),
+            patch("database_async.get_db_cursor") as mock_cursor,
+        ):
+            mock_cursor.return_value.__enter__.return_value = cursor
+            row = await database_async.fetch_one("SELECT 1")
+        assert row == {"id": 1}
+        cursor.execute.assert_called_once_with("SELECT 1", ())
+
+    async def test_async_driver_uses_async_cursor(self):
+        """fetch_all should go through the async pool with the async driver."""
+        import database_async
+
+        cursor = MagicMock()
+        cursor.execute = AsyncMock()
+        cursor.fetchall = AsyncMock(return_value=[{"id": 1}, {"id": 2}])
+        with (
+            patch.object(database_async.settings, "database_driver", "async"),
+            patch("database_async.get_async_cursor") as mock_cursor,
+        ):
+            mock_cursor.return_value.__aenter__.return_value = cursor
+            rows = await database_async.fetch_all("SELECT id FROM musiques")
+        assert rows == [{"id": 1}, {"id": 2}]
@@ -1,20 +1,43 @@
-import io
+import asyncio
+import json
 import logging
 import os
-import tempfile
+import tarfile
+import time
+import zipfile
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple, Union
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from config import settings
+from fastapi import FastAPI, File, HTTPException, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from models import RecognitionResponse
-from pydub import AudioSegment
+from fastapi.responses import StreamingResponse
+from models import BatchCommandRequest, BatchCommandResponse, CommandRequest, RecognitionResponse
+from services.audio_converter import SAMPLE_RATE, AudioDecoder, stream_pcm
+from services.batch import RecordingTooLargeError, count_recordings, iter_recordings
 from services.bdd_client import BddClient
+from services.catalog_replica import CatalogReplica
 from services.command_parser import CommandParser, Intent
-from services.music_matcher import MusicMatcher
-from services.speech_to_text import SpeechToTextService
+from services.early_exit import EarlyExitPolicy
+from services.executors import BoundedExecutor, ExecutorBusyError
+from services.grammar import GrammarBuilder
+from services.music_matcher import CatalogIndex, MusicMatcher
+from services.result_cache import ResultCache
+from services.speech_to_text import (
+    SpeechToTextService,
+    init_worker,
+    set_worker_service,
+    worker_count,
+    worker_transcribe_details,
+    worker_transcribe_stream,
+)
+from services.vad import VoiceActivityDetector
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# PCM sample rates accepted from /ws/recognize clients
+STREAM_SAMPLE_RATES = (8000, 16000)
+
 app = FastAPI(
     title="Service Vocal - Music Voice App",
     description="API pour la reconnaissance vocale et le traitement des commandes",
@@ -34,20 +57,90 @@ stt_service = None
 command_parser = CommandParser()
 music_matcher = MusicMatcher()
 bdd_client = BddClient()
+catalog_replica = CatalogReplica(bdd_client)
+# Vosk releases the GIL while decoding: threads share one model; the process
+# executor preforks workers that inherit the parent model or load their own
+stt_in_processes = settings.stt_executor == "process"
+stt_model_per_worker = stt_in_processes and settings.stt_model_sharing == "per_worker"
+stt_executor = BoundedExecutor(
+    "stt",
+    worker_count(),
+    settings.stt_max_pending,
+    kind=settings.stt_executor,
+    initializer=init_worker if stt_in_processes else None,
+    initargs=(stt_model_per_worker,) if stt_in_processes else (),
+    start_method="fork" if stt_in_processes and not stt_model_per_worker else None,
+)
+conversion_executor = BoundedExecutor(
+    "conversion",
+    settings.conversion_workers,
+    settings.conversion_max_pending,
+    kind=settings.conversion_executor,
+)
+audio_decoder = AudioDecoder(conversion_executor)
+voice_detector = VoiceActivityDetector()
+grammar_builder = GrammarBuilder()
+early_exit_policy = EarlyExitPolicy()
+result_cache = ResultCache()
+# WebSocket recognizers live in this process: they need threads even when
+# file transcriptions go to worker processes
+stream_executor = (
+    BoundedExecutor("stt-stream", worker_count(), settings.stt_max_pending)
+    if stt_in_processes
+    else stt_executor
+)
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup."""
+    # Fork the worker processes first, before the replica sync starts threads
+    await start_stt()
+    await bdd_client.start()
+    if settings.match_mode == "local":
+        await catalog_replica.start()
+
+
+async def start_stt():
+    """Load the Vosk model and start the conversion and STT executors."""
     global stt_service
+    conversion_executor.start()
     try:
-        stt_service = SpeechToTextService()
+        if stt_model_per_worker:
+            # Workers load their own model: fork them first so they do not inherit
+            # the parent one, which the WebSocket streams with
+            stt_executor.start()
+            await stt_executor.run(os.getpid)
+            stt_service = SpeechToTextService()
+        else:
+            stt_service = SpeechToTextService()
+            if stt_in_processes:
+                set_worker_service(stt_service)
+            stt_executor.start()
+            if stt_in_processes:
+                # Fork the workers now, with the model loaded, instead of on the first request
+                await stt_executor.run(os.getpid)
         logger.info("Speech-to-text service initialized")
     except Exception as e:
         logger.error(f"Failed to initialize STT service: {e}")
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the catalog sync, the executors and the pooled HTTP connections to service-bdd."""
+    await catalog_replica.stop()
+    await bdd_client.close()
+    stop_executors()
+
+
+def stop_executors():
+    """Wait for the running decodings and release the executor workers."""
+    stt_executor.shutdown()
+    stream_executor.shutdown()
+    conversion_executor.shutdown()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -59,10 +152,41 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+def metrics():
+    """Internal metrics (catalog replica, matcher, audio decoding, executor queues)."""
+    return {
+        "catalog_replica": catalog_replica.stats(),
+        "matcher": music_matcher.stats(),
+        "audio": audio_decoder.stats(),
+        "vad": voice_detector.stats(),
+        "grammar": grammar_builder.stats(),
+        "early_exit": early_exit_policy.stats(),
+        "result_cache": result_cache.stats(),
+        "executors": {
+            "stt": stt_executor.stats(),
+            **({"stt_stream": stream_executor.stats()} if stt_in_processes else {}),
+            "conversion": conversion_executor.stats(),
+        },
+    }
+
+
 @app.get("/")
 def root():
     """Root endpoint."""
-    return {"service": "service-vocal", "version": "1.0.0", "endpoints": ["/health", "/recognize"]}
+    return {
+        "service": "service-vocal",
+        "version": "1.0.0",
+        "endpoints": [
+            "/health",
+            "/metrics",
+            "/recognize",
+            "/command",
+            "/transcribe/batch",
+            "/command/batch",
+            "/ws/recognize",
+        ],
+    }
 
 
 @app.post("/recognize", response_model=RecognitionResponse)
@@ -70,7 +194,7 @@ async def recognize_audio(audio: UploadFile = File(...)):
     """
     Process audio file and return recognized command.
 
-    Accepts WAV or other audio formats (will be converted to WAV 16kHz mono).
+    Accepts WAV or other audio formats (decoded to 16kHz mono PCM in memory).
     """
     if not stt_service:
         raise HTTPException(status_code=503, detail="STT service not available")
@@ -80,48 +204,41 @@ async def recognize_audio(audio: UploadFile = File(...)):
         audio_content = await audio.read()
         logger.info(f"Received audio file: {audio.filename}, size: {len(audio_content)} bytes")
 
-        # Convert to WAV 16kHz mono if needed
-        wav_path = await convert_to_wav(audio_content, audio.filename)
-
-        try:
-            # Transcribe audio
-            transcript = stt_service.transcribe(wav_path)
-
-            if not transcript:
-                return RecognitionResponse(
-                    success=False,
-                    transcript=None,
-                    intent=Intent.UNKNOWN.value,
-                    error="No speech detected",
-                )
-
-            # Parse command
-            intent, music_query = command_parser.parse(transcript)
-
-            # If PLAY intent with query, find matching music
-            musique = None
-            if intent == Intent.PLAY and music_query:
-                musiques = await bdd_client.get_all_musiques()
-                musique = music_matcher.find_best_match(music_query, musiques)
-
-                if not musique:
-                    return RecognitionResponse(
-                        success=True,
-                        transcript=transcript,
-                        intent=intent.value,
-                        musique=None,
-                        error=f"Aucune musique trouvée pour '{music_query}'",
-                    )
-
-            return RecognitionResponse(
-                success=True, transcript=transcript, intent=intent.value, musique=musique
+        received_at = time.perf_counter()
+        timings: Dict[str, float] = {}
+        # The catalog is acquired while the audio is decoded and transcribed
+        index_task = prefetch_index(timings)
+        # Only /recognize may stop decoding early: its (possibly partial)
+        # transcripts are cached apart from the full ones of /transcribe
+        early_exit = early_exit_policy if settings.early_exit else None
+        key = (
+            result_cache.key(audio_content, "early_exit" if early_exit else "")
+            if settings.result_cache_enabled
+            else None
+        )
+        cached = result_cache.get(key) if key else None
+        if cached is not None:
+            # Retried upload: no decoding nor recognition
+            timings["cache_hit"] = 1.0
+            transcript = cached["transcript"]
+            if cached["response"] and cached["catalog_version"] in (None, catalog_version()):
+                return RecognitionResponse(**cached["response"], timings=timings)
+        else:
+            # Decode to 16kHz mono PCM, trim silence and transcribe
+            transcript = await transcribe_upload(
+                audio_content, audio.filename, timings, index_task, early_exit
             )
 
-        finally:
-            # Clean up temp file
-            if os.path.exists(wav_path):
-                os.remove(wav_path)
+        response = await resolve_command(transcript, index_task, timings)
+        if key:
+            cache_result(key, transcript, response, index_version(index_task))
+        timings["total"] = time.perf_counter() - received_at
+        response.timings = timings
+        return response
 
+    except ExecutorBusyError as e:
+        logger.warning(f"Recognition rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Recognition failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -135,57 +252,515 @@ async def transcribe_only(audio: UploadFile = File(...)):
 
     try:
         audio_content = await audio.read()
-        wav_path = await convert_to_wav(audio_content, audio.filename)
+        timings: Dict[str, float] = {}
+        key = result_cache.key(audio_content) if settings.result_cache_enabled else None
+        cached = result_cache.get(key) if key else None
+        if cached is not None:
+            return {"transcript": cached["transcript"], "timings": {"cache_hit": 1.0}}
+
+        transcript = await transcribe_upload(audio_content, audio.filename, timings)
+        if key:
+            cache_result(key, transcript)
+        return {"transcript": transcript, "timings": timings}
+
+    except ExecutorBusyError as e:
+        logger.warning(f"Transcription rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Transcription failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/transcribe/batch")
+async def transcribe_batch_upload(files: List[UploadFile] = File(...)):
+    """
+    Transcribe many recordings: audio files and/or zip/tar archives of them.
 
+    Recordings are spread over the STT workers and results are streamed as
+    NDJSON lines (``index``, ``file``, ``transcript`` or ``error``, ``timings``)
+    in completion order.
+    """
+    if not stt_service:
+        raise HTTPException(status_code=503, detail="STT service not available")
+
+    uploads = [(upload.filename, await upload.read()) for upload in files]
+    # Archive headers only: members are decompressed one by one while transcribing.
+    # Off the event loop: compressed tar headers need the stream decompressed
+    count = 0
+    max_size = settings.batch_max_recording_bytes
+    for filename, content in uploads:
         try:
-            transcript = stt_service.transcribe(wav_path)
-            return {"transcript": transcript}
-        finally:
-            if os.path.exists(wav_path):
-                os.remove(wav_path)
+            count += await asyncio.to_thread(
+                count_recordings,
+                filename,
+                content,
+                max_size,
+                settings.transcribe_batch_max + 1 - count,
+            )
+        except (zipfile.BadZipFile, tarfile.TarError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid archive {filename}: {e}")
+        except RecordingTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        if count > settings.transcribe_batch_max:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {settings.transcribe_batch_max} recordings per batch",
+            )
+    logger.info(f"Batch transcription of {count} recordings")
+    recordings = (
+        recording
+        for filename, content in uploads
+        for recording in iter_recordings(filename, content, max_size)
+    )
+
+    async def lines():
+        async for result in transcribe_batch(recordings):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/command", response_model=RecognitionResponse)
+async def recognize_text(request: CommandRequest):
+    """
+    Process a command transcribed by the client (platform speech services).
+
+    Only the parsing and the musique matching run: no audio decoding nor Vosk.
+    """
+    try:
+        return await resolve_text(request.text, prefetch_index())
 
     except Exception as e:
-        logger.error(f"Transcription failed: {e}")
+        logger.error(f"Command failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def convert_to_wav(audio_content: bytes, filename: str) -> str:
-    """Convert audio to WAV 16kHz mono format."""
-    # Create temp file for output
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_wav:
-        wav_path = tmp_wav.name
+@app.post("/command/batch", response_model=BatchCommandResponse)
+async def recognize_text_batch(request: BatchCommandRequest):
+    """Process several transcribed commands; results are returned in request order."""
+    if len(request.texts) > settings.command_batch_max:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.command_batch_max} commands per batch",
+        )
+
+    # One catalog acquisition for the whole batch; remote matches run concurrently,
+    # at most COMMAND_BATCH_CONCURRENCY at a time
+    index_task = prefetch_index()
+    semaphore = asyncio.Semaphore(settings.command_batch_concurrency)
+
+    async def resolve_one(text: str) -> RecognitionResponse:
+        async with semaphore:
+            try:
+                return await resolve_text(text, index_task)
+            except Exception as e:
+                # A failed lookup only fails its own command
+                logger.error(f"Command '{text}' failed: {e}")
+                return RecognitionResponse(
+                    success=False,
+                    transcript=text.strip(),
+                    intent=Intent.UNKNOWN.value,
+                    error=str(e),
+                )
+
+    results = await asyncio.gather(*(resolve_one(text) for text in request.texts))
+    return BatchCommandResponse(results=results)
+
+
+@app.websocket("/ws/recognize")
+async def recognize_stream(websocket: WebSocket):
+    """
+    Recognize speech while the user is still talking.
+
+    The client sends binary frames of 16-bit mono PCM (``?sample_rate=16000`` by
+    default), then the text message ``end``. The server answers with JSON
+    messages: ``partial`` (current hypothesis), ``segment`` (end of an utterance)
+    and finally ``result`` (same content as /recognize). With ``?auto_end=true``
+    the result is sent after the first recognized utterance, without waiting
+    for ``end``.
+    """
+    await websocket.accept()
+    if not stt_service or not stt_service.model:
+        await websocket.send_json({"type": "error", "error": "STT service not available"})
+        await websocket.close(code=1013)
+        return
+
+    try:
+        sample_rate = int(websocket.query_params.get("sample_rate", SAMPLE_RATE))
+    except ValueError:
+        sample_rate = None
+    if sample_rate not in STREAM_SAMPLE_RATES:
+        rates = ", ".join(map(str, STREAM_SAMPLE_RATES))
+        await websocket.send_json({"type": "error", "error": f"sample_rate must be one of {rates}"})
+        await websocket.close(code=1003)
+        return
+    auto_end = websocket.query_params.get("auto_end", "false").lower() == "true"
+    stream = stt_service.create_stream(sample_rate)
+    index_task = prefetch_index()
+    last_partial = ""
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("text") is not None:
+                if message["text"].strip().lower() == "end":
+                    break
+                await websocket.send_json({"type": "error", "error": "Expected 'end'"})
+                continue
+            if not message.get("bytes"):
+                continue
+
+            segment = await stream_executor.run(stream.accept, message["bytes"])
+            if segment is None:
+                partial = await stream_executor.run(stream.partial)
+                if partial != last_partial:
+                    last_partial = partial
+                    await websocket.send_json({"type": "partial", "partial": partial})
+                continue
+
+            last_partial = ""
+            if segment:
+                await websocket.send_json({"type": "segment", "text": segment})
+                if auto_end:
+                    break
+
+        transcript = await stream_executor.run(stream.finish)
+        logger.info(f"Streamed transcription: '{transcript}'")
+        response = await resolve_command(transcript, index_task)
+        await websocket.send_json({"type": "result", **response.model_dump()})
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        logger.info("Recognition stream closed by the client")
+    except ExecutorBusyError as e:
+        logger.warning(f"Recognition stream rejected: {e}")
+        await websocket.send_json({"type": "error", "error": str(e)})
+        await websocket.close(code=1013)
+    except Exception as e:
+        logger.error(f"Recognition stream failed: {e}")
+        await websocket.send_json({"type": "error", "error": str(e)})
+        await websocket.close(code=1011)
+
+
+async def resolve_command(
+    transcript: str,
+    index_task: Optional["asyncio.Task[CatalogIndex]"] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> RecognitionResponse:
+    """
+    Parse the intent of a transcript and find the requested musique.
+
+    ``index_task`` is the catalog acquisition started by prefetch_index().
+    """
+    if not transcript:
+        return RecognitionResponse(
+            success=False,
+            transcript=None,
+            intent=Intent.UNKNOWN.value,
+            error="No speech detected",
+        )
+
+    # Parse command
+    intent, music_query = command_parser.parse(transcript)
+
+    # If PLAY intent with query, find matching music
+    musique = None
+    if intent == Intent.PLAY and music_query:
+        musique = await find_musique(music_query, index_task, timings)
+
+        if not musique:
+            return RecognitionResponse(
+                success=True,
+                transcript=transcript,
+                intent=intent.value,
+                musique=None,
+                error=f"Aucune musique trouvée pour '{music_query}'",
+            )
+
+    return RecognitionResponse(
+        success=True, transcript=transcript, intent=intent.value, musique=musique
+    )
+
+
+async def resolve_text(
+    text: str, index_task: Optional["asyncio.Task[CatalogIndex]"] = None
+) -> RecognitionResponse:
+    """resolve_command() for a client transcript, with its timings."""
+    start = time.perf_counter()
+    timings: Dict[str, float] = {}
+    response = await resolve_command(text.strip(), index_task, timings)
+    timings["total"] = time.perf_counter() - start
+    response.timings = timings
+    return response
+
+
+async def transcribe_batch(
+    recordings: Iterable[Tuple[str, Union[bytes, Exception]]],
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Transcribe recordings concurrently and yield their results as they complete.
+
+    Twice as many recordings as STT workers are in flight, so that the next
+    ones are decoded while the workers recognize; the iterable is consumed
+    (in a thread, as it decompresses archive members) as they finish, which
+    bounds memory use for large batches. A recording given as an exception
+    (unreadable archive member) gets an error result.
+    """
+    concurrency = min(2 * stt_executor.max_workers, stt_executor.max_pending)
+    recordings = enumerate(recordings)
+    pending: Set["asyncio.Task[Dict[str, Any]]"] = set()
+
+    async def transcribe_one(
+        position: int, name: str, content: Union[bytes, Exception]
+    ) -> Dict[str, Any]:
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        result: Dict[str, Any] = {"index": position, "file": name}
+        try:
+            if isinstance(content, Exception):
+                raise content
+            result["transcript"] = await transcribe_upload(content, name, timings)
+        except Exception as e:
+            logger.error(f"Batch transcription of {name} failed: {e}")
+            result["error"] = str(e)
+        timings["total"] = time.perf_counter() - start
+        result["timings"] = timings
+        return result
+
+    async def fill():
+        while len(pending) < concurrency:
+            recording = await asyncio.to_thread(next, recordings, None)
+            if recording is None:
+                return
+            position, (name, content) = recording
+            pending.add(asyncio.create_task(transcribe_one(position, name, content)))
 
     try:
-        # Detect format from filename or try common formats
-        file_ext = os.path.splitext(filename)[1].lower() if filename else ""
-
-        # Load audio with pydub
-        if file_ext == ".wav":
-            audio = AudioSegment.from_wav(io.BytesIO(audio_content))
-        elif file_ext == ".mp3":
-            audio = AudioSegment.from_mp3(io.BytesIO(audio_content))
-        elif file_ext in [".ogg", ".opus"]:
-            audio = AudioSegment.from_ogg(io.BytesIO(audio_content))
-        elif file_ext == ".m4a":
-            audio = AudioSegment.from_file(io.BytesIO(audio_content), format="m4a")
+        await fill()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+            await fill()
+            for task in sorted(done, key=lambda task: task.result()["index"]):
+                yield task.result()
+    finally:
+        # Client gone: stop the recordings not transcribed yet
+        for task in pending:
+            task.cancel()
+
+
+def catalog_version() -> Optional[int]:
+    """Version of the catalog matches are made against, None when it is not known locally."""
+    return catalog_replica.version if settings.match_mode == "local" else None
+
+
+def index_version(index_task: Optional["asyncio.Task[CatalogIndex]"]) -> Optional[int]:
+    """Catalog version of a prefetched index, None if it is not (successfully) loaded."""
+    if index_task is None or not index_task.done() or index_task.cancelled():
+        return None
+    if index_task.exception() is not None:
+        return None
+    return index_task.result().version
+
+
+def cache_result(
+    key: str,
+    transcript: str,
+    response: Optional[RecognitionResponse] = None,
+    match_version: Optional[int] = None,
+):
+    """
+    Cache a transcript and its response.
+
+    Responses without a catalog match are valid for any catalog version; a
+    PLAY match is cached with ``match_version``, the version of the index it
+    was made against, and not at all when that version is unknown (remote
+    matching, live fetch of an empty replica).
+    """
+    entry = {"transcript": transcript, "response": None, "catalog_version": None}
+    if response is not None:
+        if response.intent != Intent.PLAY.value:
+            entry["response"] = response.model_dump(exclude={"timings"})
+        elif match_version is not None:
+            entry["response"] = response.model_dump(exclude={"timings"})
+            entry["catalog_version"] = match_version
+    result_cache.put(key, entry)
+
+
+async def transcribe_upload(
+    audio_content: bytes,
+    filename: str,
+    timings: Dict[str, float],
+    index_task: Optional["asyncio.Task[CatalogIndex]"] = None,
+    early_exit: Optional[EarlyExitPolicy] = None,
+) -> str:
+    """
+    Decode an upload and transcribe it in the STT executor.
+
+    Stage durations (and trimmed audio durations) are added to ``timings``,
+    as well as the outcome of ``early_exit`` when a policy is given.
+    """
+    details: Dict[str, float] = {}
+    if audio_decoder.should_stream(filename):
+        # ffmpeg decodes while Vosk recognizes the frames already produced
+        grammar = await current_grammar(index_task)
+        start = time.perf_counter()
+        if stt_in_processes:
+            transcript, details = await stt_executor.run(
+                worker_transcribe_stream, audio_content, grammar, early_exit
+            )
         else:
-            # Try to detect format
-            audio = AudioSegment.from_file(io.BytesIO(audio_content))
+            transcript = await stt_executor.run(
+                stt_service.transcribe_stream,
+                stream_pcm(audio_content),
+                SAMPLE_RATE,
+                grammar,
+                early_exit,
+                details,
+            )
+        timings["stt"] = time.perf_counter() - start
+        record_details(early_exit, details, timings)
+        return transcript
+
+    start = time.perf_counter()
+    pcm = await audio_decoder.decode(audio_content, filename)
+    timings["decode"] = time.perf_counter() - start
+
+    if settings.vad_enabled:
+        start = time.perf_counter()
+        pcm, durations = voice_detector.trim(pcm, SAMPLE_RATE)
+        timings["vad"] = time.perf_counter() - start
+        timings.update(durations)
+        if pcm is None:
+            # No speech: skip the recognizer entirely
+            return ""
+
+    # Only now: the catalog acquisition overlaps the decoding and trimming
+    grammar = await current_grammar(index_task)
+    start = time.perf_counter()
+    transcript = await transcribe(pcm, grammar, early_exit, details)
+    timings["stt"] = time.perf_counter() - start
+    if timings.get("speech_duration"):
+        # Decode time the recognizer would have spent on the trimmed silence
+        timings["stt_saved_estimate"] = (
+            timings["stt"] * timings["trimmed_duration"] / timings["speech_duration"]
+        )
+    record_details(early_exit, details, timings)
+    return transcript
+
+
+def record_details(
+    early_exit: Optional[EarlyExitPolicy], details: Dict[str, float], timings: Dict[str, float]
+):
+    """
+    Count the grammar fallback and the early-exit outcome of a recognition.
 
-        # Convert to 16kHz mono
-        audio = audio.set_frame_rate(16000).set_channels(1)
+    Done in this process since the recognition may run in a worker process.
+    The early-exit outcome is also added to the timings.
+    """
+    fallback = details.pop("grammar_fallback", None)
+    if fallback is not None:
+        grammar_builder.record(bool(fallback))
+    if early_exit:
+        early_exit.record(details)
+        timings.update(details)
+
+
+async def transcribe(
+    pcm: Union[bytes, memoryview],
+    grammar: Optional[str] = None,
+    early_exit: Optional[EarlyExitPolicy] = None,
+    details: Optional[Dict[str, float]] = None,
+) -> str:
+    """Transcribe 16kHz mono PCM in the STT executor, filling ``details`` on early exit."""
+    if stt_in_processes:
+        # Sent to the worker process by pickling, which needs bytes
+        transcript, outcome = await stt_executor.run(
+            worker_transcribe_details, bytes(pcm), SAMPLE_RATE, grammar, early_exit
+        )
+        if details is not None:
+            details.update(outcome)
+        return transcript
+    return await stt_executor.run(
+        stt_service.transcribe_bytes, pcm, SAMPLE_RATE, grammar, early_exit, details
+    )
+
+
+async def current_grammar(
+    index_task: Optional["asyncio.Task[CatalogIndex]"] = None,
+) -> Optional[str]:
+    """
+    Vosk grammar of the commands and the replicated catalog, None when disabled.
 
-        # Export as WAV
-        audio.export(wav_path, format="wav")
+    Built from the replica's current copy without waiting for a refresh in
+    progress (a catalog version behind at worst, words missing from it then
+    trigger the open-vocabulary fallback); ``index_task`` is only awaited
+    while the replica is empty.
+    """
+    if not settings.stt_grammar or settings.match_mode != "local":
+        return None
+    index = catalog_replica.index
+    if index is None:
+        index = await (index_task if index_task is not None else catalog_replica.get_index())
+    # Rebuilt only when the replica moved to a new catalog version
+    return await asyncio.to_thread(grammar_builder.grammar_for, index)
+
+
+def prefetch_index(
+    timings: Optional[Dict[str, float]] = None,
+) -> Optional["asyncio.Task[CatalogIndex]"]:
+    """
+    Start acquiring the catalog index concurrently with decoding and recognition.
 
-        logger.info(f"Converted audio to WAV: {wav_path}")
-        return wav_path
+    The replica freshness check (and refresh, or live fetch when the replica
+    is empty) then overlaps Vosk instead of following it. The fetch duration
+    is added to ``timings`` as ``catalog``. None with remote matching, which
+    needs the query.
+    """
+    if settings.match_mode != "local":
+        return None
 
-    except Exception as e:
-        logger.error(f"Audio conversion failed: {e}")
-        if os.path.exists(wav_path):
-            os.remove(wav_path)
-        raise
+    async def fetch() -> CatalogIndex:
+        start = time.perf_counter()
+        try:
+            return await catalog_replica.get_index()
+        finally:
+            if timings is not None:
+                timings["catalog"] = time.perf_counter() - start
+
+    task = asyncio.create_task(fetch())
+    # Not awaited when the command is not PLAY: retrieve a failure so it is not logged
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return task
+
+
+async def find_musique(
+    music_query: str,
+    index_task: Optional["asyncio.Task[CatalogIndex]"] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Find the best musique for a query, locally or on service-bdd.
+
+    With a prefetched ``index_task``, ``timings`` gets ``catalog_wait``, the
+    time still spent waiting for the catalog after recognition, and ``match``.
+    """
+    if settings.match_mode == "remote":
+        matches = await bdd_client.match_musiques(
+            music_query, limit=1, min_score=settings.fuzzy_threshold / 100
+        )
+        return matches[0] if matches else None
+
+    start = time.perf_counter()
+    index = await (index_task if index_task is not None else catalog_replica.get_index())
+    waited = time.perf_counter()
+    musique = music_matcher.find_best_match(music_query, index)
+    if timings is not None:
+        timings["catalog_wait"] = waited - start
+        timings["match"] = time.perf_counter() - waited
+    return musique
 
 
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Transcribe recordings offline and write one NDJSON line per recording.
+
+Accepts audio files, zip/tar archives of recordings and directories. Uses the
+same pipeline and STT executors as /transcribe/batch (STT_WORKERS,
+STT_EXECUTOR...), without running the HTTP server.
+
+    python batch_transcribe.py logs/2024-05-01.zip logs/extra/ -o results.ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+import app
+from services.batch import iter_paths
+
+
+async def run(paths, output):
+    await app.start_stt()
+    try:
+        count = errors = 0
+        async for result in app.transcribe_batch(iter_paths(paths)):
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+            count += 1
+            errors += "error" in result
+        app.logger.info(f"Transcribed {count} recordings ({errors} errors)")
+    finally:
+        app.stop_executors()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("paths", nargs="+", help="Audio files, zip/tar archives or directories")
+    parser.add_argument("-o", "--output", help="NDJSON output file (default: stdout)")
+    args = parser.parse_args()
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        asyncio.run(run(args.paths, output))
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
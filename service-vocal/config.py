@@ -7,6 +7,84 @@ class Settings(BaseSettings):
     service_bdd_url: str = os.getenv("SERVICE_BDD_URL", "http://localhost:5002")
     vosk_model_path: str = os.getenv("VOSK_MODEL_PATH", "vosk-model-small-fr-0.22")
     fuzzy_threshold: int = int(os.getenv("FUZZY_THRESHOLD", "70"))
+    # "vectorized" (rapidfuzz cdist) or "loop" (per-row scoring)
+    matcher_engine: str = os.getenv("MATCHER_ENGINE", "vectorized")
+    # Threads used by rapidfuzz cdist (-1 = all cores)
+    matcher_workers: int = int(os.getenv("MATCHER_WORKERS", "-1"))
+    # Exact phonetic lookup of titre/artiste before fuzzy matching
+    matcher_phonetic: bool = os.getenv("MATCHER_PHONETIC", "true").lower() == "true"
+    # N-gram candidate pruning: rows rescored per query (0 = always full scan)
+    matcher_candidate_limit: int = int(os.getenv("MATCHER_CANDIDATE_LIMIT", "2000"))
+    # Full scan when the n-gram index returns fewer candidates than this
+    matcher_min_candidates: int = int(os.getenv("MATCHER_MIN_CANDIDATES", "10"))
+    # "local" (MusicMatcher on the full catalog) or "remote" (service-bdd /musiques/match)
+    match_mode: str = os.getenv("MATCH_MODE", "local")
+
+    # In-memory catalog replica (local matching)
+    replica_max_staleness: float = float(os.getenv("REPLICA_MAX_STALENESS", "30"))
+    replica_refresh_interval: float = float(os.getenv("REPLICA_REFRESH_INTERVAL", "10"))
+    # After a failed sync, requests serve the stale copy for this long before retrying
+    replica_retry_backoff: float = float(os.getenv("REPLICA_RETRY_BACKOFF", "5"))
+
+    # HTTP client towards service-bdd
+    bdd_timeout: float = float(os.getenv("BDD_TIMEOUT", "10.0"))
+    bdd_connect_timeout: float = float(os.getenv("BDD_CONNECT_TIMEOUT", "2.0"))
+    bdd_health_timeout: float = float(os.getenv("BDD_HEALTH_TIMEOUT", "5.0"))
+    bdd_max_connections: int = int(os.getenv("BDD_MAX_CONNECTIONS", "100"))
+    bdd_max_keepalive_connections: int = int(os.getenv("BDD_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    bdd_keepalive_expiry: float = float(os.getenv("BDD_KEEPALIVE_EXPIRY", "30.0"))
+    bdd_http2: bool = os.getenv("BDD_HTTP2", "false").lower() == "true"
+
+    # Executors for blocking work (Vosk decoding, pydub/ffmpeg conversion)
+    stt_workers: int = int(os.getenv("STT_WORKERS", "2"))
+    # Overrides stt_workers when > 0: workers = cores x this factor
+    stt_workers_per_core: float = float(os.getenv("STT_WORKERS_PER_CORE", "0"))
+    # "thread" (one model shared by threads) or "process" (prefork worker processes)
+    stt_executor: str = os.getenv("STT_EXECUTOR", "thread")
+    # Process executor: "fork" (model loaded once, shared copy-on-write) or "per_worker"
+    stt_model_sharing: str = os.getenv("STT_MODEL_SHARING", "fork")
+    stt_max_pending: int = int(os.getenv("STT_MAX_PENDING", "32"))
+    # "thread" or "process"
+    conversion_executor: str = os.getenv("CONVERSION_EXECUTOR", "thread")
+    conversion_workers: int = int(os.getenv("CONVERSION_WORKERS", "2"))
+    conversion_max_pending: int = int(os.getenv("CONVERSION_MAX_PENDING", "32"))
+
+    # Streaming ffmpeg decoding of compressed uploads (mp3/ogg/opus/m4a)
+    ffmpeg_streaming: bool = os.getenv("FFMPEG_STREAMING", "true").lower() == "true"
+    ffmpeg_path: str = os.getenv("FFMPEG_PATH", "ffmpeg")
+
+    # Energy-based silence trimming before recognition
+    vad_enabled: bool = os.getenv("VAD_ENABLED", "true").lower() == "true"
+    vad_threshold_db: float = float(os.getenv("VAD_THRESHOLD_DB", "-45.0"))
+    vad_frame_ms: int = int(os.getenv("VAD_FRAME_MS", "30"))
+    vad_padding_ms: int = int(os.getenv("VAD_PADDING_MS", "300"))
+    vad_min_speech_ms: int = int(os.getenv("VAD_MIN_SPEECH_MS", "90"))
+
+    # Grammar-constrained recognition: commands + catalog titres/artistes (match_mode=local)
+    stt_grammar: bool = os.getenv("STT_GRAMMAR", "false").lower() == "true"
+    # Below this mean word confidence the audio is decoded again with the open vocabulary
+    grammar_min_confidence: float = float(os.getenv("GRAMMAR_MIN_CONFIDENCE", "0.6"))
+
+    # Stop decoding once partial results give a stable control intent (stop, pause, next...)
+    early_exit: bool = os.getenv("EARLY_EXIT", "false").lower() == "true"
+    early_exit_stable_partials: int = int(os.getenv("EARLY_EXIT_STABLE_PARTIALS", "2"))
+
+    # Recognition results cached by hash of the uploaded audio (client retries)
+    result_cache_enabled: bool = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    result_cache_size: int = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+    result_cache_max_bytes: int = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    result_cache_ttl: float = float(os.getenv("RESULT_CACHE_TTL", "600"))
+
+    # Maximum number of transcripts accepted by /command/batch
+    command_batch_max: int = int(os.getenv("COMMAND_BATCH_MAX", "500"))
+    # Commands of a batch resolved concurrently (remote matches: below the service-bdd pool size)
+    command_batch_concurrency: int = int(os.getenv("COMMAND_BATCH_CONCURRENCY", "8"))
+    # Maximum number of recordings accepted by /transcribe/batch (archive members included)
+    transcribe_batch_max: int = int(os.getenv("TRANSCRIBE_BATCH_MAX", "1000"))
+    # Largest recording (uncompressed archive member) accepted by /transcribe/batch
+    batch_max_recording_bytes: int = int(
+        os.getenv("BATCH_MAX_RECORDING_BYTES", str(50 * 1024 * 1024))
+    )
 
     class Config:
         env_file = ".env"
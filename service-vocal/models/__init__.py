@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -18,3 +18,23 @@ class RecognitionResponse(BaseModel):
     musique: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     confidence: Optional[float] = None
+    # Audio durations and stage times in seconds (decode, vad, stt, ...)
+    timings: Optional[Dict[str, float]] = None
+
+
+class CommandRequest(BaseModel):
+    """Request model for a command already transcribed by the client."""
+
+    text: str
+
+
+class BatchCommandRequest(BaseModel):
+    """Request model for several transcribed commands."""
+
+    texts: List[str]
+
+
+class BatchCommandResponse(BaseModel):
+    """Response model for several transcribed commands, in request order."""
+
+    results: List[RecognitionResponse]
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Benchmark the matcher engines: per-row loop, vectorized (cdist) and n-gram pruned."""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.music_matcher import CatalogIndex, MusicMatcher  # noqa: E402
+
+WORDS = (
+    "amour nuit soleil coeur rouge ville danse reve ciel mer feu vent pluie etoile "
+    "love night sun heart red city dance dream sky sea fire wind rain star road "
+    "blue black white golden silver wild young old last first lonely crazy"
+).split()
+
+
+def make_catalog(size: int, seed: int = 42):
+    """Build a synthetic catalog of ``size`` tracks."""
+    rng = random.Random(seed)
+    artistes = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 2))).title()
+        for _ in range(max(size // 10, 1))
+    ]
+    return [
+        {
+            "id": i,
+            "titre": " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title(),
+            "artiste": rng.choice(artistes),
+            "album": (
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))).title()
+                if rng.random() < 0.8
+                else None
+            ),
+        }
+        for i in range(size)
+    ]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def score_of(matcher: MusicMatcher, query: str, musique) -> float:
+    if musique is None:
+        return 0.0
+    return float(matcher._vectorized_scores(query.lower(), CatalogIndex([musique]))[0])
+
+
+def make_matcher(engine: str, candidate_limit: int) -> MusicMatcher:
+    matcher = MusicMatcher(engine=engine)
+    matcher.candidate_limit = candidate_limit
+    # A phonetic hit returns before any engine runs (and the first lookup builds
+    # the phonetic index inside the timed call): compare the engines alone
+    matcher.phonetic = False
+    return matcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", default="1000,100000,1000000", help="Comma-separated catalog sizes"
+    )
+    parser.add_argument("--queries", type=int, default=3, help="Queries per size")
+    parser.add_argument(
+        "--loop-max", type=int, default=0, help="Skip the loop engine above this size (0 = never)"
+    )
+    parser.add_argument(
+        "--candidate-limit", type=int, default=2000, help="Candidates rescored by the pruned run"
+    )
+    args = parser.parse_args()
+
+    loop = make_matcher("loop", 0)
+    vectorized = make_matcher("vectorized", 0)
+    pruned = make_matcher("vectorized", args.candidate_limit)
+    rng = random.Random(0)
+
+    print(
+        f"{'size':>9} {'index':>9} {'postings':>9} {'loop':>10} {'vectorized':>11} "
+        f"{'pruned':>9} {'loop=vec':>8} {'recall':>6}"
+    )
+    for size in (int(s) for s in args.sizes.split(",")):
+        catalog = make_catalog(size)
+        index, index_time = timed(CatalogIndex, catalog)
+        _, postings_time = timed(lambda: index.postings)
+        queries = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+            for _ in range(args.queries)
+        ]
+
+        totals = {"loop": 0.0, "vectorized": 0.0, "pruned": 0.0}
+        same, found = True, 0
+        run_loop = not args.loop_max or size <= args.loop_max
+        for query in queries:
+            vec_result, elapsed = timed(vectorized.find_best_match, query, index)
+            totals["vectorized"] += elapsed
+            pruned_result, elapsed = timed(pruned.find_best_match, query, index)
+            totals["pruned"] += elapsed
+            # Ties may resolve to another row with the same score
+            found += score_of(vectorized, query, pruned_result) == score_of(
+                vectorized, query, vec_result
+            )
+            if run_loop:
+                loop_result, elapsed = timed(loop.find_best_match, query, index)
+                totals["loop"] += elapsed
+                same = same and loop_result is vec_result
+
+        avg = {name: total / len(queries) for name, total in totals.items()}
+        loop_col = f"{avg['loop']:>9.4f}s" if run_loop else f"{'skipped':>10}"
+        print(
+            f"{size:>9} {index_time:>8.3f}s {postings_time:>8.3f}s {loop_col} "
+            f"{avg['vectorized']:>10.4f}s {avg['pruned']:>8.4f}s "
+            f"{str(same) if run_loop else '-':>8} {found / len(queries):>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
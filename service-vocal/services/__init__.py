@@ -1,4 +1,5 @@
 from .bdd_client import BddClient
+from .catalog_replica import CatalogReplica
 from .command_parser import CommandParser
 from .music_matcher import MusicMatcher
 from .speech_to_text import SpeechToTextService
@@ -0,0 +1,207 @@
+import io
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from config import settings
+from pydub import AudioSegment
+
+logger = logging.getLogger(__name__)
+
+# Format expected by the recognizer: 16 kHz, mono, 16-bit little-endian PCM
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+# Compressed formats decoded by a streaming ffmpeg subprocess when available
+STREAM_FORMATS = (".mp3", ".ogg", ".opus", ".m4a")
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def wav_pcm_payload(audio_content: bytes) -> Optional[memoryview]:
+    """
+    PCM samples of a WAV upload already in the recognizer format, without copy.
+
+    Walks the RIFF chunks: returns a view over the ``data`` chunk when the
+    ``fmt `` chunk says 16kHz mono 16-bit PCM, None for anything else
+    (other formats, other containers, malformed headers).
+    """
+    view = memoryview(audio_content)
+    if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+        return None
+
+    pcm_format = False
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset : offset + 4])
+        (chunk_size,) = struct.unpack_from("<I", view, offset + 4)
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            if chunk_size < 16 or body + 16 > len(view):
+                return None
+            audio_format, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", view, body)
+            if audio_format == WAVE_FORMAT_EXTENSIBLE:
+                # The sub-format GUID starts with the actual format code
+                if chunk_size < 26 or body + 26 > len(view):
+                    return None
+                (audio_format,) = struct.unpack_from("<H", view, body + 24)
+            pcm_format = (audio_format, channels, rate, bits) == (
+                WAVE_FORMAT_PCM,
+                1,
+                SAMPLE_RATE,
+                SAMPLE_WIDTH * 8,
+            )
+            if not pcm_format:
+                return None
+        elif chunk_id == b"data":
+            if not pcm_format:
+                return None
+            # Streamed recordings may leave the size unset: take what was uploaded
+            end = min(body + chunk_size, len(view))
+            end -= (end - body) % SAMPLE_WIDTH
+            return view[body:end]
+        # Chunks are padded to an even size
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def convert_to_pcm(audio_content: bytes, filename: str) -> bytes:
+    """
+    Decode audio to raw 16kHz mono 16-bit PCM, in memory.
+
+    Blocking (pydub decodes through ffmpeg): run it in an executor.
+    """
+    try:
+        # Detect format from filename or try common formats
+        file_ext = os.path.splitext(filename)[1].lower() if filename else ""
+
+        # Load audio with pydub
+        if file_ext == ".wav":
+            audio = AudioSegment.from_wav(io.BytesIO(audio_content))
+        elif file_ext == ".mp3":
+            audio = AudioSegment.from_mp3(io.BytesIO(audio_content))
+        elif file_ext in [".ogg", ".opus"]:
+            audio = AudioSegment.from_ogg(io.BytesIO(audio_content))
+        elif file_ext == ".m4a":
+            audio = AudioSegment.from_file(io.BytesIO(audio_content), format="m4a")
+        else:
+            # Try to detect format
+            audio = AudioSegment.from_file(io.BytesIO(audio_content))
+
+        # Convert to 16kHz mono 16-bit
+        audio = audio.set_frame_rate(SAMPLE_RATE).set_channels(1).set_sample_width(SAMPLE_WIDTH)
+
+        pcm = audio.raw_data
+        logger.info(f"Converted audio to PCM: {len(pcm)} bytes")
+        return pcm
+
+    except Exception as e:
+        logger.error(f"Audio conversion failed: {e}")
+        raise
+
+
+def _ffmpeg_command() -> List[str]:
+    return [
+        settings.ffmpeg_path,
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-i",
+        "pipe:0",
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-ar",
+        str(SAMPLE_RATE),
+        "pipe:1",
+    ]
+
+
+def stream_pcm(audio_content: bytes, chunk_size: int = 8000) -> Iterator[bytes]:
+    """
+    Decode audio with an ffmpeg subprocess, yielding 16kHz mono PCM chunks as they come.
+
+    The upload is written to ffmpeg's stdin from a helper thread while the
+    caller consumes stdout, so recognition can start before decoding ends.
+    Closing the generator early kills ffmpeg.
+    """
+    process = subprocess.Popen(
+        _ffmpeg_command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+
+    def feed():
+        try:
+            process.stdin.write(audio_content)
+            process.stdin.close()
+        except (BrokenPipeError, ValueError):
+            # ffmpeg exited (or was killed) before reading everything
+            pass
+
+    writer = threading.Thread(target=feed, name="ffmpeg-feed", daemon=True)
+    writer.start()
+    try:
+        while True:
+            chunk = process.stdout.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        process.wait()
+        if process.returncode != 0:
+            error = process.stderr.read().decode(errors="replace").strip()
+            raise RuntimeError(f"ffmpeg exited with code {process.returncode}: {error}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        writer.join()
+        process.stdout.close()
+        process.stderr.close()
+
+
+class AudioDecoder:
+    """
+    Turns uploads into recognizer PCM.
+
+    Uploads already in 16kHz mono 16-bit WAV are passed through as a view
+    over their data chunk; compressed formats are streamed through ffmpeg
+    when it is installed; others are converted by pydub/ffmpeg in the
+    conversion executor.
+    """
+
+    def __init__(self, executor, streaming: Optional[bool] = None):
+        self.executor = executor
+        if streaming is None:
+            streaming = settings.ffmpeg_streaming
+        self.streaming = streaming and shutil.which(settings.ffmpeg_path) is not None
+        self._stats = {"fast_path": 0, "converted": 0, "streamed": 0}
+
+    def should_stream(self, filename: str) -> bool:
+        """Whether the upload should be decoded by :func:`stream_pcm` during recognition."""
+        file_ext = os.path.splitext(filename)[1].lower() if filename else ""
+        if self.streaming and file_ext in STREAM_FORMATS:
+            self._stats["streamed"] += 1
+            return True
+        return False
+
+    async def decode(self, audio_content: bytes, filename: str) -> Union[bytes, memoryview]:
+        """Return the upload as 16kHz mono 16-bit PCM."""
+        pcm = wav_pcm_payload(audio_content)
+        if pcm is not None:
+            self._stats["fast_path"] += 1
+            return pcm
+        self._stats["converted"] += 1
+        return await self.executor.run(convert_to_pcm, audio_content, filename)
+
+    def stats(self) -> Dict[str, Any]:
+        """Fast-path hits vs. streamed decodes and pydub conversions."""
+        total = sum(self._stats.values())
+        return {
+            **self._stats,
+            "fast_path_ratio": self._stats["fast_path"] / total if total else 0.0,
+        }
@@ -0,0 +1,120 @@
+import io
+import logging
+import os
+import tarfile
+import zipfile
+from typing import Callable, Iterator, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+class RecordingTooLargeError(ValueError):
+    """Raised when a recording (or archive member) exceeds the size limit."""
+
+
+def is_archive(filename: str) -> bool:
+    """True for zip and (compressed) tar archive names."""
+    return (filename or "").lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _is_recording(member: str) -> bool:
+    # Skips hidden files and macOS resource forks stored in archives
+    parts = member.split("/")
+    return not any(part.startswith(".") or part == "__MACOSX" for part in parts)
+
+
+def _members(filename: str, content: bytes) -> Iterator[Tuple[str, int, Callable[[], bytes]]]:
+    """(name, uncompressed size, reader) of each recording, without reading the data."""
+    if not is_archive(filename):
+        yield filename, len(content), lambda: content
+        return
+
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and _is_recording(info.filename):
+                    yield (
+                        f"{filename}/{info.filename}",
+                        info.file_size,
+                        lambda info=info: archive.read(info),
+                    )
+        return
+
+    with tarfile.open(fileobj=io.BytesIO(content)) as archive:
+        for member in archive:
+            if member.isfile() and _is_recording(member.name):
+                yield (
+                    f"{filename}/{member.name}",
+                    member.size,
+                    lambda member=member: archive.extractfile(member).read(),
+                )
+
+
+def _check_size(name: str, size: int, max_size: Optional[int]):
+    if max_size is not None and size > max_size:
+        raise RecordingTooLargeError(f"{name} is larger than {max_size} bytes")
+
+
+def count_recordings(
+    filename: str, content: bytes, max_size: Optional[int] = None, limit: Optional[int] = None
+) -> int:
+    """
+    Number of recordings of an upload, read from the archive headers only.
+
+    Counting stops at ``limit``.
+
+    Raises:
+        RecordingTooLargeError: if a recording is larger than ``max_size``
+        zipfile.BadZipFile, tarfile.TarError: if the archive is corrupted
+    """
+    count = 0
+    for name, size, _ in _members(filename, content):
+        _check_size(name, size, max_size)
+        count += 1
+        if limit is not None and count >= limit:
+            break
+    return count
+
+
+def iter_recordings(
+    filename: str, content: bytes, max_size: Optional[int] = None
+) -> Iterator[Tuple[str, Union[bytes, Exception]]]:
+    """
+    Recordings of an upload: the file itself, or the members of a zip/tar archive.
+
+    Archive members are named ``<archive>/<member>`` and only decompressed
+    when the iterator reaches them. A member that cannot be read (bad CRC,
+    truncated or encrypted data) is yielded with the error instead of its
+    content, so that the other recordings are still transcribed.
+
+    Raises:
+        RecordingTooLargeError: before reading a recording larger than ``max_size``
+        zipfile.BadZipFile, tarfile.TarError: if the archive is corrupted
+    """
+    for name, size, read in _members(filename, content):
+        _check_size(name, size, max_size)
+        try:
+            data: Union[bytes, Exception] = read()
+        except Exception as e:
+            logger.warning(f"Cannot read {name}: {e}")
+            data = e
+        yield name, data
+
+
+def iter_paths(
+    paths, max_size: Optional[int] = None
+) -> Iterator[Tuple[str, Union[bytes, Exception]]]:
+    """Recordings of local files, archives and directories (walked in name order)."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if _is_recording(name):
+                        yield from iter_paths([os.path.join(root, name)], max_size)
+            continue
+        with open(path, "rb") as f:
+            content = f.read()
+        yield from iter_recordings(path, content, max_size)
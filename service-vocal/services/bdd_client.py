@@ -1,39 +1,113 @@
 import logging
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of (ETag, payload) pairs kept for conditional requests
+ETAG_CACHE_SIZE = 256
+
 
 class BddClient:
     """HTTP client for communicating with the service-bdd."""
 
     def __init__(self):
         self.base_url = settings.service_bdd_url
-        self.timeout = 10.0
+        self.timeout = httpx.Timeout(settings.bdd_timeout, connect=settings.bdd_connect_timeout)
+        self.health_timeout = httpx.Timeout(
+            settings.bdd_health_timeout, connect=settings.bdd_connect_timeout
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._etag_cache: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+
+    def _create_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.bdd_max_connections,
+            max_keepalive_connections=settings.bdd_max_keepalive_connections,
+            keepalive_expiry=settings.bdd_keepalive_expiry,
+        )
+        http2 = settings.bdd_http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("BDD_HTTP2 is set but the 'h2' package is missing, using HTTP/1.1")
+                http2 = False
+        return httpx.AsyncClient(timeout=self.timeout, limits=limits, http2=http2)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    async def start(self):
+        """Open the shared connection pool (called on application startup)."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+
+    async def close(self):
+        """Close the shared connection pool (called on application shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """
+        GET a JSON resource, revalidating the cached copy with If-None-Match.
+
+        Returns None on 404; a 304 answer reuses the cached payload.
+        """
+        url = f"{self.base_url}{path}"
+        key = str(httpx.URL(url, params=params))
+        cached = self._etag_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else None
+
+        response = await self.client.get(url, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            self._etag_cache.move_to_end(key)
+            return cached[1]
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        data = response.json()
+        etag = response.headers.get("etag")
+        if etag:
+            self._etag_cache[key] = (etag, data)
+            self._etag_cache.move_to_end(key)
+            while len(self._etag_cache) > ETAG_CACHE_SIZE:
+                self._etag_cache.popitem(last=False)
+        return data
 
     async def get_all_musiques(self) -> List[Dict[str, Any]]:
         """Fetch all musiques from the database service."""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/musiques")
-                response.raise_for_status()
-                return response.json()
+            return await self._get_json("/musiques")
         except httpx.HTTPError as e:
             logger.error(f"Failed to fetch musiques: {e}")
             raise
 
+    async def get_changes(self, since: int = 0) -> Dict[str, Any]:
+        """Fetch catalog changes (updated musiques, deleted ids) after a version."""
+        try:
+            response = await self.client.get(
+                f"{self.base_url}/musiques/changes", params={"since": since}
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to fetch catalog changes since {since}: {e}")
+            raise
+
     async def get_musique_by_id(self, musique_id: int) -> Optional[Dict[str, Any]]:
         """Fetch a specific musique by ID."""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/musiques/{musique_id}")
-                if response.status_code == 404:
-                    return None
-                response.raise_for_status()
-                return response.json()
+            return await self._get_json(f"/musiques/{musique_id}")
         except httpx.HTTPError as e:
             logger.error(f"Failed to fetch musique {musique_id}: {e}")
             raise
@@ -41,21 +115,32 @@ class BddClient:
     async def search_musiques(self, query: str) -> List[Dict[str, Any]]:
         """Search musiques by query."""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/musiques/search", params={"q": query})
-                response.raise_for_status()
-                return response.json()
+            return await self._get_json("/musiques/search", params={"q": query})
         except httpx.HTTPError as e:
             logger.error(f"Failed to search musiques: {e}")
             raise
 
+    async def match_musiques(
+        self, query: str, limit: int = 5, min_score: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Rank musiques for a voice query on the database side (best first)."""
+        params = {"q": query, "limit": limit}
+        if min_score is not None:
+            params["min_score"] = min_score
+        try:
+            response = await self.client.get(f"{self.base_url}/musiques/match", params=params)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to match musiques: {e}")
+            raise
+
     async def health_check(self) -> bool:
         """Check if the database service is healthy."""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/health")
-                data = response.json()
-                return data.get("status") == "healthy"
+            response = await self.client.get(f"{self.base_url}/health", timeout=self.health_timeout)
+            data = response.json()
+            return data.get("status") == "healthy"
         except Exception as e:
             logger.error(f"Health check failed: {e}")
             return False
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from services.music_matcher import CatalogIndex
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogReplica:
+    """In-memory copy of the service-bdd catalog, kept in sync incrementally."""
+
+    def __init__(
+        self,
+        bdd_client,
+        max_staleness: Optional[float] = None,
+        retry_backoff: Optional[float] = None,
+    ):
+        self.bdd_client = bdd_client
+        self.max_staleness = (
+            settings.replica_max_staleness if max_staleness is None else max_staleness
+        )
+        self.retry_backoff = (
+            settings.replica_retry_backoff if retry_backoff is None else retry_backoff
+        )
+        self.version = 0
+        self.last_sync: Optional[float] = None
+        # Time of the last failed sync: requests serve the stale copy until the backoff expires
+        self.last_failure: Optional[float] = None
+        self._musiques: Dict[int, Dict[str, Any]] = {}
+        self._snapshot: List[Dict[str, Any]] = []
+        self._index = CatalogIndex([])
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "syncs": 0,
+            "full_syncs": 0,
+            "sync_errors": 0,
+            "rows_applied": 0,
+            "rows_deleted": 0,
+            "live_fetches": 0,
+        }
+
+    @property
+    def size(self) -> int:
+        return len(self._musiques)
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful sync, None if never synced."""
+        return None if self.last_sync is None else time.monotonic() - self.last_sync
+
+    @property
+    def index(self) -> Optional[CatalogIndex]:
+        """Matcher index of the current copy, without refreshing; None while nothing is loaded."""
+        return self._index if self._musiques else None
+
+    def is_stale(self) -> bool:
+        age = self.age
+        return age is None or age > self.max_staleness
+
+    def in_backoff(self) -> bool:
+        """True while a failed sync is too recent to try again."""
+        return (
+            self.last_failure is not None
+            and time.monotonic() - self.last_failure < self.retry_backoff
+        )
+
+    async def refresh(self, force: bool = False):
+        """Pull changes since the replica version and apply them."""
+        async with self._lock:
+            # Another caller may have refreshed, or failed to, while we waited for the lock
+            if not force and (not self.is_stale() or self.in_backoff()):
+                return
+            try:
+                changes = await self.bdd_client.get_changes(self.version)
+            except Exception as e:
+                self.last_failure = time.monotonic()
+                self._stats["sync_errors"] += 1
+                logger.error(f"Catalog replica sync failed: {e}")
+                raise
+            self.last_failure = None
+            full = self.version == 0
+            if full or changes["musiques"] or changes["deleted"]:
+                # Sorting and indexing the whole catalog takes seconds at 1M rows: done in
+                # a thread, requests keep the previous copy until the swap
+                self._musiques, self._snapshot, self._index = await asyncio.to_thread(
+                    self._merge, changes, full
+                )
+                logger.info(
+                    f"Catalog replica synced to version {changes['version']}: "
+                    f"{len(changes['musiques'])} updated, {len(changes['deleted'])} deleted, "
+                    f"{self.size} total"
+                )
+            if full:
+                self._stats["full_syncs"] += 1
+            self.version = changes["version"]
+            self.last_sync = time.monotonic()
+            self._stats["syncs"] += 1
+            self._stats["rows_applied"] += len(changes["musiques"])
+            self._stats["rows_deleted"] += len(changes["deleted"])
+
+    def _merge(
+        self, changes: Dict[str, Any], full: bool
+    ) -> Tuple[Dict[int, Dict[str, Any]], List[Dict[str, Any]], CatalogIndex]:
+        """Catalog, snapshot and matcher index (lookups built) with ``changes`` applied."""
+        musiques = {} if full else dict(self._musiques)
+        for musique in changes["musiques"]:
+            musiques[musique["id"]] = musique
+        for musique_id in changes["deleted"]:
+            musiques.pop(musique_id, None)
+        # Same order as GET /musiques, which the matcher uses to break ties
+        snapshot = sorted(musiques.values(), key=lambda m: (m["artiste"], m["titre"], m["id"]))
+        index = CatalogIndex(snapshot, version=changes["version"])
+        if settings.matcher_phonetic:
+            index.phonetic
+        if settings.matcher_candidate_limit and len(index) > settings.matcher_candidate_limit:
+            index.postings
+        return musiques, snapshot, index
+
+    async def get_musiques(self) -> List[Dict[str, Any]]:
+        """
+        Return the catalog, refreshing first if the replica is stale.
+
+        A stale replica is still served if the refresh fails, without retrying
+        for ``retry_backoff`` seconds; an empty one falls back to a live fetch
+        of the whole catalog.
+        """
+        if self.is_stale() and not self.in_backoff():
+            try:
+                await self.refresh()
+            except Exception:
+                pass
+        if not self._musiques:
+            self._stats["live_fetches"] += 1
+            return await self.bdd_client.get_all_musiques()
+        return self._snapshot
+
+    async def get_index(self) -> CatalogIndex:
+        """Return the matcher index of the catalog, built once per catalog version."""
+        musiques = await self.get_musiques()
+        if musiques is self._snapshot:
+            return self._index
+        return CatalogIndex(musiques)
+
+    async def start(self):
+        """Load the catalog and start the periodic background sync."""
+        try:
+            await self.refresh(force=True)
+        except Exception:
+            logger.warning("Catalog replica not loaded at startup, will retry")
+        if settings.replica_refresh_interval > 0:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        """Stop the background sync."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(settings.replica_refresh_interval)
+            try:
+                await self.refresh(force=True)
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Replica size, version, age and sync counters."""
+        age = self.age
+        return {
+            "size": self.size,
+            "version": self.version,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "max_staleness": self.max_staleness,
+            **self._stats,
+        }
@@ -129,6 +129,12 @@ class CommandParser:
 
         return detected_intent, music_query
 
+    def detect_intent(self, text: str) -> Intent:
+        """Detect the intent of a (possibly partial) transcript, without extracting the query."""
+        if not text:
+            return Intent.UNKNOWN
+        return self._detect_intent(text.lower().strip())
+
     def _detect_intent(self, text: str) -> Intent:
         """Detect the user's intent from the command."""
         # Check each intent's patterns
@@ -0,0 +1,60 @@
+import threading
+from typing import Any, Dict, Optional
+
+from config import settings
+from services.command_parser import CommandParser, Intent
+
+
+class EarlyExitPolicy:
+    """
+    Decide when decoding can stop before the end of the audio.
+
+    Control commands ("stop", "pause", "suivant") are known from their first
+    words. Vosk partial hypotheses carry no word confidence, so an intent is
+    trusted once it appears in a finalized segment, or in ``stable_partials``
+    consecutive partial hypotheses. PLAY is never cut short: its music query
+    follows the command word.
+
+    The policy is pickled to STT worker processes; its counters only live in
+    the process that records the results.
+    """
+
+    def __init__(self, stable_partials: Optional[int] = None):
+        self.stable_partials = (
+            settings.early_exit_stable_partials if stable_partials is None else stable_partials
+        )
+        self.parser = CommandParser()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "early_exits": 0, "audio_skipped": 0.0, "saved": 0.0}
+
+    def __getstate__(self):
+        # Locks cannot be pickled: workers get a fresh policy with the same settings
+        return {"stable_partials": self.stable_partials}
+
+    def __setstate__(self, state):
+        self.__init__(state["stable_partials"])
+
+    def intent(self, hypothesis: str) -> Optional[Intent]:
+        """Non-PLAY intent of a hypothesis, None if decoding must go on."""
+        intent = self.parser.detect_intent(hypothesis)
+        if intent in (Intent.PLAY, Intent.UNKNOWN):
+            return None
+        return intent
+
+    def record(self, details: Dict[str, float]):
+        """Count one recognition and the decode time its early exit saved."""
+        with self._lock:
+            self._stats["requests"] += 1
+            if details.get("early_exit"):
+                self._stats["early_exits"] += 1
+                self._stats["audio_skipped"] += details.get("early_exit_audio_skipped", 0.0)
+                self._stats["saved"] += details.get("early_exit_saved", 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Early exits, skipped audio and saved decode time (seconds)."""
+        with self._lock:
+            requests = self._stats["requests"]
+            return {
+                **self._stats,
+                "early_exit_rate": self._stats["early_exits"] / requests if requests else 0.0,
+            }
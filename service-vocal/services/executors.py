@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorBusyError(Exception):
+    """Raised when an executor already has ``max_pending`` jobs queued or running."""
+
+
+def _timed_call(func: Callable, submitted_at: float, *args) -> Tuple[float, float, Any]:
+    # Wall clock rather than monotonic: the call may run in another process
+    started_at = time.time()
+    result = func(*args)
+    return started_at - submitted_at, time.time() - started_at, result
+
+
+def process_memory(pid: int) -> Optional[Dict[str, int]]:
+    """
+    Resident (rss) and proportional (pss) memory of a process, in kB.
+
+    PSS splits pages shared copy-on-write between processes, so summing it
+    over forked workers gives their real footprint. Linux only, None elsewhere.
+    """
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    memory[key.lower()] = int(value.split()[0])
+    except (OSError, ValueError):
+        return None
+    return memory
+
+
+class BoundedExecutor:
+    """
+    Thread or process pool with a bounded backlog, awaitable from the event loop.
+
+    Blocking work (audio conversion, Vosk decoding) runs here so that the
+    event loop keeps serving other requests. Jobs beyond ``max_pending``
+    are rejected instead of queued without limit.
+    """
+
+    KINDS = ("thread", "process")
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_pending: int,
+        kind: str = "thread",
+        initializer: Optional[Callable] = None,
+        initargs: Tuple = (),
+        start_method: Optional[str] = None,
+    ):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown executor kind: {kind!r}")
+        if max_workers < 1 or max_pending < 1:
+            raise ValueError("max_workers and max_pending must be >= 1")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.initializer = initializer
+        self.initargs = initargs
+        # Process pools only: "fork" lets workers inherit the parent memory copy-on-write
+        self.start_method = start_method
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "run_time_total": 0.0,
+        }
+
+    def start(self):
+        """Create the underlying pool."""
+        if self._executor is None:
+            if self.kind == "process":
+                mp_context = (
+                    multiprocessing.get_context(self.start_method) if self.start_method else None
+                )
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=mp_context,
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.name,
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+            logger.info(f"Executor '{self.name}' started ({self.kind}, {self.max_workers} workers)")
+
+    def shutdown(self):
+        """Wait for running jobs and release the workers."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        Run ``func(*args)`` in the pool and return its result.
+
+        Raises:
+            ExecutorBusyError: if ``max_pending`` jobs are already queued or running
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise ExecutorBusyError(
+                    f"Executor '{self.name}' is busy ({self._pending} jobs pending)"
+                )
+            self._pending += 1
+            self._stats["submitted"] += 1
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        try:
+            queue_wait, run_time, result = await loop.run_in_executor(
+                self._executor, _timed_call, func, time.time(), *args
+            )
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        with self._lock:
+            self._stats["completed"] += 1
+            self._stats["queue_wait_total"] += queue_wait
+            self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], queue_wait)
+            self._stats["run_time_total"] += run_time
+        return result
+
+    def worker_pids(self) -> List[int]:
+        """Pids of the live worker processes (empty for thread pools)."""
+        if self.kind != "process" or self._executor is None:
+            return []
+        processes = getattr(self._executor, "_processes", None) or {}
+        return sorted(pid for pid, process in processes.items() if process.is_alive())
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, backlog, queue-wait / run-time counters and worker memory."""
+        workers = {pid: process_memory(pid) for pid in self.worker_pids()}
+        with self._lock:
+            completed = self._stats["completed"]
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                **self._stats,
+                "queue_wait_avg": self._stats["queue_wait_total"] / completed if completed else 0.0,
+                "run_time_avg": self._stats["run_time_total"] / completed if completed else 0.0,
+                **({"workers": workers} if self.kind == "process" else {}),
+            }
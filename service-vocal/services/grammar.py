@@ -0,0 +1,74 @@
+import json
+import logging
+import re
+import threading
+from typing import FrozenSet, Iterable, Optional
+
+from services.command_parser import CommandParser
+from services.music_matcher import CatalogIndex
+
+logger = logging.getLogger(__name__)
+
+# Vosk token standing for any out-of-grammar word
+UNKNOWN_WORD = "[unk]"
+
+_WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+
+def vocabulary(texts: Iterable[str]) -> FrozenSet[str]:
+    """Lowercase words of ``texts`` (letters and inner apostrophes)."""
+    return frozenset(word for text in texts for word in _WORD.findall(text.lower()))
+
+
+def command_vocabulary() -> FrozenSet[str]:
+    """Words of the CommandParser patterns and command words."""
+    # Drop regex escapes such as \b so that they do not stick to the next word
+    patterns = [
+        re.sub(r"\\[a-zA-Z]", " ", pattern)
+        for patterns in CommandParser.PATTERNS.values()
+        for pattern in patterns
+    ]
+    return vocabulary(patterns + CommandParser.COMMAND_WORDS)
+
+
+class GrammarBuilder:
+    """
+    Vosk grammar (JSON word list) of the commands and the catalog.
+
+    The grammar is rebuilt only when a different CatalogIndex is passed,
+    i.e. when the catalog replica moved to a new version.
+    """
+
+    def __init__(self):
+        self._commands = command_vocabulary()
+        self._index: Optional[CatalogIndex] = None
+        self._grammar: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stats = {"builds": 0, "words": 0, "version": None, "constrained": 0, "fallbacks": 0}
+
+    def grammar_for(self, index: CatalogIndex) -> str:
+        """Return the grammar for ``index``, building it on catalog change."""
+        with self._lock:
+            if index is not self._index:
+                words = self._commands | vocabulary(index.titres) | vocabulary(index.artistes)
+                self._grammar = json.dumps(sorted(words) + [UNKNOWN_WORD], ensure_ascii=False)
+                self._index = index
+                self._stats.update(
+                    builds=self._stats["builds"] + 1, words=len(words), version=index.version
+                )
+                logger.info(f"Vosk grammar built: {len(words)} words (catalog v{index.version})")
+            return self._grammar
+
+    def record(self, fallback: bool):
+        """Count one constrained recognition, kept or decoded again with the open vocabulary."""
+        with self._lock:
+            self._stats["fallbacks" if fallback else "constrained"] += 1
+
+    def stats(self):
+        """Build count, size and catalog version of the current grammar, and its fallback rate."""
+        with self._lock:
+            total = self._stats["constrained"] + self._stats["fallbacks"]
+            return {
+                **self._stats,
+                "fallback_rate": self._stats["fallbacks"] / total if total else 0.0,
+            }
@@ -1,27 +1,273 @@
 import logging
-from typing import Any, Dict, List, Optional
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 from config import settings
 from rapidfuzz import fuzz, process
+from services.phonetic import phonetic_text
 
 logger = logging.getLogger(__name__)
 
 
+def ngram_terms(text: str) -> FrozenSet[str]:
+    """Whitespace tokens of ``text`` plus the character trigrams of each padded token."""
+    terms = set()
+    for token in text.split():
+        terms.add(token)
+        padded = f" {token} "
+        terms.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(terms)
+
+
+class CatalogIndex:
+    """
+    Pre-normalized catalog fields stored in parallel tuples.
+
+    Built once per catalog version so that matching does not lowercase or
+    concatenate strings per row on every query. Position ``i`` of every
+    field refers to ``musiques[i]``.
+    """
+
+    __slots__ = (
+        "version",
+        "musiques",
+        "titres",
+        "artistes",
+        "albums",
+        "artiste_titres",
+        "titre_artistes",
+        "_postings",
+        "_phonetic",
+    )
+
+    def __init__(self, musiques: Sequence[Dict[str, Any]], version: Optional[int] = None):
+        self.version = version
+        self.musiques = tuple(musiques)
+        self.titres = tuple(m["titre"].lower() for m in self.musiques)
+        self.artistes = tuple(m["artiste"].lower() for m in self.musiques)
+        # Empty string when there is no album; album scoring is skipped for those rows
+        self.albums = tuple((m.get("album") or "").lower() for m in self.musiques)
+        self.artiste_titres = tuple(f"{a} {t}" for a, t in zip(self.artistes, self.titres))
+        self.titre_artistes = tuple(f"{t} {a}" for t, a in zip(self.titres, self.artistes))
+        self._postings: Optional[Dict[str, np.ndarray]] = None
+        self._phonetic: Optional[Dict[str, Tuple[int, ...]]] = None
+
+    def __len__(self) -> int:
+        return len(self.musiques)
+
+    @property
+    def postings(self) -> Dict[str, np.ndarray]:
+        """Inverted index term -> sorted row numbers, built on first use."""
+        if self._postings is None:
+            self._postings = self._build_postings()
+        return self._postings
+
+    def _build_postings(self) -> Dict[str, np.ndarray]:
+        rows_by_term = defaultdict(list)
+        # Artists and albums repeat across rows: compute each field's terms once
+        terms_cache: Dict[str, FrozenSet[str]] = {}
+        for row, fields in enumerate(zip(self.titres, self.artistes, self.albums)):
+            row_terms = set()
+            for field in fields:
+                terms = terms_cache.get(field)
+                if terms is None:
+                    terms = terms_cache[field] = ngram_terms(field)
+                row_terms |= terms
+            for term in row_terms:
+                rows_by_term[term].append(row)
+        return {term: np.array(rows, dtype=np.int32) for term, rows in rows_by_term.items()}
+
+    @property
+    def phonetic(self) -> Dict[str, Tuple[int, ...]]:
+        """
+        Phonetic key -> rows, built on first use.
+
+        Keys encode the titre, the artiste and both combinations, so a query
+        naming either or both can be looked up exactly.
+        """
+        if self._phonetic is None:
+            self._phonetic = self._build_phonetic()
+        return self._phonetic
+
+    def _build_phonetic(self) -> Dict[str, Tuple[int, ...]]:
+        rows_by_key = defaultdict(list)
+        artiste_keys: Dict[str, str] = {}
+        for row, (titre, artiste) in enumerate(zip(self.titres, self.artistes)):
+            titre_key = phonetic_text(titre)
+            artiste_key = artiste_keys.get(artiste)
+            if artiste_key is None:
+                artiste_key = artiste_keys[artiste] = phonetic_text(artiste)
+            for key in {titre_key, artiste_key, artiste_key + titre_key, titre_key + artiste_key}:
+                if key:
+                    rows_by_key[key].append(row)
+        return {key: tuple(rows) for key, rows in rows_by_key.items()}
+
+    def candidates(self, query_lower: str, limit: int) -> np.ndarray:
+        """
+        Rows sharing the most n-gram terms with the query, at most ``limit``.
+
+        Rows are returned in catalog order so that ties are broken as in a
+        full scan.
+        """
+        postings = self.postings
+        hits = [postings[term] for term in ngram_terms(query_lower) if term in postings]
+        if not hits:
+            return np.empty(0, dtype=np.int32)
+        counts = np.bincount(np.concatenate(hits), minlength=len(self))
+        rows = np.flatnonzero(counts)
+        if len(rows) > limit:
+            rows = np.sort(rows[np.argpartition(-counts[rows], limit - 1)[:limit]])
+        return rows
+
+
+Catalog = Union[Sequence[Dict[str, Any]], CatalogIndex]
+
+
 class MusicMatcher:
     """Service for fuzzy matching music queries against the music catalog."""
 
-    def __init__(self):
+    ALBUM_WEIGHT = 0.7
+    # Shorter phonetic keys ("un", "la") are too ambiguous to short-circuit matching
+    PHONETIC_MIN_LENGTH = 3
+    ENGINES = ("vectorized", "loop")
+
+    def __init__(self, engine: Optional[str] = None):
         self.threshold = settings.fuzzy_threshold
+        # "vectorized" (rapidfuzz cdist over whole columns) or "loop" (per-row scoring)
+        self.engine = engine or settings.matcher_engine
+        if self.engine not in self.ENGINES:
+            raise ValueError(f"Unknown matcher engine: {self.engine!r}")
+        self.workers = settings.matcher_workers
+        self.candidate_limit = settings.matcher_candidate_limit
+        self.min_candidates = settings.matcher_min_candidates
+        self.phonetic = settings.matcher_phonetic
+        self._stats = {
+            "phonetic_lookups": 0,
+            "phonetic_hits": 0,
+            "pruned_scans": 0,
+            "full_scans": 0,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Matching counters and the share of queries resolved by the phonetic index."""
+        lookups = self._stats["phonetic_lookups"]
+        return {
+            **self._stats,
+            "phonetic_hit_rate": self._stats["phonetic_hits"] / lookups if lookups else 0.0,
+        }
+
+    @staticmethod
+    def _as_index(musiques: Catalog) -> CatalogIndex:
+        if isinstance(musiques, CatalogIndex):
+            return musiques
+        return CatalogIndex(musiques)
+
+    def _candidate_rows(self, query_lower: str, index: CatalogIndex) -> Optional[np.ndarray]:
+        """
+        Rows to score for the query, or None to scan the whole catalog.
+
+        Pruning is skipped when disabled (``candidate_limit`` 0), when the
+        catalog is not larger than the limit, and when the n-gram index
+        returns fewer than ``min_candidates`` rows.
+        """
+        if not self.candidate_limit or len(index) <= self.candidate_limit:
+            self._stats["full_scans"] += 1
+            return None
+        rows = index.candidates(query_lower, self.candidate_limit)
+        if len(rows) < self.min_candidates:
+            logger.debug(f"Only {len(rows)} candidates for '{query_lower}', full scan")
+            self._stats["full_scans"] += 1
+            return None
+        self._stats["pruned_scans"] += 1
+        return rows
+
+    def _phonetic_rows(self, query_lower: str, index: CatalogIndex) -> List[int]:
+        """
+        Rows whose titre and/or artiste sound exactly like the query, best first.
+
+        These are accepted without reaching the fuzzy threshold: they absorb
+        speech recognition spelling errors ("lède zépeline").
+        """
+        if not self.phonetic:
+            return []
+        key = phonetic_text(query_lower)
+        if len(key) < self.PHONETIC_MIN_LENGTH:
+            return []
+        self._stats["phonetic_lookups"] += 1
+        rows = index.phonetic.get(key)
+        if not rows:
+            return []
+        self._stats["phonetic_hits"] += 1
+        if len(rows) == 1:
+            return list(rows)
+        ranked = np.array(rows)
+        scores = self._vectorized_scores(query_lower, index, rows=ranked)
+        return ranked[np.argsort(-scores, kind="stable")].tolist()
+
+    def _column_scores(
+        self, query_lower: str, column: Sequence[str], score_cutoff: float
+    ) -> np.ndarray:
+        """token_set_ratio of the query against a whole column (0 below the cutoff)."""
+        return process.cdist(
+            [query_lower],
+            column,
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=score_cutoff,
+            dtype=np.float64,
+            workers=self.workers,
+        )[0]
+
+    def _vectorized_scores(
+        self,
+        query_lower: str,
+        index: CatalogIndex,
+        with_album: bool = True,
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Best field score per row, as computed by the per-row loop.
+
+        Only ``rows`` are scored when given, the result is then aligned with
+        them. Scores below the threshold are zeroed by ``score_cutoff``; this
+        does not change which rows reach the threshold nor their order.
+        """
+
+        def column(values: Sequence[str]) -> Sequence[str]:
+            return values if rows is None else [values[i] for i in rows]
+
+        cutoff = self.threshold
+        scores = np.maximum(
+            self._column_scores(query_lower, column(index.titres), cutoff),
+            self._column_scores(query_lower, column(index.artistes), cutoff),
+        )
+        np.maximum(
+            scores,
+            self._column_scores(query_lower, column(index.artiste_titres), cutoff),
+            out=scores,
+        )
+        if not with_album:
+            return scores
 
-    def find_best_match(
-        self, query: str, musiques: List[Dict[str, Any]]
-    ) -> Optional[Dict[str, Any]]:
+        np.maximum(
+            scores,
+            self._column_scores(query_lower, column(index.titre_artistes), cutoff),
+            out=scores,
+        )
+        album_cutoff = cutoff / self.ALBUM_WEIGHT
+        if album_cutoff <= 100:
+            album_scores = self._column_scores(query_lower, column(index.albums), album_cutoff)
+            np.maximum(scores, album_scores * self.ALBUM_WEIGHT, out=scores)
+        return scores
+
+    def find_best_match(self, query: str, musiques: Catalog) -> Optional[Dict[str, Any]]:
         """
         Find the best matching music for a given query.
 
         Args:
             query: The search query (music title, artist, etc.)
-            musiques: List of music dictionaries from the database
+            musiques: List of music dictionaries from the database, or a
+                prebuilt CatalogIndex
 
         Returns:
             Best matching music dict or None if no good match found
@@ -29,64 +275,87 @@ class MusicMatcher:
         if not query or not musiques:
             return None
 
+        index = self._as_index(musiques)
         query_lower = query.lower().strip()
         logger.info(f"Finding match for query: '{query_lower}'")
 
-        best_match = None
+        phonetic_rows = self._phonetic_rows(query_lower, index)
+        if phonetic_rows:
+            best_match = index.musiques[phonetic_rows[0]]
+            logger.info(f"Phonetic match: '{best_match['titre']}' by {best_match['artiste']}")
+            return best_match
+
+        rows = self._candidate_rows(query_lower, index)
+
+        if self.engine == "vectorized":
+            scores = self._vectorized_scores(query_lower, index, rows=rows)
+            # argmax keeps the first of equal scores, like the strict > of the loop
+            best_index = int(np.argmax(scores))
+            best_score = float(scores[best_index])
+            if rows is not None:
+                best_index = int(rows[best_index])
+        else:
+            best_index, best_score = self._loop_best_match(query_lower, index, rows)
+
+        if best_index >= 0 and best_score >= self.threshold:
+            best_match = index.musiques[best_index]
+            logger.info(
+                f"Best match: '{best_match['titre']}' by {best_match['artiste']} "
+                f"(score: {best_score})"
+            )
+            return best_match
+
+        logger.info(f"No match found above threshold {self.threshold}")
+        return None
+
+    def _loop_best_match(
+        self, query_lower: str, index: CatalogIndex, rows: Optional[np.ndarray] = None
+    ) -> Tuple[int, float]:
+        """Score rows one by one; returns (best row, best score), (-1, 0) if none."""
+        best_index = -1
         best_score = 0
+        debug = logger.isEnabledFor(logging.DEBUG)
 
-        for musique in musiques:
+        for i in range(len(index)) if rows is None else rows.tolist():
             # Calculate scores for different fields
-            titre_score = fuzz.token_set_ratio(query_lower, musique["titre"].lower())
-            artiste_score = fuzz.token_set_ratio(query_lower, musique["artiste"].lower())
+            titre_score = fuzz.token_set_ratio(query_lower, index.titres[i])
+            artiste_score = fuzz.token_set_ratio(query_lower, index.artistes[i])
 
             # Combined search: "artiste titre" or "titre artiste"
-            combined1 = f"{musique['artiste']} {musique['titre']}".lower()
-            combined2 = f"{musique['titre']} {musique['artiste']}".lower()
             combined_score = max(
-                fuzz.token_set_ratio(query_lower, combined1),
-                fuzz.token_set_ratio(query_lower, combined2),
+                fuzz.token_set_ratio(query_lower, index.artiste_titres[i]),
+                fuzz.token_set_ratio(query_lower, index.titre_artistes[i]),
             )
 
             # Album score (lower weight)
             album_score = 0
-            if musique.get("album"):
-                album_score = (
-                    fuzz.token_set_ratio(query_lower, musique["album"].lower()) * 0.7
-                )  # Lower weight for album
+            if index.albums[i]:
+                album_score = fuzz.token_set_ratio(query_lower, index.albums[i]) * self.ALBUM_WEIGHT
 
             # Take the best score
             score = max(titre_score, artiste_score, combined_score, album_score)
 
-            logger.debug(
-                f"Music '{musique['titre']}' by {musique['artiste']}: "
-                f"titre={titre_score}, artiste={artiste_score}, "
-                f"combined={combined_score}, album={album_score}, best={score}"
-            )
+            if debug:
+                musique = index.musiques[i]
+                logger.debug(
+                    f"Music '{musique['titre']}' by {musique['artiste']}: "
+                    f"titre={titre_score}, artiste={artiste_score}, "
+                    f"combined={combined_score}, album={album_score}, best={score}"
+                )
 
             if score > best_score:
                 best_score = score
-                best_match = musique
+                best_index = i
 
-        if best_match and best_score >= self.threshold:
-            logger.info(
-                f"Best match: '{best_match['titre']}' by {best_match['artiste']} "
-                f"(score: {best_score})"
-            )
-            return best_match
-
-        logger.info(f"No match found above threshold {self.threshold}")
-        return None
+        return best_index, best_score
 
-    def find_matches(
-        self, query: str, musiques: List[Dict[str, Any]], limit: int = 5
-    ) -> List[Dict[str, Any]]:
+    def find_matches(self, query: str, musiques: Catalog, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Find multiple matching musics for a query.
 
         Args:
             query: The search query
-            musiques: List of music dictionaries
+            musiques: List of music dictionaries, or a prebuilt CatalogIndex
             limit: Maximum number of results
 
         Returns:
@@ -95,21 +364,44 @@ class MusicMatcher:
         if not query or not musiques:
             return []
 
+        index = self._as_index(musiques)
         query_lower = query.lower().strip()
+
+        # Phonetic matches come first, then the fuzzy ranking of the other rows
+        phonetic_rows = self._phonetic_rows(query_lower, index)[:limit]
+        matches = [index.musiques[i] for i in phonetic_rows]
+        if len(matches) == limit:
+            return matches
+        found = set(phonetic_rows)
+        rows = self._candidate_rows(query_lower, index)
+
+        if self.engine == "vectorized":
+            scores = self._vectorized_scores(query_lower, index, with_album=False, rows=rows)
+            matching = np.flatnonzero(scores >= self.threshold)
+            # Stable sort keeps catalog order between equal scores, like list.sort
+            ranked = matching[np.argsort(-scores[matching], kind="stable")]
+            if rows is not None:
+                ranked = rows[ranked]
+            for i in ranked.tolist():
+                if len(matches) == limit:
+                    break
+                if i not in found:
+                    matches.append(index.musiques[i])
+            return matches
+
         scored_musiques = []
 
-        for musique in musiques:
-            titre_score = fuzz.token_set_ratio(query_lower, musique["titre"].lower())
-            artiste_score = fuzz.token_set_ratio(query_lower, musique["artiste"].lower())
-            combined = f"{musique['artiste']} {musique['titre']}".lower()
-            combined_score = fuzz.token_set_ratio(query_lower, combined)
+        for i in range(len(index)) if rows is None else rows.tolist():
+            titre_score = fuzz.token_set_ratio(query_lower, index.titres[i])
+            artiste_score = fuzz.token_set_ratio(query_lower, index.artistes[i])
+            combined_score = fuzz.token_set_ratio(query_lower, index.artiste_titres[i])
 
             score = max(titre_score, artiste_score, combined_score)
 
-            if score >= self.threshold:
-                scored_musiques.append((musique, score))
+            if score >= self.threshold and i not in found:
+                scored_musiques.append((index.musiques[i], score))
 
         # Sort by score descending
         scored_musiques.sort(key=lambda x: x[1], reverse=True)
 
-        return [m[0] for m in scored_musiques[:limit]]
+        return matches + [m[0] for m in scored_musiques[: limit - len(matches)]]
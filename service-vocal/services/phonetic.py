@@ -0,0 +1,83 @@
+import re
+import unicodedata
+from typing import List
+
+# Rewrite rules applied in order to a lowercase, accent-free word. Uppercase
+# letters are intermediate markers (S = "ch", G = hard g, E = final "é") or
+# nasal vowels (A = an/en, I = in/ain/un, O = on).
+_CONSONANT_RULES = [
+    (re.compile(r"ee"), "i"),
+    (re.compile(r"oo"), "u"),
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"th"), "t"),
+    (re.compile(r"sh|sch|ch"), "S"),
+    (re.compile(r"ck|qu|q"), "k"),
+    (re.compile(r"gu(?=[eiy])"), "G"),
+    (re.compile(r"dj|g(?=[eiy])"), "j"),
+    (re.compile(r"c(?=[eiy])"), "s"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"G"), "g"),
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"z"), "s"),
+    (re.compile(r"h"), ""),
+    (re.compile(r"(.)\1+"), r"\1"),
+]
+
+_ENDING_RULES = [
+    (re.compile(r"(?<=..)s$"), ""),
+    (re.compile(r"(?<=.)(er|ez|et)$"), "E"),
+    (re.compile(r"(?<=..)e$"), ""),
+    # Final t/d/p are silent after a vowel ("petit", "grand"), not after other consonants
+    (re.compile(r"(?<=.[aeioun])[tdp]$"), ""),
+]
+
+_VOWEL_RULES = [
+    (re.compile(r"(ain|ein|aim|eim|in|im|un|um)(?![aeiou])"), "I"),
+    (re.compile(r"(an|am|en|em)(?![aeiou])"), "A"),
+    (re.compile(r"(on|om)(?![aeiou])"), "O"),
+    (re.compile(r"eau|au"), "o"),
+    (re.compile(r"ou"), "u"),
+    (re.compile(r"oi"), "oa"),
+    (re.compile(r"ai|ei|E"), "e"),
+    (re.compile(r"(.)\1+"), r"\1"),
+]
+
+_WORD = re.compile(r"[a-z]+|\d+")
+
+
+def _normalize(text: str) -> str:
+    text = text.lower().replace("ç", "s")
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def phonetic_word(word: str) -> str:
+    """
+    Phonetic key of one lowercase, accent-free word, using French spelling rules.
+
+    Words that sound alike when read in French get the same key, e.g.
+    "jackson" and "jaksone", or "zeppelin" and "zepeline".
+    """
+    if word.isdigit():
+        return word
+    for rules in (_CONSONANT_RULES, _ENDING_RULES, _VOWEL_RULES):
+        for pattern, replacement in rules:
+            word = pattern.sub(replacement, word)
+    return word
+
+
+def phonetic_keys(text: str) -> List[str]:
+    """Phonetic keys of each word of ``text``."""
+    return [phonetic_word(word) for word in _WORD.findall(_normalize(text))]
+
+
+def phonetic_text(text: str) -> str:
+    """
+    Phonetic encoding of a whole string.
+
+    Word boundaries are dropped since speech recognition often splits or
+    joins words differently ("colde plait" for "Coldplay").
+    """
+    return "".join(phonetic_keys(text))
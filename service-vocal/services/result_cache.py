@@ -0,0 +1,97 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-entry overhead (key, OrderedDict node, dict) added to the JSON size
+ENTRY_OVERHEAD = 200
+
+
+class ResultCache:
+    """
+    LRU/TTL cache of recognition results keyed by a hash of the uploaded audio.
+
+    Mobile clients retry uploads of the same clip: a hit skips decoding and
+    recognition. Entries hold the transcript and, when known, the response
+    (intent and musique) with the catalog version its match was made against.
+    Entries expire after ``ttl`` seconds and the least recently used are
+    evicted beyond ``max_entries`` or ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.max_entries = settings.result_cache_size if max_entries is None else max_entries
+        self.max_bytes = settings.result_cache_max_bytes if max_bytes is None else max_bytes
+        self.ttl = settings.result_cache_ttl if ttl is None else ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    @staticmethod
+    def key(content: bytes, variant: str = "") -> str:
+        """
+        Content hash of an upload (blake2b, much faster than decoding it).
+
+        ``variant`` separates results of the same audio that differ, e.g.
+        transcripts cut short by an early exit from full ones.
+        """
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        return f"{digest}:{variant}" if variant else digest
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached entry for ``key``, None if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] > self.ttl:
+            self._remove(key)
+            self._stats["expirations"] += 1
+            entry = None
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry[2]
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store ``value`` (JSON-serializable) and evict entries beyond the limits."""
+        size = len(json.dumps(value, default=str)) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic(), size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, memory use and hit/miss/eviction counters."""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            **self._stats,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+        }
@@ -1,19 +1,146 @@
 import json
 import logging
+import os
+import time
 import wave
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+from cffi import FFI
 from config import settings
+from services.audio_converter import SAMPLE_RATE, stream_pcm
+from services.early_exit import EarlyExitPolicy
+from services.grammar import UNKNOWN_WORD
 from vosk import KaldiRecognizer, Model
 
 logger = logging.getLogger(__name__)
 
+AudioBuffer = Union[bytes, bytearray, memoryview]
+
+# Wraps memoryview slices as C buffers so that Vosk reads them without a copy
+_ffi = FFI()
+
+
+def _waveform(chunk: AudioBuffer):
+    return chunk if isinstance(chunk, bytes) else _ffi.from_buffer(chunk)
+
+
+class RecognitionStream:
+    """Incremental recognition of PCM pushed chunk by chunk."""
+
+    def __init__(self, model: Model, sample_rate: int, grammar: Optional[str] = None):
+        # A grammar (JSON list of words/phrases) restricts the decoding vocabulary
+        if grammar:
+            self.recognizer = KaldiRecognizer(model, sample_rate, grammar)
+        else:
+            self.recognizer = KaldiRecognizer(model, sample_rate)
+        self.recognizer.SetWords(True)
+        self.segments: List[str] = []
+        self._confidences: List[float] = []
+
+    def _add_result(self, result: str) -> str:
+        result = json.loads(result)
+        text = result.get("text", "")
+        if text:
+            self.segments.append(text)
+            self._confidences.extend(word.get("conf", 0.0) for word in result.get("result", []))
+        return text
+
+    @property
+    def confidence(self) -> float:
+        """Mean word confidence of the results so far (0 without words)."""
+        if not self._confidences:
+            return 0.0
+        return sum(self._confidences) / len(self._confidences)
+
+    def accept(self, chunk: AudioBuffer) -> Optional[str]:
+        """
+        Feed one chunk.
+
+        Returns:
+            Text of the segment ended by this chunk (may be empty), None if
+            the utterance continues
+        """
+        if self.recognizer.AcceptWaveform(_waveform(chunk)):
+            return self._add_result(self.recognizer.Result())
+        return None
+
+    def partial(self) -> str:
+        """Hypothesis for the segment in progress."""
+        return json.loads(self.recognizer.PartialResult()).get("partial", "")
+
+    def finish(self) -> str:
+        """Flush the recognizer and return the whole transcript."""
+        self._add_result(self.recognizer.FinalResult())
+        return " ".join(self.segments).strip()
+
+
+def _recorded(chunks: Iterable[AudioBuffer], kept: List[AudioBuffer]) -> Iterator[AudioBuffer]:
+    """Yield ``chunks``, appending each one to ``kept``; closing stops the source too."""
+    try:
+        for chunk in chunks:
+            kept.append(chunk)
+            yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def _decode_until_intent(
+    stream: RecognitionStream,
+    chunks: Iterable[AudioBuffer],
+    sample_rate: int,
+    policy: EarlyExitPolicy,
+) -> Dict[str, float]:
+    """
+    Feed chunks until the policy trusts a control intent of the hypothesis.
+
+    Returns the early-exit outcome: ``early_exit`` (1.0 when decoding stopped
+    early), and when the remaining audio is known (list of chunks), the
+    skipped audio duration and the decode time it would have cost.
+    """
+    start = time.perf_counter()
+    decoded = 0
+    stable = 0
+    last_intent = None
+    for position, chunk in enumerate(chunks):
+        decoded += len(chunk)
+        segment = stream.accept(chunk)
+        hypothesis = " ".join(stream.segments)
+        if segment is None:
+            hypothesis = f"{hypothesis} {stream.partial()}"
+
+        intent = policy.intent(hypothesis)
+        if intent is None:
+            stable = 0
+        elif intent == last_intent:
+            stable += 1
+        else:
+            stable = 1
+        last_intent = intent
+        if intent is None or (segment is None and stable < policy.stable_partials):
+            continue
+
+        outcome = {"early_exit": 1.0}
+        if isinstance(chunks, list):
+            # Decode time of the skipped audio, at the rate measured so far
+            skipped = sum(len(rest) for rest in chunks[position + 1 :])
+            outcome["early_exit_audio_skipped"] = skipped / (sample_rate * 2)
+            outcome["early_exit_saved"] = (time.perf_counter() - start) * skipped / decoded
+        elif hasattr(chunks, "close"):
+            # Stops the streaming decoder (ffmpeg) as well
+            chunks.close()
+        logger.info(f"Early exit on {intent.value} after {decoded} bytes: '{hypothesis.strip()}'")
+        return outcome
+    return {"early_exit": 0.0}
+
 
 class SpeechToTextService:
     """Service for converting speech to text using Vosk."""
 
-    def __init__(self):
+    def __init__(self, load_model: bool = True):
         self.model = None
-        self._load_model()
+        if load_model:
+            self._load_model()
 
     def _load_model(self):
         """Load the Vosk model."""
@@ -49,42 +176,32 @@ class SpeechToTextService:
             if wf.getframerate() not in [8000, 16000]:
                 logger.warning(f"Sample rate is {wf.getframerate()}, expected 16000")
 
-            recognizer = KaldiRecognizer(self.model, wf.getframerate())
-            recognizer.SetWords(True)
-
-            results = []
-
-            while True:
-                data = wf.readframes(4000)
-                if len(data) == 0:
-                    break
-                if recognizer.AcceptWaveform(data):
-                    result = json.loads(recognizer.Result())
-                    if result.get("text"):
-                        results.append(result["text"])
-
-            # Get final result
-            final_result = json.loads(recognizer.FinalResult())
-            if final_result.get("text"):
-                results.append(final_result["text"])
-
+            transcript = self._recognize(iter(lambda: wf.readframes(4000), b""), wf.getframerate())
             wf.close()
-
-            transcript = " ".join(results).strip()
-            logger.info(f"Transcription: '{transcript}'")
             return transcript
 
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
             raise
 
-    def transcribe_bytes(self, audio_data: bytes, sample_rate: int = 16000) -> str:
+    def transcribe_bytes(
+        self,
+        audio_data: AudioBuffer,
+        sample_rate: int = 16000,
+        grammar: Optional[str] = None,
+        early_exit: Optional[EarlyExitPolicy] = None,
+        details: Optional[Dict[str, float]] = None,
+    ) -> str:
         """
         Transcribe audio bytes to text.
 
         Args:
-            audio_data: Raw audio bytes (16-bit PCM)
+            audio_data: Raw audio bytes (16-bit PCM), or a memoryview over them;
+                chunks are passed to Vosk without being copied
             sample_rate: Sample rate of audio
+            grammar: Optional Vosk grammar restricting the vocabulary
+            early_exit: Optional policy stopping the decoding on a control intent
+            details: Optional dict receiving the early-exit outcome
 
         Returns:
             Transcribed text
@@ -93,29 +210,166 @@ class SpeechToTextService:
             raise RuntimeError("Vosk model not loaded")
 
         try:
-            recognizer = KaldiRecognizer(self.model, sample_rate)
-            recognizer.SetWords(True)
-
-            results = []
-
+            view = memoryview(audio_data)
             # Process in chunks
             chunk_size = 8000
-            for i in range(0, len(audio_data), chunk_size):
-                chunk = audio_data[i : i + chunk_size]
-                if recognizer.AcceptWaveform(chunk):
-                    result = json.loads(recognizer.Result())
-                    if result.get("text"):
-                        results.append(result["text"])
-
-            # Get final result
-            final_result = json.loads(recognizer.FinalResult())
-            if final_result.get("text"):
-                results.append(final_result["text"])
-
-            transcript = " ".join(results).strip()
-            logger.info(f"Transcription: '{transcript}'")
-            return transcript
+            chunks = (view[i : i + chunk_size] for i in range(0, len(view), chunk_size))
+            if early_exit:
+                # A list of views lets an early exit measure the audio left undecoded
+                chunks = list(chunks)
+            return self._recognize(chunks, sample_rate, grammar, early_exit, details)
 
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
             raise
+
+    def transcribe_stream(
+        self,
+        chunks: Iterable[AudioBuffer],
+        sample_rate: int = 16000,
+        grammar: Optional[str] = None,
+        early_exit: Optional[EarlyExitPolicy] = None,
+        details: Optional[Dict[str, float]] = None,
+    ) -> str:
+        """
+        Transcribe PCM chunks as they are produced.
+
+        Args:
+            chunks: 16-bit PCM chunks, e.g. from a streaming decoder
+            sample_rate: Sample rate of audio
+            grammar: Optional Vosk grammar restricting the vocabulary
+            early_exit: Optional policy stopping the decoding on a control intent;
+                the chunk generator is then closed
+            details: Optional dict receiving the early-exit outcome
+
+        Returns:
+            Transcribed text
+        """
+        if not self.model:
+            raise RuntimeError("Vosk model not loaded")
+
+        try:
+            return self._recognize(chunks, sample_rate, grammar, early_exit, details)
+
+        except Exception as e:
+            logger.error(f"Transcription failed: {e}")
+            raise
+
+    def create_stream(self, sample_rate: int = 16000) -> RecognitionStream:
+        """Start an incremental recognition, fed chunk by chunk by the caller."""
+        if not self.model:
+            raise RuntimeError("Vosk model not loaded")
+        return RecognitionStream(self.model, sample_rate)
+
+    def _recognize(
+        self,
+        chunks: Iterable[AudioBuffer],
+        sample_rate: int,
+        grammar: Optional[str] = None,
+        early_exit: Optional[EarlyExitPolicy] = None,
+        details: Optional[Dict[str, float]] = None,
+    ) -> str:
+        """
+        Feed PCM chunks to a new recognizer and join the recognized segments.
+
+        With a grammar, the audio is decoded again with the open vocabulary
+        when the constrained result is not empty and has out-of-grammar words
+        or a mean word confidence below ``grammar_min_confidence``; ``details``
+        then gets ``grammar_fallback`` (1.0 when decoded again, else 0.0),
+        counted by the parent process.
+        """
+        replay = chunks
+        if grammar and not isinstance(chunks, list):
+            # Kept as they are decoded (a stream keeps overlapping the recognizer)
+            # for a possible second, open-vocabulary pass
+            replay = []
+            chunks = _recorded(chunks, replay)
+
+        stream = RecognitionStream(self.model, sample_rate, grammar)
+        if early_exit:
+            outcome = _decode_until_intent(stream, chunks, sample_rate, early_exit)
+            if details is not None:
+                details.update(outcome)
+        else:
+            for chunk in chunks:
+                stream.accept(chunk)
+        transcript = stream.finish()
+
+        # An empty result is silence (e.g. a streamed upload, not trimmed by the VAD):
+        # the open vocabulary would not find more in it
+        if (
+            grammar
+            and transcript
+            and (
+                UNKNOWN_WORD in transcript.split()
+                or stream.confidence < settings.grammar_min_confidence
+            )
+        ):
+            logger.info(
+                f"Grammar result '{transcript}' rejected (confidence {stream.confidence:.2f}), "
+                "decoding with the open vocabulary"
+            )
+            if details is not None:
+                details["grammar_fallback"] = 1.0
+            return self._recognize(replay, sample_rate, None, early_exit, details)
+
+        if grammar and details is not None:
+            details["grammar_fallback"] = 0.0
+        logger.info(f"Transcription: '{transcript}'")
+        return transcript
+
+
+# Service used by STT worker processes: inherited from the parent when forked
+# after set_worker_service(), or loaded by init_worker() in each worker.
+_worker_service: Optional[SpeechToTextService] = None
+
+
+def set_worker_service(service: SpeechToTextService):
+    """Share an already loaded service with the worker processes forked afterwards."""
+    global _worker_service
+    _worker_service = service
+
+
+def init_worker(load_model: bool):
+    """Process pool initializer: load a private model unless one was inherited."""
+    global _worker_service
+    if load_model or _worker_service is None:
+        _worker_service = SpeechToTextService()
+
+
+def worker_transcribe_details(
+    audio_data: bytes,
+    sample_rate: int = 16000,
+    grammar: Optional[str] = None,
+    early_exit: Optional[EarlyExitPolicy] = None,
+) -> Tuple[str, Dict[str, float]]:
+    """
+    Transcribe PCM in a worker process with its shared or private model.
+
+    Also returns the recognition details (early exit) to the parent.
+    """
+    details: Dict[str, float] = {}
+    transcript = _worker_service.transcribe_bytes(
+        audio_data, sample_rate, grammar, early_exit, details
+    )
+    return transcript, details
+
+
+def worker_transcribe_stream(
+    audio_content: bytes,
+    grammar: Optional[str] = None,
+    early_exit: Optional[EarlyExitPolicy] = None,
+) -> Tuple[str, Dict[str, float]]:
+    """Decode with a streaming ffmpeg and transcribe, in a worker process."""
+    details: Dict[str, float] = {}
+    transcript = _worker_service.transcribe_stream(
+        stream_pcm(audio_content), SAMPLE_RATE, grammar, early_exit, details
+    )
+    return transcript, details
+
+
+def worker_count() -> int:
+    """STT workers: ``stt_workers_per_core`` x CPU cores when set, else ``stt_workers``."""
+    if settings.stt_workers_per_core > 0:
+        return max(1, int((os.cpu_count() or 1) * settings.stt_workers_per_core))
+    return settings.stt_workers
@@ -0,0 +1,93 @@
+import logging
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+AudioBuffer = Union[bytes, memoryview]
+
+FULL_SCALE = 32768.0
+
+
+class VoiceActivityDetector:
+    """
+    Energy-based speech detection on 16-bit mono PCM.
+
+    Frame energies are computed in one vectorized pass over the buffer; the
+    clip is cut to the first and last frames above the threshold, plus some
+    padding so word onsets and endings are kept.
+    """
+
+    def __init__(
+        self,
+        threshold_db: Optional[float] = None,
+        frame_ms: Optional[int] = None,
+        padding_ms: Optional[int] = None,
+        min_speech_ms: Optional[int] = None,
+    ):
+        self.threshold_db = settings.vad_threshold_db if threshold_db is None else threshold_db
+        self.frame_ms = frame_ms or settings.vad_frame_ms
+        self.padding_ms = settings.vad_padding_ms if padding_ms is None else padding_ms
+        self.min_speech_ms = settings.vad_min_speech_ms if min_speech_ms is None else min_speech_ms
+        self._stats = {
+            "clips": 0,
+            "rejected": 0,
+            "audio_seconds": 0.0,
+            "trimmed_seconds": 0.0,
+        }
+
+    def trim(
+        self, pcm: AudioBuffer, sample_rate: int = 16000
+    ) -> Tuple[Optional[memoryview], Dict[str, float]]:
+        """
+        Cut leading and trailing silence.
+
+        Returns:
+            (speech, info): a view over the speech part of ``pcm`` (None when
+            the clip has no speech) and the audio, speech and trimmed durations
+        """
+        view = memoryview(pcm)
+        samples = np.frombuffer(view, dtype="<i2", count=len(view) // 2)
+        duration = len(samples) / sample_rate
+        frame_len = max(1, sample_rate * self.frame_ms // 1000)
+        n_frames = len(samples) // frame_len
+
+        speech_frames = np.empty(0, dtype=np.intp)
+        if n_frames:
+            frames = samples[: n_frames * frame_len].reshape(n_frames, frame_len)
+            power = np.einsum("ij,ij->i", frames, frames, dtype=np.float64) / frame_len
+            threshold = (FULL_SCALE * 10 ** (self.threshold_db / 20)) ** 2
+            speech_frames = np.flatnonzero(power > threshold)
+
+        self._stats["clips"] += 1
+        self._stats["audio_seconds"] += duration
+        min_frames = max(1, -(-self.min_speech_ms // self.frame_ms))
+        if len(speech_frames) < min_frames:
+            self._stats["rejected"] += 1
+            self._stats["trimmed_seconds"] += duration
+            return None, {
+                "audio_duration": duration,
+                "speech_duration": 0.0,
+                "trimmed_duration": duration,
+            }
+
+        padding = sample_rate * self.padding_ms // 1000
+        start = max(0, int(speech_frames[0]) * frame_len - padding)
+        end = min(len(samples), (int(speech_frames[-1]) + 1) * frame_len + padding)
+        speech_duration = (end - start) / sample_rate
+        self._stats["trimmed_seconds"] += duration - speech_duration
+        return view[start * 2 : end * 2], {
+            "audio_duration": duration,
+            "speech_duration": speech_duration,
+            "trimmed_duration": duration - speech_duration,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Clip, rejection and trimmed audio counters."""
+        audio = self._stats["audio_seconds"]
+        return {
+            **self._stats,
+            "trimmed_ratio": self._stats["trimmed_seconds"] / audio if audio else 0.0,
+        }
@@ -0,0 +1,585 @@
+"""Tests for service-vocal API endpoints."""
+
+import asyncio
+import io
+import json
+import time
+import wave
+import zipfile
+from unittest.mock import AsyncMock, MagicMock
+
+import app as app_module
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from services.music_matcher import CatalogIndex
+from starlette.websockets import WebSocketDisconnect
+
+# The client fixture replaces find_musique with a mock
+real_find_musique = app_module.find_musique
+
+
+def make_wav(samples):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+class FakeStream:
+    """Recognition stream ending an utterance on every second chunk."""
+
+    def __init__(self, segment="joue bohemian rhapsody"):
+        self.segment = segment
+        self.chunks = 0
+
+    def accept(self, chunk):
+        self.chunks += 1
+        return self.segment if self.chunks % 2 == 0 else None
+
+    def partial(self):
+        return "joue bohemian"
+
+    def finish(self):
+        return self.segment
+
+
+class FakeSTTService:
+    model = object()
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.transcribed = []
+
+    def transcribe_bytes(
+        self, audio_data, sample_rate=16000, grammar=None, early_exit=None, details=None
+    ):
+        self.transcribed.append(len(audio_data))
+        return "joue bohemian rhapsody"
+
+    def create_stream(self, sample_rate=16000):
+        return self.stream
+
+
+@pytest.fixture
+def client(monkeypatch, sample_musique):
+    monkeypatch.setattr(app_module, "stt_service", FakeSTTService(FakeStream()))
+    monkeypatch.setattr(app_module, "find_musique", AsyncMock(return_value=sample_musique))
+    app_module.result_cache.clear()
+    return TestClient(app_module.app)
+
+
+class TestStartStt:
+    """Tests for the STT startup."""
+
+    async def test_per_worker_parent_loads_streaming_model(self, monkeypatch):
+        """With per-worker models the parent should load its own, after forking the workers."""
+        calls = []
+        executor = MagicMock()
+        executor.start.side_effect = lambda: calls.append("start")
+        executor.run = AsyncMock(side_effect=lambda func: calls.append("fork"))
+        service = MagicMock(side_effect=lambda **kwargs: calls.append(("load", kwargs)))
+        monkeypatch.setattr(app_module, "stt_in_processes", True)
+        monkeypatch.setattr(app_module, "stt_model_per_worker", True)
+        monkeypatch.setattr(app_module, "stt_executor", executor)
+        monkeypatch.setattr(app_module, "conversion_executor", MagicMock())
+        monkeypatch.setattr(app_module, "SpeechToTextService", service)
+        monkeypatch.setattr(app_module, "stt_service", None)
+
+        await app_module.start_stt()
+
+        assert calls == ["start", "fork", ("load", {})]
+
+
+class TestRecognizeStream:
+    """Tests for the /ws/recognize WebSocket."""
+
+    def test_partial_segment_and_result(self, client, sample_musique):
+        """Frames should produce partials, segments, then the resolved command."""
+        with client.websocket_connect("/ws/recognize") as ws:
+            ws.send_bytes(b"\x00" * 3200)
+            assert ws.receive_json() == {"type": "partial", "partial": "joue bohemian"}
+            ws.send_bytes(b"\x00" * 3200)
+            assert ws.receive_json() == {"type": "segment", "text": "joue bohemian rhapsody"}
+            ws.send_text("end")
+            result = ws.receive_json()
+
+        assert result["type"] == "result"
+        assert result["intent"] == "PLAY"
+        assert result["musique"] == sample_musique
+
+    def test_unchanged_partial_not_repeated(self, client):
+        """The same partial should only be sent once."""
+        app_module.stt_service.stream.accept = lambda chunk: None
+        with client.websocket_connect("/ws/recognize") as ws:
+            ws.send_bytes(b"\x00" * 3200)
+            ws.send_bytes(b"\x00" * 3200)
+            ws.send_text("end")
+            assert ws.receive_json()["type"] == "partial"
+            assert ws.receive_json()["type"] == "result"
+
+    def test_auto_end(self, client):
+        """With auto_end the result should follow the first utterance."""
+        with client.websocket_connect("/ws/recognize?auto_end=true") as ws:
+            ws.send_bytes(b"\x00" * 3200)
+            ws.receive_json()
+            ws.send_bytes(b"\x00" * 3200)
+            assert ws.receive_json()["type"] == "segment"
+            assert ws.receive_json()["type"] == "result"
+
+    @pytest.mark.parametrize("sample_rate", ["abc", "44100"])
+    def test_invalid_sample_rate(self, client, sample_rate):
+        """An unsupported sample rate should get an error message and a close."""
+        with client.websocket_connect(f"/ws/recognize?sample_rate={sample_rate}") as ws:
+            assert ws.receive_json()["type"] == "error"
+            with pytest.raises(WebSocketDisconnect) as closed:
+                ws.receive_json()
+        assert closed.value.code == 1003
+
+    def test_no_speech(self, client, monkeypatch):
+        """An empty transcript should give an unsuccessful result."""
+        monkeypatch.setattr(app_module, "stt_service", FakeSTTService(FakeStream(segment="")))
+        with client.websocket_connect("/ws/recognize") as ws:
+            ws.send_text("end")
+            result = ws.receive_json()
+        assert result["success"] is False
+        assert result["error"] == "No speech detected"
+
+    def test_stt_not_ready(self, client, monkeypatch):
+        """Without a loaded model the stream should be refused."""
+        monkeypatch.setattr(app_module, "stt_service", None)
+        with client.websocket_connect("/ws/recognize") as ws:
+            assert ws.receive_json()["type"] == "error"
+
+
+class TestRecognize:
+    """Tests for the /recognize endpoint."""
+
+    def test_silence_trimmed_before_recognition(self, client, sample_musique):
+        """Leading and trailing silence should not reach the recognizer."""
+        speech = np.sin(np.arange(16000) * 0.2) * 8000
+        samples = np.concatenate([np.zeros(32000), speech, np.zeros(32000)])
+
+        response = client.post(
+            "/recognize", files={"audio": ("command.wav", make_wav(samples), "audio/wav")}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["musique"] == sample_musique
+        assert data["timings"]["audio_duration"] == 5.0
+        assert data["timings"]["trimmed_duration"] > 3
+        assert "stt" in data["timings"]
+        # 1s of speech plus 300ms of padding on each side, 2 bytes per sample
+        assert app_module.stt_service.transcribed[0] == pytest.approx(1.6 * 16000 * 2, rel=0.05)
+
+    def test_grammar_fallback_counted_in_parent(self, client, monkeypatch):
+        """A fallback reported by the recognizer (maybe in a worker) should reach /metrics."""
+
+        def transcribe_bytes(audio_data, sample_rate, grammar, early_exit, details):
+            details["grammar_fallback"] = 1.0
+            return "joue queen"
+
+        monkeypatch.setattr(app_module.stt_service, "transcribe_bytes", transcribe_bytes)
+        before = client.get("/metrics").json()["grammar"]["fallbacks"]
+        speech = np.sin(np.arange(16000) * 0.2) * 8000
+
+        response = client.post(
+            "/recognize", files={"audio": ("command.wav", make_wav(speech), "audio/wav")}
+        )
+
+        assert "grammar_fallback" not in response.json()["timings"]
+        assert client.get("/metrics").json()["grammar"]["fallbacks"] == before + 1
+
+    def test_silent_clip_skips_recognizer(self, client):
+        """A clip without speech should be rejected before the recognizer."""
+        response = client.post(
+            "/recognize", files={"audio": ("command.wav", make_wav(np.zeros(16000)), "audio/wav")}
+        )
+
+        data = response.json()
+        assert data["success"] is False
+        assert data["error"] == "No speech detected"
+        assert app_module.stt_service.transcribed == []
+
+    def test_early_exit_reported_in_timings(self, client, monkeypatch):
+        """The early-exit outcome should be added to the timings and the metrics."""
+        monkeypatch.setattr(app_module.settings, "early_exit", True)
+
+        def transcribe_bytes(audio_data, sample_rate, grammar, early_exit, details):
+            assert early_exit is app_module.early_exit_policy
+            details.update(early_exit=1.0, early_exit_audio_skipped=1.0, early_exit_saved=0.1)
+            return "pause"
+
+        monkeypatch.setattr(app_module.stt_service, "transcribe_bytes", transcribe_bytes)
+        before = app_module.early_exit_policy.stats()["early_exits"]
+        speech = np.sin(np.arange(32000) * 0.2) * 8000
+
+        response = client.post(
+            "/recognize", files={"audio": ("command.wav", make_wav(speech), "audio/wav")}
+        )
+
+        data = response.json()
+        assert data["intent"] == "PAUSE"
+        assert data["timings"]["early_exit"] == 1.0
+        assert data["timings"]["early_exit_saved"] == 0.1
+        assert client.get("/metrics").json()["early_exit"]["early_exits"] == before + 1
+
+    def test_transcribe_never_cut_short(self, client, monkeypatch):
+        """/transcribe should decode fully and not reuse an early-exited transcript."""
+        monkeypatch.setattr(app_module.settings, "early_exit", True)
+        policies = []
+
+        def transcribe_bytes(audio_data, sample_rate, grammar, early_exit, details):
+            policies.append(early_exit)
+            return "pause" if early_exit else "pause la musique"
+
+        monkeypatch.setattr(app_module.stt_service, "transcribe_bytes", transcribe_bytes)
+        wav = make_wav(np.sin(np.arange(32000) * 0.2) * 8000)
+
+        client.post("/recognize", files={"audio": ("command.wav", wav, "audio/wav")})
+        data = client.post("/transcribe", files={"audio": ("command.wav", wav, "audio/wav")}).json()
+
+        assert policies == [app_module.early_exit_policy, None]
+        assert data["transcript"] == "pause la musique"
+        assert "early_exit" not in data["timings"]
+
+
+class TestResultCache:
+    """Tests for the cache of recognition results."""
+
+    @pytest.fixture(autouse=True)
+    def catalog(self, client, monkeypatch, sample_musique, sample_musiques):
+        """Serve a version 3 index, awaited by the stand-in matcher like the real one."""
+        index = CatalogIndex(sample_musiques, version=3)
+        monkeypatch.setattr(app_module.catalog_replica, "get_index", AsyncMock(return_value=index))
+        monkeypatch.setattr(app_module.catalog_replica, "version", 3)
+
+        async def find(music_query, index_task=None, timings=None):
+            if index_task is not None:
+                await index_task
+            return sample_musique
+
+        monkeypatch.setattr(app_module, "find_musique", AsyncMock(side_effect=find))
+
+    def post(self, client, samples):
+        return client.post(
+            "/recognize", files={"audio": ("command.wav", make_wav(samples), "audio/wav")}
+        )
+
+    def test_retry_served_from_cache(self, client, sample_musique, monkeypatch):
+        """A retried upload should not be decoded nor matched again."""
+        monkeypatch.setattr(app_module.settings, "match_mode", "local")
+        speech = np.sin(np.arange(16000) * 0.3) * 8000
+
+        first = self.post(client, speech).json()
+        second = self.post(client, speech).json()
+
+        assert len(app_module.stt_service.transcribed) == 1
+        assert app_module.find_musique.await_count == 1
+        assert second["musique"] == first["musique"] == sample_musique
+        assert second["timings"] == {"cache_hit": 1.0}
+        assert client.get("/metrics").json()["result_cache"]["hits"] >= 1
+
+    def test_match_redone_on_catalog_change(self, client, monkeypatch):
+        """A cached PLAY match should be redone when the catalog version changed."""
+        monkeypatch.setattr(app_module.settings, "match_mode", "local")
+        speech = np.sin(np.arange(16000) * 0.3) * 8000
+
+        self.post(client, speech)
+        monkeypatch.setattr(app_module.catalog_replica, "version", 99)
+        self.post(client, speech)
+
+        assert len(app_module.stt_service.transcribed) == 1
+        assert app_module.find_musique.await_count == 2
+
+    def test_match_tagged_with_index_version(self, client, monkeypatch):
+        """A match made on an index older than the replica should not be served later."""
+        monkeypatch.setattr(app_module.settings, "match_mode", "local")
+        # The replica synced to version 4 while this request used the version 3 index
+        monkeypatch.setattr(app_module.catalog_replica, "version", 4)
+        speech = np.sin(np.arange(16000) * 0.3) * 8000
+
+        self.post(client, speech)
+        self.post(client, speech)
+
+        assert len(app_module.stt_service.transcribed) == 1
+        assert app_module.find_musique.await_count == 2
+
+    def test_remote_match_not_cached(self, client, monkeypatch):
+        """With remote matching, only the transcript should be reused."""
+        monkeypatch.setattr(app_module.settings, "match_mode", "remote")
+        speech = np.sin(np.arange(16000) * 0.3) * 8000
+
+        self.post(client, speech)
+        self.post(client, speech)
+
+        assert len(app_module.stt_service.transcribed) == 1
+        assert app_module.find_musique.await_count == 2
+
+
+class TestCatalogPrefetch:
+    """Tests for the catalog acquisition overlapping recognition."""
+
+    def test_catalog_fetched_during_recognition(self, client, monkeypatch, sample_musiques):
+        """The catalog should be acquired while Vosk decodes, not after."""
+        monkeypatch.setattr(app_module.settings, "match_mode", "local")
+        monkeypatch.setattr(app_module.settings, "result_cache_enabled", False)
+        monkeypatch.setattr(app_module, "find_musique", real_find_musique)
+
+        async def get_index():
+            await asyncio.sleep(0.3)
+            return CatalogIndex(sample_musiques, version=1)
+
+        def transcribe_bytes(audio_data, sample_rate, grammar, early_exit, details):
+            time.sleep(0.3)
+            return "joue hotel california"
+
+        monkeypatch.setattr(app_module.catalog_replica, "get_index", get_index)
+        monkeypatch.setattr(app_module.stt_service, "transcribe_bytes", transcribe_bytes)
+        speech = np.sin(np.arange(16000) * 0.2) * 8000
+
+        response = client.post(
+            "/recognize", files={"audio": ("command.wav", make_wav(speech), "audio/wav")}
+        )
+
+        data = response.json()
+        timings = data["timings"]
+        assert data["musique"]["titre"] == "Hotel California"
+        assert timings["catalog"] >= 0.3
+        assert timings["catalog_wait"] < 0.2
+        assert timings["total"] < timings["stt"] + timings["catalog"]
+
+    @pytest.fixture
+    def grammar_events(self, client, monkeypatch, sample_musiques):
+        """Record the decoding, the catalog acquisition and the recognition, in order."""
+        monkeypatch.setattr(app_module.settings, "match_mode", "local")
+        monkeypatch.setattr(app_module.settings, "stt_grammar", True)
+        monkeypatch.setattr(app_module.settings, "result_cache_enabled", False)
+        events = []
+        decode = app_module.audio_decoder.decode
+
+        async def recorded_decode(content, filename):
+            events.append("decode")
+            return await decode(content, filename)
+
+        async def get_index():
+            await asyncio.sleep(0.1)
+            events.append("catalog")
+            return CatalogIndex(sample_musiques, version=1)
+
+        def transcribe_bytes(audio_data, sample_rate, grammar, early_exit, details):
+            events.append(("stt", grammar is not None))
+            return "joue hotel california"
+
+        monkeypatch.setattr(app_module.audio_decoder, "decode", recorded_decode)
+        monkeypatch.setattr(app_module.catalog_replica, "get_index", get_index)
+        monkeypatch.setattr(app_module.stt_service, "transcribe_bytes", transcribe_bytes)
+        return events
+
+    def post_speech(self, client):
+        speech = np.sin(np.arange(16000) * 0.2) * 8000
+        return client.post(
+            "/recognize", files={"audio": ("command.wav", make_wav(speech), "audio/wav")}
+        )
+
+    def test_grammar_awaited_after_decoding(self, client, grammar_events):
+        """With an empty replica, decoding should not wait for the catalog."""
+        self.post_speech(client)
+        assert grammar_events == ["decode", "catalog", ("stt", True)]
+
+    def test_grammar_from_loaded_replica(
+        self, client, monkeypatch, grammar_events, sample_musiques
+    ):
+        """A loaded replica should give the grammar without waiting for its refresh."""
+        replica = app_module.catalog_replica
+        monkeypatch.setattr(replica, "_musiques", {m["id"]: m for m in sample_musiques})
+        monkeypatch.setattr(replica, "_index", CatalogIndex(sample_musiques, version=1))
+
+        self.post_speech(client)
+        assert grammar_events[:2] == ["decode", ("stt", True)]
+
+
+class TestCommand:
+    """Tests for the text command endpoints."""
+
+    def test_command(self, client, sample_musique):
+        """A transcript should be parsed and matched without the recognizer."""
+        response = client.post("/command", json={"text": "  joue bohemian rhapsody "})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["intent"] == "PLAY"
+        assert data["transcript"] == "joue bohemian rhapsody"
+        assert data["musique"] == sample_musique
+        assert "total" in data["timings"]
+        assert app_module.stt_service.transcribed == []
+
+    def test_command_without_stt(self, client, monkeypatch):
+        """Text commands should not need the STT service."""
+        monkeypatch.setattr(app_module, "stt_service", None)
+        data = client.post("/command", json={"text": "pause"}).json()
+        assert data["intent"] == "PAUSE"
+        assert data["musique"] is None
+
+    def test_batch_in_order(self, client, sample_musique):
+        """Batch results should follow the order of the transcripts."""
+        response = client.post(
+            "/command/batch", json={"texts": ["pause", "joue queen", "", "suivant"]}
+        )
+
+        results = response.json()["results"]
+        assert [r["intent"] for r in results] == ["PAUSE", "PLAY", "UNKNOWN", "NEXT"]
+        assert results[1]["musique"] == sample_musique
+        assert results[2]["success"] is False
+
+    def test_batch_failure_per_command(self, client, monkeypatch, sample_musique):
+        """A failed lookup should only fail its own command."""
+
+        async def find_musique(music_query, index_task=None, timings=None):
+            if music_query == "queen":
+                raise RuntimeError("pool exhausted")
+            return sample_musique
+
+        monkeypatch.setattr(app_module, "find_musique", find_musique)
+        response = client.post(
+            "/command/batch", json={"texts": ["joue queen", "pause", "joue abba"]}
+        )
+
+        assert response.status_code == 200
+        failed, paused, played = response.json()["results"]
+        assert (failed["success"], failed["error"]) == (False, "pool exhausted")
+        assert paused["intent"] == "PAUSE"
+        assert played["musique"] == sample_musique
+
+    def test_batch_concurrency_bounded(self, client, monkeypatch, sample_musique):
+        """At most COMMAND_BATCH_CONCURRENCY lookups should run at once."""
+        monkeypatch.setattr(app_module.settings, "command_batch_concurrency", 2)
+        running, peak = [0], [0]
+
+        async def find_musique(music_query, index_task=None, timings=None):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.01)
+            running[0] -= 1
+            return sample_musique
+
+        monkeypatch.setattr(app_module, "find_musique", find_musique)
+        response = client.post("/command/batch", json={"texts": ["joue queen"] * 6})
+
+        assert len(response.json()["results"]) == 6
+        assert peak[0] == 2
+
+    def test_batch_too_large(self, client, monkeypatch):
+        """Batches above COMMAND_BATCH_MAX should be rejected."""
+        monkeypatch.setattr(app_module.settings, "command_batch_max", 2)
+        response = client.post("/command/batch", json={"texts": ["pause"] * 3})
+        assert response.status_code == 413
+
+
+class TestTranscribeBatch:
+    """Tests for the batch transcription endpoint."""
+
+    def test_files_and_archive(self, client):
+        """Files and archive members should each get an NDJSON result line."""
+        speech = make_wav(np.sin(np.arange(16000) * 0.2) * 8000)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("b.wav", speech)
+            zf.writestr("c.wav", make_wav(np.zeros(16000)))
+
+        response = client.post(
+            "/transcribe/batch",
+            files=[
+                ("files", ("a.wav", speech, "audio/wav")),
+                ("files", ("logs.zip", archive.getvalue(), "application/zip")),
+            ],
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        results = sorted(
+            (json.loads(line) for line in response.text.splitlines()), key=lambda r: r["index"]
+        )
+        assert [r["file"] for r in results] == ["a.wav", "logs.zip/b.wav", "logs.zip/c.wav"]
+        assert [r["transcript"] for r in results] == ["joue bohemian rhapsody"] * 2 + [""]
+        assert all("total" in r["timings"] for r in results)
+
+    def test_error_reported_per_file(self, client, monkeypatch):
+        """A failing recording should not stop the batch."""
+
+        def transcribe_bytes(audio_data, sample_rate, grammar, early_exit, details):
+            raise RuntimeError("decoder crashed")
+
+        monkeypatch.setattr(app_module.stt_service, "transcribe_bytes", transcribe_bytes)
+        speech = make_wav(np.sin(np.arange(16000) * 0.2) * 8000)
+
+        response = client.post(
+            "/transcribe/batch", files=[("files", ("a.wav", speech, "audio/wav"))]
+        )
+
+        (result,) = [json.loads(line) for line in response.text.splitlines()]
+        assert result["error"] == "decoder crashed"
+
+    def test_unreadable_member_reported(self, client):
+        """An archive member with a bad CRC should get an error line, the others a transcript."""
+        speech = make_wav(np.sin(np.arange(16000) * 0.2) * 8000)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("a.wav", speech)
+            zf.writestr("b.wav", b"corrupted member")
+            zf.writestr("c.wav", speech)
+        content = archive.getvalue().replace(b"corrupted member", b"corrupted membe!")
+
+        response = client.post(
+            "/transcribe/batch", files=[("files", ("logs.zip", content, "application/zip"))]
+        )
+
+        results = sorted(
+            (json.loads(line) for line in response.text.splitlines()), key=lambda r: r["index"]
+        )
+        assert [r["file"] for r in results] == [
+            "logs.zip/a.wav",
+            "logs.zip/b.wav",
+            "logs.zip/c.wav",
+        ]
+        assert "Bad CRC-32" in results[1]["error"]
+        assert results[0]["transcript"] == results[2]["transcript"] == "joue bohemian rhapsody"
+
+    def test_too_many_recordings(self, client, monkeypatch):
+        """Archives with more members than TRANSCRIBE_BATCH_MAX should be rejected."""
+        monkeypatch.setattr(app_module.settings, "transcribe_batch_max", 2)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            for i in range(3):
+                zf.writestr(f"{i}.wav", b"x")
+
+        response = client.post(
+            "/transcribe/batch",
+            files=[("files", ("logs.zip", archive.getvalue(), "application/zip"))],
+        )
+        assert response.status_code == 413
+
+    def test_recording_too_large(self, client, monkeypatch):
+        """A member above BATCH_MAX_RECORDING_BYTES should be rejected."""
+        monkeypatch.setattr(app_module.settings, "batch_max_recording_bytes", 100)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("bomb.wav", b"\x00" * 100000)
+
+        response = client.post(
+            "/transcribe/batch",
+            files=[("files", ("logs.zip", archive.getvalue(), "application/zip"))],
+        )
+        assert response.status_code == 413
+        assert app_module.stt_service.transcribed == []
+
+    def test_invalid_archive(self, client):
+        """A corrupted archive should be rejected."""
+        response = client.post(
+            "/transcribe/batch", files=[("files", ("logs.zip", b"not a zip", "application/zip"))]
+        )
+        assert response.status_code == 400
@@ -0,0 +1,170 @@
+"""Tests for audio converter module."""
+
+import io
+import struct
+import wave
+from unittest.mock import AsyncMock
+
+import pytest
+from services import audio_converter
+from services.audio_converter import AudioDecoder, convert_to_pcm, stream_pcm, wav_pcm_payload
+
+
+def make_wav(channels=2, rate=44100, seconds=0.5):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b"\x00\x01" * channels * int(rate * seconds))
+    return buffer.getvalue()
+
+
+class TestConvertToPcm:
+    """Tests for convert_to_pcm function."""
+
+    def test_wav_converted_to_16k_mono_pcm(self):
+        """WAV input should be resampled to 16kHz mono 16-bit PCM bytes."""
+        pcm = convert_to_pcm(make_wav(seconds=0.5), "command.wav")
+        assert isinstance(pcm, bytes)
+        assert len(pcm) == 16000 * 2 // 2  # 0.5s, 2 bytes per sample
+
+    def test_invalid_audio_raises(self):
+        """Undecodable input should raise."""
+        with pytest.raises(Exception):
+            convert_to_pcm(b"not audio", "command.wav")
+
+
+def riff(*chunks):
+    body = b"WAVE" + b"".join(
+        cid + struct.pack("<I", len(data)) + data + b"\x00" * (len(data) & 1)
+        for cid, data in chunks
+    )
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def fmt_chunk(audio_format=1, channels=1, rate=16000, bits=16):
+    block = channels * bits // 8
+    return b"fmt ", struct.pack("<HHIIHH", audio_format, channels, rate, rate * block, block, bits)
+
+
+class TestWavFastPath:
+    """Tests for wav_pcm_payload function."""
+
+    def test_matching_wav_returns_view(self):
+        """16kHz mono 16-bit WAV should return a view over its samples."""
+        frames = bytes(range(200))
+        content = riff(fmt_chunk(), (b"data", frames))
+        pcm = wav_pcm_payload(content)
+        assert isinstance(pcm, memoryview)
+        assert pcm.obj is content
+        assert bytes(pcm) == frames
+
+    def test_wave_module_output_accepted(self):
+        """WAV files written by the wave module should take the fast path."""
+        pcm = wav_pcm_payload(make_wav(channels=1, rate=16000, seconds=0.1))
+        assert len(pcm) == 1600 * 2
+
+    def test_extra_chunks_skipped(self):
+        """Chunks before data (LIST, odd sizes) should be skipped."""
+        content = riff((b"LIST", b"abc"), fmt_chunk(), (b"data", b"\x01\x02"))
+        assert bytes(wav_pcm_payload(content)) == b"\x01\x02"
+
+    def test_unset_data_size(self):
+        """A streamed data chunk with an unset size should use the uploaded bytes."""
+        content = riff(fmt_chunk(), (b"data", b""))[:-4] + b"\xff\xff\xff\xff" + b"\x01\x02\x03"
+        assert bytes(wav_pcm_payload(content)) == b"\x01\x02"
+
+    def test_extensible_pcm_accepted(self):
+        """WAVE_FORMAT_EXTENSIBLE with a PCM sub-format should be accepted."""
+        cid, fmt = fmt_chunk(audio_format=0xFFFE)
+        fmt += struct.pack("<HHI", 22, 16, 4) + struct.pack("<H", 1) + bytes(14)
+        assert wav_pcm_payload(riff((cid, fmt), (b"data", b"\x00\x00"))) is not None
+
+    @pytest.mark.parametrize(
+        "fmt",
+        [
+            fmt_chunk(rate=44100),
+            fmt_chunk(channels=2),
+            fmt_chunk(bits=8),
+            fmt_chunk(audio_format=3),
+        ],
+    )
+    def test_other_formats_rejected(self, fmt):
+        """Other rates, channel counts, widths or encodings should need a conversion."""
+        assert wav_pcm_payload(riff(fmt, (b"data", b"\x00\x00"))) is None
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            b"",
+            b"ID3\x03" + bytes(20),
+            riff((b"data", b"\x00\x00")),
+            # Extensible fmt announcing 40 bytes, truncated after the basic 16
+            b"RIFF"
+            + struct.pack("<I", 28)
+            + b"WAVE"
+            + b"fmt "
+            + struct.pack("<I", 40)
+            + fmt_chunk(audio_format=0xFFFE)[1],
+            # Extensible fmt too short to hold the sub-format
+            riff((b"fmt ", fmt_chunk(audio_format=0xFFFE)[1] + bytes(2)), (b"data", b"\x00\x00")),
+        ],
+    )
+    def test_not_wav_rejected(self, content):
+        """Non-RIFF content, data before fmt or truncated headers should be rejected."""
+        assert wav_pcm_payload(content) is None
+
+
+class TestAudioDecoder:
+    """Tests for AudioDecoder class."""
+
+    async def test_fast_path_and_conversion_counted(self):
+        """Matching WAV should skip the executor; other uploads should be converted."""
+        executor = AsyncMock()
+        executor.run.return_value = b"\x00\x00"
+        decoder = AudioDecoder(executor)
+
+        await decoder.decode(make_wav(channels=1, rate=16000), "command.wav")
+        executor.run.assert_not_awaited()
+        assert await decoder.decode(make_wav(), "command.wav") == b"\x00\x00"
+        executor.run.assert_awaited_once()
+
+        stats = decoder.stats()
+        assert stats["fast_path"] == 1
+        assert stats["converted"] == 1
+        assert stats["fast_path_ratio"] == 0.5
+
+
+class TestStreamPcm:
+    """Tests for the streaming ffmpeg decoder, with a stand-in command."""
+
+    def test_chunks_yielded_incrementally(self, monkeypatch):
+        """Decoder output should be yielded in chunks."""
+        monkeypatch.setattr(audio_converter, "_ffmpeg_command", lambda: ["cat"])
+        chunks = list(stream_pcm(bytes(20000), chunk_size=8000))
+        assert [len(chunk) for chunk in chunks] == [8000, 8000, 4000]
+
+    def test_decoder_failure_raises(self, monkeypatch):
+        """A non-zero exit should raise with the decoder error output."""
+        command = ["sh", "-c", "cat > /dev/null; echo invalid data >&2; exit 1"]
+        monkeypatch.setattr(audio_converter, "_ffmpeg_command", lambda: command)
+        with pytest.raises(RuntimeError, match="invalid data"):
+            list(stream_pcm(b"not audio"))
+
+    def test_early_close_kills_decoder(self, monkeypatch):
+        """Closing the generator early should stop the subprocess."""
+        monkeypatch.setattr(audio_converter, "_ffmpeg_command", lambda: ["cat"])
+        chunks = stream_pcm(bytes(10_000_000), chunk_size=100)
+        assert len(next(chunks)) == 100
+        chunks.close()
+
+    def test_should_stream_compressed_formats(self):
+        """Only compressed uploads should be streamed, and only when enabled."""
+        decoder = AudioDecoder(AsyncMock(), streaming=True)
+        decoder.streaming = True  # ffmpeg may be missing from the test environment
+        assert decoder.should_stream("command.mp3")
+        assert not decoder.should_stream("command.wav")
+        decoder.streaming = False
+        assert not decoder.should_stream("command.ogg")
+        assert decoder.stats()["streamed"] == 1
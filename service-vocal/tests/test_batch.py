@@ -0,0 +1,97 @@
+"""Tests for batch recording extraction."""
+
+import io
+import tarfile
+import zipfile
+
+import pytest
+from services.batch import (
+    RecordingTooLargeError,
+    count_recordings,
+    is_archive,
+    iter_paths,
+    iter_recordings,
+)
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def make_tar(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, content in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+class TestBatchRecordings:
+    """Tests for the expansion of uploads into recordings."""
+
+    def test_plain_file(self):
+        """A single audio file should be one recording."""
+        assert list(iter_recordings("a.wav", b"RIFF")) == [("a.wav", b"RIFF")]
+        assert not is_archive("a.wav")
+
+    def test_zip_members(self):
+        """Zip members should be recordings, hidden files skipped."""
+        content = make_zip({"a.wav": b"1", "day/b.mp3": b"2", "__MACOSX/._a.wav": b"x"})
+        assert list(iter_recordings("logs.zip", content)) == [
+            ("logs.zip/a.wav", b"1"),
+            ("logs.zip/day/b.mp3", b"2"),
+        ]
+
+    def test_tar_members(self):
+        """Compressed tar members should be recordings."""
+        content = make_tar({"a.wav": b"1", ".DS_Store": b"x"})
+        assert is_archive("logs.tar.gz")
+        assert list(iter_recordings("logs.tar.gz", content)) == [("logs.tar.gz/a.wav", b"1")]
+
+    def test_unreadable_member_yielded_with_error(self):
+        """A member failing its CRC check should not stop the other recordings."""
+        content = make_zip({"a.wav": b"aaaa", "b.wav": b"bbbb", "c.wav": b"cccc"})
+        content = content.replace(b"bbbb", b"bbbx")
+
+        (a, b, c) = iter_recordings("logs.zip", content)
+        assert a == ("logs.zip/a.wav", b"aaaa")
+        assert b[0] == "logs.zip/b.wav"
+        assert isinstance(b[1], zipfile.BadZipFile)
+        assert c == ("logs.zip/c.wav", b"cccc")
+
+    def test_corrupted_archive(self):
+        """A corrupted archive should raise."""
+        with pytest.raises(zipfile.BadZipFile):
+            list(iter_recordings("logs.zip", b"not a zip"))
+
+    def test_paths(self, tmp_path):
+        """Directories should be walked in name order, archives expanded."""
+        (tmp_path / "b.wav").write_bytes(b"b")
+        (tmp_path / "a.zip").write_bytes(make_zip({"x.wav": b"x"}))
+        (tmp_path / ".hidden.wav").write_bytes(b"h")
+
+        names = [name for name, _ in iter_paths([str(tmp_path)])]
+        assert names == [f"{tmp_path}/a.zip/x.wav", f"{tmp_path}/b.wav"]
+
+    def test_count_stops_at_limit(self):
+        """Counting should read the headers only and stop at the limit."""
+        content = make_zip({f"{i}.wav": b"x" for i in range(10)})
+        assert count_recordings("logs.zip", content) == 10
+        assert count_recordings("logs.zip", content, limit=3) == 3
+
+    def test_member_too_large(self):
+        """A member above max_size should be rejected before being decompressed."""
+        content = make_zip({"small.wav": b"x", "big.wav": b"\x00" * 1000})
+        with pytest.raises(RecordingTooLargeError):
+            count_recordings("logs.zip", content, max_size=100)
+
+        recordings = iter_recordings("logs.zip", content, max_size=100)
+        assert next(recordings) == ("logs.zip/small.wav", b"x")
+        with pytest.raises(RecordingTooLargeError):
+            next(recordings)
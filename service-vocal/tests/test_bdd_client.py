@@ -0,0 +1,76 @@
+"""Tests for BddClient."""
+
+from unittest.mock import patch
+
+import httpx
+import pytest
+from services.bdd_client import BddClient
+
+AsyncClient = httpx.AsyncClient
+
+
+@pytest.fixture
+def requests_log():
+    return []
+
+
+@pytest.fixture
+def client(requests_log, sample_musiques):
+    """BddClient backed by an in-memory transport emulating service-bdd."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_log.append(request)
+        if request.url.path == "/musiques":
+            if request.headers.get("if-none-match") == 'W/"3"':
+                return httpx.Response(304, headers={"ETag": 'W/"3"'})
+            return httpx.Response(200, json=sample_musiques, headers={"ETag": 'W/"3"'})
+        if request.url.path == "/musiques/99":
+            return httpx.Response(404, json={"detail": "Musique non trouvée"})
+        return httpx.Response(500)
+
+    transport = httpx.MockTransport(handler)
+    with patch(
+        "services.bdd_client.httpx.AsyncClient",
+        lambda **kwargs: AsyncClient(transport=transport, **kwargs),
+    ):
+        yield BddClient()
+
+
+class TestBddClient:
+    """Tests for BddClient class."""
+
+    async def test_get_all_musiques(self, client, sample_musiques):
+        """Should return the catalog."""
+        assert await client.get_all_musiques() == sample_musiques
+
+    async def test_revalidates_with_etag(self, client, requests_log, sample_musiques):
+        """Second fetch should send If-None-Match and reuse the cached payload on 304."""
+        await client.get_all_musiques()
+        assert await client.get_all_musiques() == sample_musiques
+        assert "if-none-match" not in requests_log[0].headers
+        assert requests_log[1].headers["if-none-match"] == 'W/"3"'
+
+    async def test_get_musique_not_found(self, client):
+        """Should return None on 404."""
+        assert await client.get_musique_by_id(99) is None
+
+    async def test_server_error_raises(self, client):
+        """Should raise on server errors."""
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.search_musiques("queen")
+
+    async def test_client_reused_between_calls(self, client):
+        """All calls should share one keep-alive client."""
+        await client.start()
+        http_client = client.client
+        await client.get_all_musiques()
+        await client.get_musique_by_id(99)
+        assert client.client is http_client
+
+    async def test_close(self, client):
+        """close() should release the pooled client and allow reopening."""
+        await client.start()
+        http_client = client.client
+        await client.close()
+        assert http_client.is_closed
+        assert client.client is not http_client
@@ -0,0 +1,147 @@
+"""Tests for catalog replica module."""
+
+import asyncio
+import threading
+from unittest.mock import AsyncMock
+
+import pytest
+from services.catalog_replica import CatalogReplica
+
+
+@pytest.fixture
+def bdd_client(sample_musiques):
+    client = AsyncMock()
+    client.get_changes.return_value = {"version": 3, "musiques": sample_musiques, "deleted": []}
+    client.get_all_musiques.return_value = sample_musiques
+    return client
+
+
+class TestCatalogReplica:
+    """Tests for CatalogReplica class."""
+
+    async def test_initial_load(self, bdd_client, sample_musiques):
+        """First sync should load the full catalog."""
+        replica = CatalogReplica(bdd_client, max_staleness=60)
+        musiques = await replica.get_musiques()
+        bdd_client.get_changes.assert_awaited_once_with(0)
+        assert replica.version == 3
+        assert replica.size == 3
+        assert [m["id"] for m in musiques] == [3, 2, 1]  # artiste, titre order
+
+    async def test_fresh_replica_not_refreshed(self, bdd_client):
+        """Within the staleness bound no request should be made."""
+        replica = CatalogReplica(bdd_client, max_staleness=60)
+        await replica.get_musiques()
+        await replica.get_musiques()
+        assert bdd_client.get_changes.await_count == 1
+
+    async def test_incremental_sync(self, bdd_client):
+        """Later syncs should only apply changes since the last version."""
+        replica = CatalogReplica(bdd_client, max_staleness=0)
+        await replica.refresh()
+        bdd_client.get_changes.return_value = {
+            "version": 5,
+            "musiques": [{"id": 2, "titre": "Beat It", "artiste": "Michael Jackson"}],
+            "deleted": [3],
+        }
+        musiques = await replica.get_musiques()
+        bdd_client.get_changes.assert_awaited_with(3)
+        assert replica.version == 5
+        assert sorted(m["titre"] for m in musiques) == ["Beat It", "Bohemian Rhapsody"]
+
+    async def test_postings_built_for_large_catalog(self, bdd_client, monkeypatch):
+        """The n-gram postings should be built at sync time when pruning applies."""
+        monkeypatch.setattr("services.catalog_replica.settings.matcher_candidate_limit", 2)
+        replica = CatalogReplica(bdd_client, max_staleness=60)
+        index = await replica.get_index()
+        assert index._postings is not None
+
+    async def test_previous_copy_served_during_rebuild(self, bdd_client, monkeypatch):
+        """The catalog and its index should be rebuilt off the event loop, then swapped."""
+        monkeypatch.setattr("services.catalog_replica.settings.matcher_phonetic", True)
+        replica = CatalogReplica(bdd_client, max_staleness=0)
+        first = await replica.get_index()
+        bdd_client.get_changes.return_value = {"version": 4, "musiques": [], "deleted": [1]}
+        release = threading.Event()
+        merge = replica._merge
+
+        def slow_merge(changes, full):
+            release.wait(timeout=5)
+            return merge(changes, full)
+
+        monkeypatch.setattr(replica, "_merge", slow_merge)
+        refresh = asyncio.create_task(replica.refresh())
+        await asyncio.sleep(0.05)
+        # The loop is free and still serves the previous copy
+        assert replica.index is first
+        assert replica.size == 3
+        release.set()
+        await refresh
+
+        assert replica.index is not first
+        assert replica.size == 2
+        assert replica.index._phonetic is not None
+
+    async def test_stale_replica_served_when_sync_fails(self, bdd_client):
+        """A failed refresh should keep serving the previous copy."""
+        replica = CatalogReplica(bdd_client, max_staleness=0)
+        await replica.refresh()
+        bdd_client.get_changes.side_effect = Exception("service-bdd down")
+        musiques = await replica.get_musiques()
+        assert len(musiques) == 3
+        assert replica.stats()["sync_errors"] == 1
+        bdd_client.get_all_musiques.assert_not_awaited()
+
+    async def test_no_retry_during_backoff(self, bdd_client, monkeypatch):
+        """Concurrent requests should not each retry a sync that just failed."""
+        now = [1000.0]
+        monkeypatch.setattr("services.catalog_replica.time.monotonic", lambda: now[0])
+        replica = CatalogReplica(bdd_client, max_staleness=0, retry_backoff=5)
+        await replica.refresh()
+        bdd_client.get_changes.side_effect = Exception("service-bdd down")
+        now[0] += 1
+
+        results = await asyncio.gather(*(replica.get_musiques() for _ in range(5)))
+        assert all(len(musiques) == 3 for musiques in results)
+        assert bdd_client.get_changes.await_count == 2
+
+        now[0] += 6
+        await replica.get_musiques()
+        assert bdd_client.get_changes.await_count == 3
+
+    async def test_live_fetch_when_empty(self, bdd_client, sample_musiques):
+        """An empty replica should fall back to fetching the catalog."""
+        bdd_client.get_changes.side_effect = Exception("service-bdd down")
+        replica = CatalogReplica(bdd_client, max_staleness=60)
+        assert await replica.get_musiques() == sample_musiques
+        assert replica.stats()["live_fetches"] == 1
+
+    async def test_index_rebuilt_per_version(self, bdd_client):
+        """The matcher index should be reused until the catalog version changes."""
+        replica = CatalogReplica(bdd_client, max_staleness=0)
+        first = await replica.get_index()
+        assert first.version == 3
+        bdd_client.get_changes.return_value = {"version": 3, "musiques": [], "deleted": []}
+        assert await replica.get_index() is first
+        bdd_client.get_changes.return_value = {"version": 4, "musiques": [], "deleted": [1]}
+        second = await replica.get_index()
+        assert second is not first
+        assert len(second) == 2
+
+    async def test_current_index(self, bdd_client):
+        """The current index should only be exposed once a copy is loaded."""
+        replica = CatalogReplica(bdd_client, max_staleness=60)
+        assert replica.index is None
+        index = await replica.get_index()
+        assert replica.index is index
+
+    async def test_stats(self, bdd_client):
+        """Stats should report size, version and age."""
+        replica = CatalogReplica(bdd_client, max_staleness=60)
+        assert replica.stats()["age_seconds"] is None
+        await replica.refresh()
+        stats = replica.stats()
+        assert stats["size"] == 3
+        assert stats["version"] == 3
+        assert stats["age_seconds"] >= 0
+        assert stats["full_syncs"] == 1
@@ -185,3 +185,8 @@ class TestCommandParser:
         intent, query = parser.parse("  joue   bohemian   rhapsody  ")
         assert intent == Intent.PLAY
         assert query is not None
+
+    def test_detect_intent_on_partial(self, parser):
+        """detect_intent should classify partial transcripts without a query."""
+        assert parser.detect_intent("  Pause") == Intent.PAUSE
+        assert parser.detect_intent("") == Intent.UNKNOWN
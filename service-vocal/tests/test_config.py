@@ -53,6 +53,29 @@ class TestSettings:
         assert config.settings.vosk_model_path == "test-model"
         assert config.settings.fuzzy_threshold == 80
 
+    def test_settings_match_mode_default(self, monkeypatch):
+        """match_mode should default to local matching."""
+        monkeypatch.delenv("MATCH_MODE", raising=False)
+        from config import Settings
+
+        assert Settings().match_mode == "local"
+
+    def test_settings_match_mode_from_environment(self, monkeypatch):
+        """match_mode should be read from MATCH_MODE."""
+        monkeypatch.setenv("MATCH_MODE", "remote")
+        from config import Settings
+
+        assert Settings().match_mode == "remote"
+
+    def test_settings_matcher_engine_from_environment(self, monkeypatch):
+        """matcher_engine should default to vectorized and be read from MATCHER_ENGINE."""
+        monkeypatch.delenv("MATCHER_ENGINE", raising=False)
+        from config import Settings
+
+        assert Settings().matcher_engine == "vectorized"
+        monkeypatch.setenv("MATCHER_ENGINE", "loop")
+        assert Settings().matcher_engine == "loop"
+
     def test_settings_instance_exists(self):
         """Global settings instance should exist."""
         from config import settings
@@ -0,0 +1,41 @@
+"""Tests for the early-exit decoding policy."""
+
+import pickle
+
+from services.command_parser import Intent
+from services.early_exit import EarlyExitPolicy
+
+
+class TestEarlyExitPolicy:
+    """Tests for the control-intent early exit."""
+
+    def test_control_intents_only(self):
+        """Only control intents should allow stopping the decoding."""
+        policy = EarlyExitPolicy(stable_partials=2)
+        assert policy.intent("pause") == Intent.PAUSE
+        assert policy.intent("chanson suivante") == Intent.NEXT
+        assert policy.intent("joue queen") is None
+        assert policy.intent("euh") is None
+
+    def test_pickled_to_workers(self):
+        """The policy should be picklable, keeping its settings but not its counters."""
+        policy = EarlyExitPolicy(stable_partials=3)
+        policy.record({"early_exit": 1.0, "early_exit_saved": 0.2})
+
+        copy = pickle.loads(pickle.dumps(policy))
+        assert copy.stable_partials == 3
+        assert copy.intent("stop") == Intent.STOP
+        assert copy.stats()["requests"] == 0
+
+    def test_stats(self):
+        """Recorded outcomes should add up the saved decode time."""
+        policy = EarlyExitPolicy(stable_partials=2)
+        policy.record({"early_exit": 1.0, "early_exit_audio_skipped": 2.0, "early_exit_saved": 0.5})
+        policy.record({"early_exit": 0.0})
+
+        stats = policy.stats()
+        assert stats["requests"] == 2
+        assert stats["early_exits"] == 1
+        assert stats["audio_skipped"] == 2.0
+        assert stats["saved"] == 0.5
+        assert stats["early_exit_rate"] == 0.5
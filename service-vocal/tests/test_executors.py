@@ -0,0 +1,77 @@
+"""Tests for bounded executors module."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from services.executors import BoundedExecutor, ExecutorBusyError
+
+
+def square(x):
+    return x * x
+
+
+def fail():
+    raise ValueError("boom")
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor("test", max_workers=1, max_pending=2)
+    yield executor
+    executor.shutdown()
+
+
+class TestBoundedExecutor:
+    """Tests for BoundedExecutor class."""
+
+    async def test_run_returns_result(self, executor):
+        """Jobs should run in the pool and return their result."""
+        assert await executor.run(square, 4) == 16
+        stats = executor.stats()
+        assert stats["submitted"] == 1
+        assert stats["completed"] == 1
+        assert stats["pending"] == 0
+
+    async def test_runs_off_event_loop(self, executor):
+        """Jobs should not run in the event loop thread."""
+        assert await executor.run(threading.get_ident) != threading.get_ident()
+
+    async def test_exception_propagates(self, executor):
+        """Exceptions raised by the job should reach the caller."""
+        with pytest.raises(ValueError):
+            await executor.run(fail)
+        assert executor.stats()["failed"] == 1
+        assert executor.stats()["pending"] == 0
+
+    async def test_rejects_beyond_max_pending(self, executor):
+        """Jobs beyond max_pending should be rejected."""
+        release = threading.Event()
+        jobs = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorBusyError):
+            await executor.run(square, 2)
+        release.set()
+        await asyncio.gather(*jobs)
+        assert executor.stats()["rejected"] == 1
+
+    async def test_queue_wait_measured(self, executor):
+        """Time spent waiting for a worker should be recorded."""
+        await asyncio.gather(executor.run(time.sleep, 0.1), executor.run(square, 1))
+        stats = executor.stats()
+        assert stats["queue_wait_max"] >= 0.05
+        assert stats["run_time_avg"] > 0
+
+    async def test_process_pool(self):
+        """Process executors should run picklable functions."""
+        executor = BoundedExecutor("proc", max_workers=1, max_pending=1, kind="process")
+        try:
+            assert await executor.run(square, 3) == 9
+        finally:
+            executor.shutdown()
+
+    def test_invalid_kind(self):
+        """Unknown executor kinds should be rejected."""
+        with pytest.raises(ValueError):
+            BoundedExecutor("bad", max_workers=1, max_pending=1, kind="gpu")
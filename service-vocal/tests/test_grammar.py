@@ -0,0 +1,56 @@
+"""Tests for the Vosk grammar builder."""
+
+import json
+
+from services.grammar import UNKNOWN_WORD, GrammarBuilder, command_vocabulary, vocabulary
+from services.music_matcher import CatalogIndex
+
+
+class TestGrammarBuilder:
+    """Tests for the command + catalog grammar."""
+
+    def test_command_vocabulary(self):
+        """Command words should be extracted from the parser patterns."""
+        words = command_vocabulary()
+        assert {"joue", "pause", "suivante"} <= words
+        # Regex escapes such as \b should not leak into words
+        assert "bjoue" not in words
+
+    def test_vocabulary_splits_words(self):
+        """Titles should be split into lowercase words, keeping apostrophes."""
+        assert vocabulary(["Don't Stop Me Now", "AC/DC 1979"]) == {
+            "don't",
+            "stop",
+            "me",
+            "now",
+            "ac",
+            "dc",
+        }
+
+    def test_grammar_contains_catalog_and_unknown(self, sample_musiques):
+        """The grammar should list commands, titres and artistes, plus [unk]."""
+        grammar = json.loads(GrammarBuilder().grammar_for(CatalogIndex(sample_musiques, version=1)))
+        assert {"joue", "queen", "bohemian", "rhapsody", "hotel", "california"} <= set(grammar)
+        assert grammar[-1] == UNKNOWN_WORD
+
+    def test_rebuilt_on_catalog_change(self, sample_musiques):
+        """The grammar should be cached per index and rebuilt for a new version."""
+        builder = GrammarBuilder()
+        index = CatalogIndex(sample_musiques, version=1)
+        first = builder.grammar_for(index)
+        assert builder.grammar_for(index) is first
+        assert builder.stats()["builds"] == 1
+
+        builder.grammar_for(CatalogIndex(sample_musiques[:1], version=2))
+        assert builder.stats()["builds"] == 2
+        assert builder.stats()["version"] == 2
+
+    def test_fallback_rate(self):
+        """Recorded outcomes should give the share of results decoded again."""
+        builder = GrammarBuilder()
+        builder.record(False)
+        builder.record(False)
+        builder.record(True)
+        stats = builder.stats()
+        assert (stats["constrained"], stats["fallbacks"]) == (2, 1)
+        assert stats["fallback_rate"] == 1 / 3
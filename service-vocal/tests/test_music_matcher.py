@@ -1,7 +1,9 @@
 """Tests for music matcher module."""
 
+import random
+
 import pytest
-from services.music_matcher import MusicMatcher
+from services.music_matcher import CatalogIndex, MusicMatcher, ngram_terms
 
 
 class TestMusicMatcher:
@@ -168,3 +170,200 @@ class TestMusicMatcherThreshold:
         # Very different query should not match
         result = matcher.find_best_match("completely different", musiques)
         assert result is None
+
+
+class TestCatalogIndex:
+    """Tests for CatalogIndex class."""
+
+    def test_fields_are_normalized(self):
+        """Index should store lowercase fields and both combined strings."""
+        index = CatalogIndex(
+            [{"id": 1, "titre": "Billie Jean", "artiste": "Michael Jackson", "album": None}],
+            version=4,
+        )
+        assert len(index) == 1
+        assert index.version == 4
+        assert index.titres == ("billie jean",)
+        assert index.albums == ("",)
+        assert index.artiste_titres == ("michael jackson billie jean",)
+        assert index.titre_artistes == ("billie jean michael jackson",)
+
+    def test_empty_index_is_falsy(self):
+        """An empty index should behave like an empty catalog."""
+        assert not CatalogIndex([])
+        assert MusicMatcher().find_best_match("Queen", CatalogIndex([])) is None
+
+    @pytest.mark.parametrize("query", ["Queen", "bohemian", "zeppelin stairway", "Thriller", "xyz"])
+    def test_index_matches_list(self, query, sample_musiques):
+        """Matching on an index should give the same result as on the raw list."""
+        matcher = MusicMatcher()
+        index = CatalogIndex(sample_musiques)
+        assert matcher.find_best_match(query, index) == matcher.find_best_match(
+            query, sample_musiques
+        )
+        assert matcher.find_matches(query, index) == matcher.find_matches(query, sample_musiques)
+
+
+class TestMatcherEngines:
+    """Tests that the loop and vectorized engines agree."""
+
+    @pytest.fixture
+    def generated_catalog(self):
+        rng = random.Random(7)
+        words = (
+            "amour nuit soleil coeur love night sun heart dance dream sky fire rain star".split()
+        )
+        return CatalogIndex(
+            [
+                {
+                    "id": i,
+                    "titre": " ".join(rng.choice(words) for _ in range(rng.randint(1, 3))),
+                    "artiste": " ".join(rng.choice(words) for _ in range(rng.randint(1, 2))),
+                    "album": rng.choice([None, " ".join(rng.sample(words, 2))]),
+                }
+                for i in range(500)
+            ]
+        )
+
+    @pytest.mark.parametrize("query", ["amour", "night sun", "dream fire star", "xyz", "coeur"])
+    @pytest.mark.parametrize("threshold", [40, 70, 95])
+    def test_engines_give_identical_results(self, generated_catalog, query, threshold):
+        """Both engines should return the same best match and ranking."""
+        loop = MusicMatcher(engine="loop")
+        vectorized = MusicMatcher(engine="vectorized")
+        loop.threshold = vectorized.threshold = threshold
+
+        assert loop.find_best_match(query, generated_catalog) is vectorized.find_best_match(
+            query, generated_catalog
+        )
+        assert loop.find_matches(query, generated_catalog, limit=10) == vectorized.find_matches(
+            query, generated_catalog, limit=10
+        )
+
+    def test_unknown_engine_rejected(self):
+        """An unknown engine name should raise ValueError."""
+        with pytest.raises(ValueError):
+            MusicMatcher(engine="gpu")
+
+
+class TestCandidatePruning:
+    """Tests for the n-gram inverted index and candidate pruning."""
+
+    def test_ngram_terms(self):
+        """Terms should include whole tokens and padded trigrams."""
+        assert ngram_terms("ab cde") == {"ab", " ab", "ab ", "cde", " cd", "cde", "de "}
+
+    def test_postings_are_built_lazily(self, sample_musiques):
+        """Postings should map terms to sorted row numbers on first access."""
+        index = CatalogIndex(sample_musiques)
+        assert index._postings is None
+        assert index.postings["queen"].tolist() == [
+            i for i, m in enumerate(sample_musiques) if m["artiste"] == "Queen"
+        ]
+
+    def test_candidates_limit_and_order(self, sample_musiques):
+        """Candidates should be capped and returned in catalog order."""
+        index = CatalogIndex(sample_musiques)
+        rows = index.candidates("bohemian rhapsody", 2)
+        assert len(rows) == 2
+        assert rows.tolist() == sorted(rows.tolist())
+        assert "Bohemian Rhapsody" in [index.musiques[r]["titre"] for r in rows]
+
+    def test_candidates_without_shared_terms(self, sample_musiques):
+        """A query sharing no term with the catalog should return no candidates."""
+        assert len(CatalogIndex(sample_musiques).candidates("qqqq", 10)) == 0
+
+    @pytest.fixture
+    def pruned_matcher(self):
+        matcher = MusicMatcher(engine="vectorized")
+        matcher.candidate_limit = 2
+        matcher.min_candidates = 1
+        return matcher
+
+    @pytest.mark.parametrize("engine", ["vectorized", "loop"])
+    def test_pruned_match(self, pruned_matcher, sample_musiques, engine):
+        """Only candidates should be rescored, giving the expected track."""
+        pruned_matcher.engine = engine
+        index = CatalogIndex(sample_musiques)
+        result = pruned_matcher.find_best_match("Hotel California", index)
+        assert result["titre"] == "Hotel California"
+        matches = pruned_matcher.find_matches("Hotel California", index)
+        assert matches[0]["titre"] == "Hotel California"
+        assert len(matches) <= 2
+
+    def test_full_scan_when_too_few_candidates(self, pruned_matcher, sample_musiques):
+        """Fewer candidates than min_candidates should fall back to a full scan."""
+        pruned_matcher.min_candidates = 100
+        index = CatalogIndex(sample_musiques)
+        assert pruned_matcher._candidate_rows("queen", index) is None
+        assert index._postings is not None
+
+    def test_pruning_disabled(self, pruned_matcher, sample_musiques):
+        """A candidate limit of 0 should always scan the whole catalog."""
+        pruned_matcher.candidate_limit = 0
+        index = CatalogIndex(sample_musiques)
+        assert pruned_matcher._candidate_rows("queen", index) is None
+        assert index._postings is None
+
+
+class TestPhoneticLookup:
+    """Tests for the phonetic first-stage lookup."""
+
+    def test_phonetic_index_keys(self, sample_musiques):
+        """Titre, artiste and combinations should be indexed."""
+        index = CatalogIndex(sample_musiques)
+        assert index._phonetic is None
+        assert index.phonetic["kI"] == (0,)  # Queen
+
+    def test_misrecognized_artist_found(self, sample_musiques):
+        """A phonetic hit should be returned even below the fuzzy threshold."""
+        matcher = MusicMatcher()
+        matcher.threshold = 95
+        result = matcher.find_best_match("otel kalifornia", sample_musiques)
+        assert result["titre"] == "Hotel California"
+        stats = matcher.stats()
+        assert stats["phonetic_hits"] == 1
+        assert stats["phonetic_hit_rate"] == 1.0
+
+    @pytest.mark.parametrize(
+        "query, artiste", [("lède zépeline", "Led Zeppelin"), ("èd chirane", "Ed Sheeran")]
+    )
+    def test_documented_examples_hit(self, query, artiste):
+        """The README examples should be resolved by the phonetic lookup itself."""
+        musiques = [
+            {"id": 1, "titre": "Stairway to Heaven", "artiste": "Led Zeppelin"},
+            {"id": 2, "titre": "Shape of You", "artiste": "Ed Sheeran"},
+        ]
+        matcher = MusicMatcher()
+        matcher.threshold = 95
+        assert matcher.find_best_match(query, musiques)["artiste"] == artiste
+        assert matcher.stats()["phonetic_hits"] == 1
+
+    def test_miss_falls_back_to_fuzzy(self, sample_musiques):
+        """A phonetic miss should use the fuzzy matcher."""
+        matcher = MusicMatcher()
+        result = matcher.find_best_match("bohemian", sample_musiques)
+        assert result["titre"] == "Bohemian Rhapsody"
+        stats = matcher.stats()
+        assert stats["phonetic_hits"] == 0
+        assert stats["full_scans"] == 1
+
+    def test_phonetic_matches_listed_first(self, sample_musiques):
+        """find_matches should list phonetic hits before fuzzy matches."""
+        matcher = MusicMatcher()
+        matches = matcher.find_matches("michaël jaksone", sample_musiques)
+        assert matches[0]["artiste"] == "Michael Jackson"
+        assert len({m["id"] for m in matches}) == len(matches)
+
+    def test_short_keys_ignored(self, sample_musiques):
+        """Too short phonetic keys should not be looked up."""
+        matcher = MusicMatcher()
+        matcher.find_best_match("un", sample_musiques)
+        assert matcher.stats()["phonetic_lookups"] == 0
+
+    def test_phonetic_disabled(self, sample_musiques):
+        """Disabling the phonetic stage should skip the lookup."""
+        matcher = MusicMatcher()
+        matcher.phonetic = False
+        matcher.threshold = 95
+        assert matcher.find_best_match("otel kalifornia", sample_musiques) is None
@@ -0,0 +1,40 @@
+"""Tests for phonetic encoding module."""
+
+import pytest
+from services.phonetic import phonetic_keys, phonetic_text, phonetic_word
+
+
+class TestPhonetic:
+    """Tests for French phonetic keys."""
+
+    @pytest.mark.parametrize(
+        "written, recognized",
+        [
+            ("Jackson", "jaksone"),
+            ("Eminem", "éminème"),
+            ("Led Zeppelin", "lède zépeline"),
+            ("Coldplay", "colde plait"),
+            ("Pink Floyd", "pinque floyde"),
+            ("Ed Sheeran", "èd chirane"),
+            ("Metallica", "métalica"),
+        ],
+    )
+    def test_sound_alike_spellings_share_key(self, written, recognized):
+        """Spellings read alike in French should give the same key."""
+        assert phonetic_text(written) == phonetic_text(recognized)
+
+    def test_different_names_differ(self):
+        """Names that sound different should keep different keys."""
+        assert phonetic_text("Queen") != phonetic_text("Eagles")
+
+    def test_accents_and_case_ignored(self):
+        """Accents, case and punctuation should not change keys."""
+        assert phonetic_keys("Beyoncé!") == phonetic_keys("beyonce")
+
+    def test_digits_kept(self):
+        """Numbers should be kept as is."""
+        assert phonetic_keys("Blink 182") == [phonetic_word("blink"), "182"]
+
+    def test_empty_text(self):
+        """Empty text should give an empty key."""
+        assert phonetic_text("") == ""
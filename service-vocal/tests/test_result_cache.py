@@ -0,0 +1,57 @@
+"""Tests for the recognition result cache."""
+
+from services import result_cache
+from services.result_cache import ENTRY_OVERHEAD, ResultCache
+
+
+class TestResultCache:
+    """Tests for the LRU/TTL result cache."""
+
+    def test_hit_and_miss(self):
+        """Entries should be found by the hash of the same content."""
+        cache = ResultCache(max_entries=10, max_bytes=10000, ttl=60)
+        key = cache.key(b"clip")
+        assert cache.key(b"clip") == key != cache.key(b"other clip")
+
+        assert cache.get(key) is None
+        cache.put(key, {"transcript": "pause"})
+        assert cache.get(key) == {"transcript": "pause"}
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction(self):
+        """The least recently used entry should be evicted beyond max_entries."""
+        cache = ResultCache(max_entries=2, max_bytes=10000, ttl=60)
+        cache.put("a", {"transcript": "a"})
+        cache.put("b", {"transcript": "b"})
+        cache.get("a")
+        cache.put("c", {"transcript": "c"})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_memory_cap(self):
+        """Entries should be evicted to stay under max_bytes."""
+        cache = ResultCache(max_entries=100, max_bytes=2 * ENTRY_OVERHEAD + 100, ttl=60)
+        for key in "abc":
+            cache.put(key, {"transcript": "x" * 20})
+
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["bytes"] <= stats["max_bytes"]
+        # Larger than the whole cache: not stored
+        cache.put("big", {"transcript": "x" * 1000})
+        assert cache.get("big") is None
+
+    def test_ttl(self, monkeypatch):
+        """Entries should expire after the TTL."""
+        now = [1000.0]
+        monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+        cache = ResultCache(max_entries=10, max_bytes=10000, ttl=60)
+        cache.put("a", {"transcript": "a"})
+
+        now[0] += 61
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+        assert cache.stats()["bytes"] == 0
@@ -0,0 +1,289 @@
+"""Tests for speech to text worker helpers."""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from services import speech_to_text
+from services.early_exit import EarlyExitPolicy
+from services.executors import BoundedExecutor
+from services.speech_to_text import (
+    SpeechToTextService,
+    set_worker_service,
+    worker_count,
+    worker_transcribe_details,
+)
+
+
+class FakeService:
+    def transcribe_bytes(
+        self, audio_data, sample_rate=16000, grammar=None, early_exit=None, details=None
+    ):
+        return f"{len(audio_data)} bytes at {sample_rate}"
+
+
+class FakeRecognizer:
+    def __init__(self, model, sample_rate, grammar=None):
+        self.chunks = []
+        self.grammar = grammar
+        FakeRecognizer.last = self
+
+    def SetWords(self, words):
+        pass
+
+    def AcceptWaveform(self, data):
+        self.chunks.append(data)
+        return len(self.chunks) == 1
+
+    def Result(self):
+        return '{"text": "joue"}'
+
+    def FinalResult(self):
+        return '{"text": "queen"}'
+
+
+@pytest.fixture(autouse=True)
+def reset_worker_service():
+    yield
+    set_worker_service(None)
+
+
+class TestSpeechToTextWorkers:
+    """Tests for the STT worker process helpers."""
+
+    def test_service_without_model(self):
+        """A service created without loading should refuse to transcribe."""
+        service = SpeechToTextService(load_model=False)
+        with pytest.raises(RuntimeError):
+            service.transcribe("command.wav")
+
+    def test_transcribe_bytes_feeds_chunks_without_copy(self, monkeypatch):
+        """PCM should be fed to Vosk in chunks taken from a memoryview."""
+        monkeypatch.setattr(speech_to_text, "KaldiRecognizer", FakeRecognizer)
+        service = SpeechToTextService(load_model=False)
+        service.model = object()
+        pcm = bytes(20000)
+
+        assert service.transcribe_bytes(memoryview(pcm)) == "joue queen"
+        chunks = FakeRecognizer.last.chunks
+        assert [len(chunk) for chunk in chunks] == [8000, 8000, 4000]
+        assert all(not isinstance(chunk, bytes) for chunk in chunks)
+
+    def test_transcribe_stream_consumes_chunks(self, monkeypatch):
+        """Chunks should be recognized as the iterator produces them."""
+        monkeypatch.setattr(speech_to_text, "KaldiRecognizer", FakeRecognizer)
+        service = SpeechToTextService(load_model=False)
+        service.model = object()
+
+        assert service.transcribe_stream(iter([b"\x00" * 10, b"\x00" * 4])) == "joue queen"
+        assert [len(chunk) for chunk in FakeRecognizer.last.chunks] == [10, 4]
+
+    def test_worker_transcribe_uses_shared_service(self):
+        """worker_transcribe_details should use the service set by the parent."""
+        set_worker_service(FakeService())
+        assert worker_transcribe_details(b"\x00" * 10) == ("10 bytes at 16000", {})
+
+    async def test_forked_workers_inherit_service(self):
+        """Workers forked after set_worker_service should share the parent service."""
+        set_worker_service(FakeService())
+        executor = BoundedExecutor("stt", 1, 1, kind="process", start_method="fork")
+        try:
+            transcript, _ = await executor.run(worker_transcribe_details, b"\x00" * 4, 8000)
+            assert transcript == "4 bytes at 8000"
+            assert len(executor.worker_pids()) == 1
+            assert "workers" in executor.stats()
+        finally:
+            executor.shutdown()
+
+    def test_init_worker_loads_private_model(self, monkeypatch):
+        """init_worker should load a model when asked or when none was inherited."""
+        service_class = MagicMock()
+        monkeypatch.setattr(speech_to_text, "SpeechToTextService", service_class)
+        speech_to_text.init_worker(load_model=False)
+        assert service_class.call_count == 1
+        speech_to_text.init_worker(load_model=True)
+        assert service_class.call_count == 2
+
+    def test_worker_count(self, monkeypatch):
+        """Workers per core should override the fixed worker count."""
+        monkeypatch.setattr(speech_to_text.settings, "stt_workers", 3)
+        monkeypatch.setattr(speech_to_text.settings, "stt_workers_per_core", 0)
+        assert worker_count() == 3
+        monkeypatch.setattr(speech_to_text.settings, "stt_workers_per_core", 2)
+        monkeypatch.setattr(speech_to_text.os, "cpu_count", lambda: 4)
+        assert worker_count() == 8
+
+
+class GrammarRecognizer(FakeRecognizer):
+    """Recognizer returning word confidences, constrained or not."""
+
+    instances = []
+    constrained_conf = 0.9
+    constrained_text = "joue queen"
+
+    def __init__(self, model, sample_rate, grammar=None):
+        super().__init__(model, sample_rate, grammar)
+        GrammarRecognizer.instances.append(self)
+
+    def Result(self):
+        return '{"text": ""}'
+
+    def FinalResult(self):
+        if self.grammar:
+            conf = GrammarRecognizer.constrained_conf
+            words = GrammarRecognizer.constrained_text.split()
+            return json.dumps({"text": " ".join(words), "result": [{"conf": conf} for _ in words]})
+        return '{"text": "joue kine", "result": [{"conf": 0.5}, {"conf": 0.4}]}'
+
+
+class TestGrammarRecognition:
+    """Tests for the grammar-constrained recognition and its fallback."""
+
+    @pytest.fixture(autouse=True)
+    def recognizer(self, monkeypatch):
+        monkeypatch.setattr(speech_to_text, "KaldiRecognizer", GrammarRecognizer)
+        monkeypatch.setattr(speech_to_text.settings, "grammar_min_confidence", 0.6)
+        GrammarRecognizer.instances = []
+        GrammarRecognizer.constrained_conf = 0.9
+        GrammarRecognizer.constrained_text = "joue queen"
+
+    def make_service(self):
+        service = SpeechToTextService(load_model=False)
+        service.model = object()
+        return service
+
+    def test_confident_grammar_result_kept(self):
+        """A confident constrained result should be returned without a second pass."""
+        details = {}
+        transcript = self.make_service().transcribe_bytes(
+            bytes(20000), grammar='["queen"]', details=details
+        )
+        assert transcript == "joue queen"
+        assert [r.grammar for r in GrammarRecognizer.instances] == ['["queen"]']
+        assert details == {"grammar_fallback": 0.0}
+
+    def test_low_confidence_falls_back_to_open_vocabulary(self):
+        """A low-confidence constrained result should be decoded again without grammar."""
+        GrammarRecognizer.constrained_conf = 0.3
+        details = {}
+
+        transcript = self.make_service().transcribe_bytes(
+            bytes(20000), grammar='["queen"]', details=details
+        )
+        assert transcript == "joue kine"
+        first, second = GrammarRecognizer.instances
+        assert second.grammar is None
+        assert [len(c) for c in second.chunks] == [len(c) for c in first.chunks]
+        assert details == {"grammar_fallback": 1.0}
+
+    def test_silence_not_decoded_again(self):
+        """An empty constrained result (confidence 0) should not trigger the fallback."""
+        GrammarRecognizer.constrained_text = ""
+        details = {}
+
+        transcript = self.make_service().transcribe_stream(
+            iter([bytes(3200)]), grammar='["queen"]', details=details
+        )
+
+        assert transcript == ""
+        assert len(GrammarRecognizer.instances) == 1
+        assert details == {"grammar_fallback": 0.0}
+
+    def test_stream_decoded_while_produced(self):
+        """With a grammar, streamed chunks should be decoded as produced and replayed."""
+        GrammarRecognizer.constrained_conf = 0.3
+        fed_before = []
+
+        def chunks():
+            for size in (10, 20, 30):
+                recognizer = (
+                    GrammarRecognizer.instances[-1] if GrammarRecognizer.instances else None
+                )
+                fed_before.append(len(recognizer.chunks) if recognizer else 0)
+                yield bytes(size)
+
+        transcript = self.make_service().transcribe_stream(chunks(), grammar='["queen"]')
+
+        assert transcript == "joue kine"
+        # The recognizer got each chunk before the next one was produced
+        assert fed_before == [0, 1, 2]
+        first, second = GrammarRecognizer.instances
+        assert [len(c) for c in second.chunks] == [10, 20, 30]
+
+    def test_stream_confidence(self):
+        """The stream confidence should be the mean of the word confidences."""
+        stream = speech_to_text.RecognitionStream(object(), 16000)
+        assert stream.confidence == 0.0
+        stream.finish()
+        assert stream.confidence == pytest.approx(0.45)
+
+
+class PartialRecognizer(FakeRecognizer):
+    """Recognizer whose partial hypothesis grows with each chunk."""
+
+    words = ["pause", "pause", "pause", "la", "musique"]
+
+    def AcceptWaveform(self, data):
+        self.chunks.append(data)
+        return False
+
+    def PartialResult(self):
+        hypothesis = " ".join(PartialRecognizer.words[: len(self.chunks)])
+        return json.dumps({"partial": hypothesis})
+
+    def FinalResult(self):
+        return json.dumps({"text": " ".join(PartialRecognizer.words[: len(self.chunks)])})
+
+
+class TestEarlyExit:
+    """Tests for decoding stopped on a control intent."""
+
+    @pytest.fixture(autouse=True)
+    def recognizer(self, monkeypatch):
+        monkeypatch.setattr(speech_to_text, "KaldiRecognizer", PartialRecognizer)
+
+    def make_service(self):
+        service = SpeechToTextService(load_model=False)
+        service.model = object()
+        return service
+
+    def test_stops_on_stable_control_intent(self):
+        """Decoding should stop once the intent is stable and report the skipped audio."""
+        details = {}
+        transcript = self.make_service().transcribe_bytes(
+            bytes(40000), early_exit=EarlyExitPolicy(stable_partials=2), details=details
+        )
+
+        assert transcript == "pause pause"
+        assert len(PartialRecognizer.last.chunks) == 2
+        assert details["early_exit"] == 1.0
+        assert details["early_exit_audio_skipped"] == pytest.approx(24000 / 32000)
+        assert details["early_exit_saved"] >= 0.0
+
+    def test_play_decoded_to_the_end(self, monkeypatch):
+        """PLAY commands should be fully decoded for their music query."""
+        monkeypatch.setattr(PartialRecognizer, "words", ["joue", "joue", "joue", "queen", "x"])
+        details = {}
+        self.make_service().transcribe_bytes(
+            bytes(40000), early_exit=EarlyExitPolicy(stable_partials=2), details=details
+        )
+
+        assert len(PartialRecognizer.last.chunks) == 5
+        assert details == {"early_exit": 0.0}
+
+    def test_stream_closed_on_early_exit(self):
+        """A chunk generator should be closed when decoding stops early."""
+        closed = []
+
+        def chunks():
+            try:
+                while True:
+                    yield bytes(8000)
+            finally:
+                closed.append(True)
+
+        transcript = self.make_service().transcribe_stream(
+            chunks(), early_exit=EarlyExitPolicy(stable_partials=2), details={}
+        )
+        assert transcript == "pause pause"
+        assert closed == [True]
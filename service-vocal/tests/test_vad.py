@@ -0,0 +1,70 @@
+"""Tests for voice activity detection module."""
+
+import numpy as np
+import pytest
+from services.vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds, amplitude=8000):
+    return (np.sin(np.arange(int(SAMPLE_RATE * seconds)) * 0.2) * amplitude).astype("<i2")
+
+
+def silence(seconds):
+    return np.zeros(int(SAMPLE_RATE * seconds), dtype="<i2")
+
+
+@pytest.fixture
+def detector():
+    return VoiceActivityDetector(threshold_db=-45, frame_ms=30, padding_ms=300, min_speech_ms=90)
+
+
+class TestVoiceActivityDetector:
+    """Tests for VoiceActivityDetector class."""
+
+    def test_trims_leading_and_trailing_silence(self, detector):
+        """Silence around speech should be cut, keeping the padding."""
+        pcm = np.concatenate([silence(2), tone(1), silence(2)]).tobytes()
+        speech, info = detector.trim(pcm, SAMPLE_RATE)
+
+        assert isinstance(speech, memoryview)
+        assert info["audio_duration"] == 5.0
+        assert info["speech_duration"] == pytest.approx(1.6, abs=0.05)
+        assert info["trimmed_duration"] == pytest.approx(3.4, abs=0.05)
+        assert len(speech) == int(info["speech_duration"] * SAMPLE_RATE) * 2
+
+    def test_silence_rejected(self, detector):
+        """A clip without speech should be rejected."""
+        speech, info = detector.trim(silence(1).tobytes(), SAMPLE_RATE)
+        assert speech is None
+        assert info["speech_duration"] == 0.0
+        assert detector.stats()["rejected"] == 1
+
+    def test_short_noise_rejected(self, detector):
+        """A click shorter than min_speech_ms should not count as speech."""
+        pcm = np.concatenate([silence(1), tone(0.03), silence(1)]).tobytes()
+        assert detector.trim(pcm, SAMPLE_RATE)[0] is None
+
+    def test_quiet_noise_below_threshold(self, detector):
+        """Background noise below the threshold should be treated as silence."""
+        assert detector.trim(tone(1, amplitude=50).tobytes(), SAMPLE_RATE)[0] is None
+
+    def test_speech_only_kept_whole(self, detector):
+        """A clip of speech only should be kept entirely."""
+        pcm = tone(1).tobytes()
+        speech, info = detector.trim(pcm, SAMPLE_RATE)
+        assert bytes(speech) == pcm
+        assert info["trimmed_duration"] == 0.0
+
+    def test_empty_audio(self, detector):
+        """Empty audio should be rejected without errors."""
+        assert detector.trim(b"", SAMPLE_RATE)[0] is None
+
+    def test_stats(self, detector):
+        """Stats should accumulate audio and trimmed durations."""
+        detector.trim(np.concatenate([silence(1), tone(1)]).tobytes(), SAMPLE_RATE)
+        stats = detector.stats()
+        assert stats["clips"] == 1
+        assert stats["audio_seconds"] == 2.0
+        assert 0 < stats["trimmed_ratio"] < 0.5